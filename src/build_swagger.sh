@@ -4,7 +4,30 @@
 #  python3 swagger_builder/schema_from_model.py
 #fi
 
-./node_modules/.bin/typeconv -f ts -t oapi --oapi-format json -o ./build src/schemas/*.ts
+# The schemas are converted in process, typeconv is only needed when building with --typeconv
+# It writes into a staging directory of its own, whose files are then moved into build/ one rename each under the
+# typeconv lock, which builds reading build/ hold shared, so parallel builds never see half-written or mixed output
+if [[ " $* " == *" --typeconv "* ]]; then
+  mkdir -p build/.locks
+  staging=$(mktemp -d build/.typeconv.XXXXXX)
+  trap 'rm -rf "$staging"' EXIT
+  ./node_modules/.bin/typeconv -f ts -t oapi --oapi-format json -o "$staging" src/schemas/*.ts || exit 1
+  publish() {
+    for file in "$staging"/*.json; do
+      [[ -e "$file" ]] && mv -f "$file" build/
+    done
+    return 0
+  }
+  if command -v flock > /dev/null; then
+    exec 9> build/.locks/typeconv.lock
+    flock 9
+    publish
+    flock -u 9
+    exec 9>&-
+  else
+    publish
+  fi
+fi
 if [[ -f /opt/venv/bin/python3 ]]; then
   /opt/venv/bin/python3 -m swagger_builder $@
 else
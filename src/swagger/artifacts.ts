@@ -0,0 +1,81 @@
+import fs from "fs";
+import path from "path";
+import express from "express";
+
+interface Variant {
+  file: string;
+  size: number;
+  etag: string;
+}
+
+interface Manifest extends Variant {
+  contentType: string;
+  encodings: { [encoding: string]: Variant };
+}
+
+export interface Artifacts {
+  mtimeMs: number;
+  manifest: Manifest;
+  files: { [file: string]: Buffer };
+}
+
+const loaded: { [manifestPath: string]: Artifacts } = {};
+
+// Mirrors manifest_filename in swagger_builder/artifacts.py
+export const manifestFilename = (filename: string): string =>
+  `${filename.replace(/\.[^.]*$/, "")}.manifest.json`;
+
+/**
+ * Loads the minified and precompressed variants of a spec written by the swagger builder with _compress set.
+ * They are kept in memory and only read again when the manifest changes.
+ */
+export const loadArtifacts = (directory: string, filename: string): Artifacts | undefined => {
+  const manifestPath = path.join(directory, manifestFilename(filename));
+  let stat: fs.Stats;
+  try {
+    stat = fs.statSync(manifestPath);
+  } catch {
+    return undefined;
+  }
+
+  const cached = loaded[manifestPath];
+  if (cached && cached.mtimeMs === stat.mtimeMs) {
+    return cached;
+  }
+
+  const manifest: Manifest = JSON.parse(fs.readFileSync(manifestPath, "utf8"));
+  const files: { [file: string]: Buffer } = {};
+  for (const variant of [manifest, ...Object.values(manifest.encodings)]) {
+    files[variant.file] = fs.readFileSync(path.join(directory, variant.file));
+  }
+  loaded[manifestPath] = { mtimeMs: stat.mtimeMs, manifest, files };
+  return loaded[manifestPath];
+};
+
+/**
+ * Sends the best precompressed variant the client accepts, or 304 when the client already has it.
+ */
+export const sendArtifacts = (
+  req: express.Request,
+  res: express.Response,
+  artifacts: Artifacts
+): void => {
+  const { manifest, files } = artifacts;
+  const encoding = req.acceptsEncodings([...Object.keys(manifest.encodings), "identity"]);
+  const variant = encoding && encoding !== "identity" ? manifest.encodings[encoding] : manifest;
+
+  res.setHeader("Cache-Control", "private, no-cache");
+  res.setHeader("Vary", "Accept-Encoding");
+  res.setHeader("ETag", variant.etag);
+  if (req.fresh) {
+    res.status(304).end();
+    return;
+  }
+
+  res.setHeader("Content-Type", manifest.contentType);
+  if (variant !== manifest) {
+    res.setHeader("Content-Encoding", encoding as string);
+  }
+  res.setHeader("Content-Length", variant.size);
+  res.end(files[variant.file]);
+};
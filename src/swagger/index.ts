@@ -1,6 +1,8 @@
 import fs from "fs";
 import express, { NextFunction } from "express";
 import swaggerUi, { SwaggerOptions } from "swagger-ui-express";
+import { loadArtifacts, sendArtifacts } from "./artifacts";
+import { loadShards } from "./shards";
 
 const router = express.Router();
 export default router;
@@ -26,11 +28,20 @@ const swagger_config: { filename: string; path: string }[] = [
 if (process.env.S3_BUCKET_URL) {
   swagger_config.pop();
   swagger_config.pop();
+} else {
+  // Each tag's shard gets its own docs page, which only loads that shard
+  swagger_config.push(...loadShards("swagger", "swagger.json"));
 }
 for (let i = 0; i < swagger_config.length; i += 1) {
   router.get(
     `/${swagger_config[i].filename}`,
     function (req: express.Request, res: express.Response, next: NextFunction) {
+      const artifacts = loadArtifacts("swagger", swagger_config[i].filename);
+      if (artifacts) {
+        sendArtifacts(req, res, artifacts);
+        return;
+      }
+
       res.header("Cache-Control", "private, no-cache, no-store, must-revalidate");
       res.header("Expires", "-1");
       res.header("Pragma", "no-cache");
@@ -53,7 +64,7 @@ for (let i = 0; i < swagger_config.length; i += 1) {
     }
   );
 
-  const swaggerDocument = JSON.parse(fs.readFileSync("swagger/swagger.json", "utf8"));
+  const swaggerDocument = JSON.parse(fs.readFileSync(`swagger/${swagger_config[i].filename}`, "utf8"));
 
   router.get(
     swagger_config[i].path,
@@ -0,0 +1,33 @@
+import fs from "fs";
+import path from "path";
+
+interface ShardEntry {
+  tag: string;
+  name: string;
+  file: string;
+  operations: number;
+  schemas: number;
+}
+
+interface ShardIndex {
+  spec: string;
+  shards: ShardEntry[];
+}
+
+// Mirrors index_filename in swagger_builder/shards.py
+export const indexFilename = (filename: string): string =>
+  `${filename.replace(/\.[^.]*$/, "")}.index.json`;
+
+/**
+ * Lists the per-tag shards of a spec written by the swagger builder with _shards set, as swagger_config entries
+ * served under /<shard name>. Returns no entries when the spec was not sharded.
+ */
+export const loadShards = (directory: string, filename: string): { filename: string; path: string }[] => {
+  let index: ShardIndex;
+  try {
+    index = JSON.parse(fs.readFileSync(path.join(directory, indexFilename(filename)), "utf8"));
+  } catch {
+    return [];
+  }
+  return index.shards.map((shard) => ({ filename: shard.file, path: `/${shard.name}` }));
+};
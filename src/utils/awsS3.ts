@@ -7,6 +7,14 @@ import { BadRequestError, NotFoundError } from "./error";
 
 export const getS3Client = (): AWS.S3 => {
   AWS.config.update({ region: process.env.AWS_REGION });
+  if (process.env.S3_ENDPOINT) {
+    // A local S3, such as the stand-in of the load test harness
+    return new AWS.S3({
+      endpoint: process.env.S3_ENDPOINT,
+      s3ForcePathStyle: true,
+      region: process.env.AWS_REGION || "us-east-1",
+    });
+  }
   return new AWS.S3();
 };
 
@@ -0,0 +1,78 @@
+import { DispatchNode, matchRoute } from "./dispatch";
+
+const tree: DispatchNode = {
+  static: {
+    identrust: {
+      static: {
+        accounts: {
+          routes: { GET: { id: 0, params: [] } },
+          static: {
+            search: { routes: { GET: { id: 1, params: [] } } },
+          },
+          param: {
+            routes: {
+              GET: { id: 2, params: ["accountId"] },
+              DELETE: { id: 3, params: ["accountId"] },
+            },
+            static: {
+              certificates: { routes: { POST: { id: 4, params: ["accountId"] } } },
+            },
+          },
+        },
+      },
+    },
+  },
+};
+
+describe("dispatch.ts", () => {
+  test("Matches a static route", () => {
+    expect(matchRoute(tree, "get", "/identrust/accounts")).toEqual({ id: 0, params: {} });
+  });
+
+  test("Matches static segments case insensitively", () => {
+    expect(matchRoute(tree, "GET", "/Identrust/Accounts/")).toEqual({ id: 0, params: {} });
+  });
+
+  test("Prefers a static segment over a parameter", () => {
+    expect(matchRoute(tree, "GET", "/identrust/accounts/search")).toEqual({ id: 1, params: {} });
+  });
+
+  test("Decodes parameters", () => {
+    expect(matchRoute(tree, "GET", "/identrust/accounts/a%20b")).toEqual({
+      id: 2,
+      params: { accountId: "a b" },
+    });
+  });
+
+  test("Falls back to the parameter when the static branch has no route", () => {
+    expect(matchRoute(tree, "DELETE", "/identrust/accounts/search")).toEqual({
+      id: 3,
+      params: { accountId: "search" },
+    });
+  });
+
+  test("Matches static segments after a parameter", () => {
+    expect(matchRoute(tree, "POST", "/identrust/accounts/42/certificates")).toEqual({
+      id: 4,
+      params: { accountId: "42" },
+    });
+  });
+
+  test("Does not match a parameter that is not a valid escape", () => {
+    expect(matchRoute(tree, "GET", "/identrust/accounts/%E0")).toBeUndefined();
+    expect(matchRoute(tree, "POST", "/identrust/accounts/%/certificates")).toBeUndefined();
+  });
+
+  test("Ignores inherited keys of the tables", () => {
+    expect(matchRoute(tree, "GET", "/constructor")).toBeUndefined();
+    expect(matchRoute(tree, "GET", "/identrust/__proto__")).toBeUndefined();
+    expect(matchRoute(tree, "constructor", "/identrust/accounts")).toBeUndefined();
+    expect(matchRoute(tree, "hasOwnProperty", "/identrust/accounts/42")).toBeUndefined();
+  });
+
+  test("No route", () => {
+    expect(matchRoute(tree, "PUT", "/identrust/accounts/42")).toBeUndefined();
+    expect(matchRoute(tree, "GET", "/identrust/accounts/42/other")).toBeUndefined();
+    expect(matchRoute(tree, "GET", "/")).toBeUndefined();
+  });
+});
@@ -0,0 +1,83 @@
+/**
+ * Matches request paths against the dispatch table generated by swagger_builder from the routes in src/api
+ */
+
+export interface DispatchRoute {
+  method: string;
+  path: string;
+  file: string;
+}
+
+export interface DispatchTarget {
+  id: number;
+  params: string[];
+}
+
+export interface DispatchNode {
+  static?: { [segment: string]: DispatchNode };
+  param?: DispatchNode;
+  routes?: { [method: string]: DispatchTarget };
+}
+
+export interface DispatchMatch {
+  id: number;
+  params: { [name: string]: string };
+}
+
+/**
+ * Looks a key up in a generated table, ignoring what the table inherits, such as constructor
+ */
+const own = <T>(table: { [key: string]: T } | undefined, key: string): T | undefined =>
+  table && Object.prototype.hasOwnProperty.call(table, key) ? table[key] : undefined;
+
+/**
+ * Finds the route for a request. Static segments are tried before parameters, falling back to the parameter when
+ * the static branch has no route for the rest of the path
+ * @param root The generated dispatch tree
+ * @param method The request method
+ * @param path The request path, without the query string
+ * @returns The id of the route and its decoded parameters, or undefined when no route matches or a parameter is not
+ *   a valid escaped value
+ */
+export const matchRoute = (
+  root: DispatchNode,
+  method: string,
+  path: string
+): DispatchMatch | undefined => {
+  const segments = path.split("/").filter((segment) => segment.length > 0);
+  const verb = method.toUpperCase();
+  const values: string[] = [];
+  const visit = (node: DispatchNode, depth: number): DispatchTarget | undefined => {
+    if (depth === segments.length) {
+      return own(node.routes, verb);
+    }
+    const child = own(node.static, segments[depth].toLowerCase());
+    const found = child && visit(child, depth + 1);
+    if (found || !node.param) {
+      return found;
+    }
+    values.push(segments[depth]);
+    const target = visit(node.param, depth + 1);
+    if (!target) {
+      values.pop();
+    }
+    return target;
+  };
+
+  const target = visit(root, 0);
+  if (!target) {
+    return undefined;
+  }
+  const params: { [name: string]: string } = {};
+  try {
+    target.params.forEach((name, index) => {
+      params[name] = decodeURIComponent(values[index]);
+    });
+  } catch (error) {
+    if (error instanceof URIError) {
+      return undefined;
+    }
+    throw error;
+  }
+  return { id: target.id, params };
+};
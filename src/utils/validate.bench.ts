@@ -0,0 +1,80 @@
+/**
+ * Compares the validators compiled by swagger_builder with _validators against interpreting the schemas.
+ * Usage: ts-node src/utils/validate.bench.ts [validators module] [spec] [iterations]
+ */
+import * as fs from "fs";
+import * as path from "path";
+import { Schema, Schemas, validate } from "./validate";
+
+const REF_PREFIX = "#/components/schemas/";
+
+/**
+ * Builds a value matching the schema, with every declared property present, to validate in the benchmark
+ */
+const sample = (schema: Schema, schemas: Schemas, depth = 0): unknown => {
+  if (typeof schema === "boolean" || depth > 8) {
+    return null;
+  }
+  if (typeof schema.$ref === "string") {
+    return sample(schemas[schema.$ref.slice(REF_PREFIX.length)] ?? {}, schemas, depth + 1);
+  }
+  if (schema.enum !== undefined) {
+    return schema.enum[0];
+  }
+  const members = schema.allOf ?? schema.anyOf ?? schema.oneOf;
+  if (members !== undefined) {
+    return sample(members[0], schemas, depth + 1);
+  }
+  const type = Array.isArray(schema.type) ? schema.type[0] : schema.type;
+  switch (type) {
+    case "string":
+      return "x".repeat(Math.max(schema.minLength ?? 1, 1));
+    case "number":
+    case "integer":
+      return schema.minimum ?? 1;
+    case "boolean":
+      return true;
+    case "array":
+      return [sample(schema.items ?? {}, schemas, depth + 1)];
+    default: {
+      const value: { [key: string]: unknown } = {};
+      for (const [name, property] of Object.entries<Schema>(schema.properties ?? {})) {
+        value[name] = sample(property, schemas, depth + 1);
+      }
+      return value;
+    }
+  }
+};
+
+const time = (iterations: number, run: () => void): number => {
+  const start = process.hrtime.bigint();
+  for (let i = 0; i < iterations; i++) {
+    run();
+  }
+  return Number(process.hrtime.bigint() - start) / iterations;
+};
+
+const main = () => {
+  const [modulePath = "src/validators", specPath = "swagger/swagger.json", count = "100000"] =
+    process.argv.slice(2);
+  const iterations = parseInt(count, 10);
+  // eslint-disable-next-line @typescript-eslint/no-var-requires
+  const { validators } = require(path.resolve(modulePath));
+  const schemas: Schemas = JSON.parse(fs.readFileSync(specPath, "utf8")).components.schemas;
+
+  console.log("schema\tcompiled ns\tinterpreted ns\tspeedup");
+  for (const name of Object.keys(validators)) {
+    const value = sample(schemas[name], schemas);
+    if (!validators[name](value) || !validate(schemas[name], value, schemas)) {
+      console.log(`${name}\tskipped, the sample value does not validate`);
+      continue;
+    }
+    const compiled = time(iterations, () => validators[name](value));
+    const interpreted = time(iterations, () => validate(schemas[name], value, schemas));
+    console.log(
+      `${name}\t${compiled.toFixed(1)}\t${interpreted.toFixed(1)}\t${(interpreted / compiled).toFixed(1)}x`
+    );
+  }
+};
+
+main();
@@ -0,0 +1,59 @@
+import { Schemas, validate } from "./validate";
+
+const schemas: Schemas = {
+  Account: {
+    type: "object",
+    properties: {
+      accountType: { type: "number" },
+      apiKey: { type: "string" },
+      apiPassword: { type: "string" },
+    },
+    required: ["accountType", "apiKey"],
+    additionalProperties: false,
+  },
+  Accounts: {
+    type: "object",
+    additionalProperties: { $ref: "#/components/schemas/Account" },
+  },
+  Kind: { type: "string", enum: ["a", "b"] },
+  Node: {
+    type: "object",
+    properties: {
+      kind: { allOf: [{ $ref: "#/components/schemas/Kind" }], nullable: true },
+      children: { type: "array", items: { $ref: "#/components/schemas/Node" }, maxItems: 2 },
+    },
+  },
+};
+
+describe("validate.ts", () => {
+  test("Accepts a matching object", () => {
+    expect(validate(schemas.Account, { accountType: 1, apiKey: "key" }, schemas)).toBe(true);
+  });
+
+  test("Rejects missing, mistyped and additional properties", () => {
+    expect(validate(schemas.Account, { accountType: 1 }, schemas)).toBe(false);
+    expect(validate(schemas.Account, { accountType: "1", apiKey: "key" }, schemas)).toBe(false);
+    expect(validate(schemas.Account, { accountType: 1, apiKey: "key", other: 1 }, schemas)).toBe(false);
+    expect(validate(schemas.Account, [], schemas)).toBe(false);
+    expect(validate(schemas.Account, null, schemas)).toBe(false);
+  });
+
+  test("Follows references in additional properties", () => {
+    expect(validate(schemas.Accounts, { one: { accountType: 1, apiKey: "key" } }, schemas)).toBe(true);
+    expect(validate(schemas.Accounts, { one: { accountType: 1 } }, schemas)).toBe(false);
+  });
+
+  test("Recursive schemas, enums and nullable", () => {
+    const node = { kind: null, children: [{ kind: "a" }, { children: [] }] };
+    expect(validate(schemas.Node, node, schemas)).toBe(true);
+    expect(validate(schemas.Node, { children: [{ kind: "c" }] }, schemas)).toBe(false);
+    expect(validate(schemas.Node, { children: [{}, {}, {}] }, schemas)).toBe(false);
+  });
+
+  test("Unions", () => {
+    const schema = { anyOf: [{ type: "string" }, { type: "number", minimum: 0 }] };
+    expect(validate(schema, "x", schemas)).toBe(true);
+    expect(validate(schema, -1, schemas)).toBe(false);
+    expect(validate({ oneOf: [{ type: "number" }, { type: "integer" }] }, 1, schemas)).toBe(false);
+  });
+});
@@ -0,0 +1,112 @@
+/**
+ * Validates values by interpreting the JSON schemas of the spec, for the same keywords as the validators
+ * swagger_builder compiles with _validators. Kept as the reference and baseline of the compiled validators
+ */
+
+// eslint-disable-next-line @typescript-eslint/no-explicit-any
+export type Schema = { [keyword: string]: any } | boolean;
+export type Schemas = { [name: string]: Schema };
+
+const REF_PREFIX = "#/components/schemas/";
+
+const isObject = (value: unknown): value is { [key: string]: unknown } =>
+  typeof value === "object" && value !== null && !Array.isArray(value);
+
+const hasType = (value: unknown, type: string): boolean => {
+  switch (type) {
+    case "string":
+    case "number":
+    case "boolean":
+      return typeof value === type;
+    case "integer":
+      return Number.isInteger(value);
+    case "array":
+      return Array.isArray(value);
+    case "object":
+      return isObject(value);
+    case "null":
+      return value === null;
+    default:
+      return true;
+  }
+};
+
+/**
+ * @param schema The schema to check the value against
+ * @param value The value, such as a parsed request body
+ * @param schemas The component schemas $refs point to
+ * @returns true if the value matches the schema
+ */
+export const validate = (schema: Schema, value: unknown, schemas: Schemas): boolean => {
+  if (typeof schema === "boolean") {
+    return schema;
+  }
+  if (typeof schema.$ref === "string") {
+    const name = schema.$ref.startsWith(REF_PREFIX) ? schema.$ref.slice(REF_PREFIX.length) : "";
+    return name in schemas ? validate(schemas[name], value, schemas) : true;
+  }
+  if (schema.nullable && value === null) {
+    return true;
+  }
+  if (schema.type !== undefined) {
+    const types: string[] = Array.isArray(schema.type) ? schema.type : [schema.type];
+    if (!types.some((type) => hasType(value, type))) {
+      return false;
+    }
+  }
+  if (schema.enum !== undefined && !schema.enum.includes(value)) {
+    return false;
+  }
+
+  if (typeof value === "string") {
+    if (schema.minLength !== undefined && value.length < schema.minLength) return false;
+    if (schema.maxLength !== undefined && value.length > schema.maxLength) return false;
+    if (schema.pattern !== undefined && !new RegExp(schema.pattern, "u").test(value)) return false;
+  }
+  if (typeof value === "number") {
+    if (schema.minimum !== undefined) {
+      if (schema.exclusiveMinimum === true ? value <= schema.minimum : value < schema.minimum) return false;
+    }
+    if (schema.maximum !== undefined) {
+      if (schema.exclusiveMaximum === true ? value >= schema.maximum : value > schema.maximum) return false;
+    }
+    if (typeof schema.exclusiveMinimum === "number" && value <= schema.exclusiveMinimum) return false;
+    if (typeof schema.exclusiveMaximum === "number" && value >= schema.exclusiveMaximum) return false;
+    if (schema.multipleOf !== undefined && value % schema.multipleOf !== 0) return false;
+  }
+  if (Array.isArray(value)) {
+    if (schema.minItems !== undefined && value.length < schema.minItems) return false;
+    if (schema.maxItems !== undefined && value.length > schema.maxItems) return false;
+    if (schema.items !== undefined && !value.every((item) => validate(schema.items, item, schemas))) {
+      return false;
+    }
+  }
+  if (isObject(value)) {
+    const properties: Schemas = schema.properties || {};
+    const required: string[] = schema.required || [];
+    if (required.some((name) => value[name] === undefined)) {
+      return false;
+    }
+    for (const key in value) {
+      if (Object.prototype.hasOwnProperty.call(properties, key)) {
+        if (value[key] !== undefined && !validate(properties[key], value[key], schemas)) return false;
+      } else if (schema.additionalProperties !== undefined) {
+        if (!validate(schema.additionalProperties, value[key], schemas)) return false;
+      }
+    }
+  }
+
+  if (schema.allOf !== undefined && !schema.allOf.every((member: Schema) => validate(member, value, schemas))) {
+    return false;
+  }
+  if (schema.anyOf !== undefined && !schema.anyOf.some((member: Schema) => validate(member, value, schemas))) {
+    return false;
+  }
+  if (
+    schema.oneOf !== undefined &&
+    schema.oneOf.filter((member: Schema) => validate(member, value, schemas)).length !== 1
+  ) {
+    return false;
+  }
+  return !(schema.not !== undefined && validate(schema.not, value, schemas));
+};
@@ -1,14 +1,52 @@
+import argparse
+import importlib
+import os
 import sys
-from .builder import SwaggerBuilder
-from .fix_schema import patch_extends
 
 
-if len(sys.argv) < 2:
-    print("Must pass one or more config files to process")
+# Subcommands named by the first argument, anything else is a config file to build. Their modules are imported on
+# use, so the client does not load the builder to ask a running daemon
+SUBCOMMANDS = ["client", "daemon", "loadtest", "payloads"]
+if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+    importlib.import_module(f".{sys.argv[1]}", __package__).main(sys.argv[2:])
     sys.exit()
 
+from .artifact_cache import ArtifactCache, open_store
+from .builder import build_configs
+from .cache import BuildCache
+from .profiler import DEFAULT_REPORT, Profiler
+from .watch import watch
 
-patch_extends()
 
-for filename in sys.argv[1:]:
-    SwaggerBuilder().build_from_config(config_filename=filename)
+parser = argparse.ArgumentParser(prog="swagger_builder", description="Builds the openapi specs from the typescript source",
+                                 epilog=f"subcommands: {', '.join(SUBCOMMANDS)}, see swagger_builder SUBCOMMAND --help")
+parser.add_argument("configs", nargs="+", help="one or more config files to process")
+parser.add_argument("-j", "--jobs", type=int, default=1, help="number of processes used to parse the route files")
+parser.add_argument("--no-cache", action="store_true", help="reparse every input instead of using build/.swagger_cache")
+parser.add_argument("--typeconv", action="store_true", help="read the interface schemas from the typeconv output in build/")
+parser.add_argument("--exit-code", action="store_true", help="exit with status 1 if any spec changed, 0 if none did")
+parser.add_argument("--watch", action="store_true", help="keep running and rebuild whenever a source file changes")
+parser.add_argument("--profile", action="store_true", help="time every phase and input file and write a report")
+parser.add_argument("--profile-report", default=DEFAULT_REPORT, metavar="FILE", help="where --profile writes its report")
+parser.add_argument("--profile-top", type=int, default=10, metavar="N", help="number of slowest files to summarize")
+parser.add_argument("--artifact-cache", default=os.environ.get("SWAGGER_ARTIFACT_CACHE"), metavar="LOCATION",
+                    help="directory or s3://bucket/prefix to restore the outputs of configs whose inputs were built before "
+                         "from, and to store new builds in (default: $SWAGGER_ARTIFACT_CACHE)")
+args = parser.parse_args()
+
+
+cache = BuildCache(enabled=not args.no_cache)
+if args.watch:
+    watch(args.configs, cache=cache, jobs=args.jobs, typeconv=args.typeconv)
+else:
+    profiler = Profiler(enabled=args.profile)
+    artifacts = ArtifactCache(open_store(args.artifact_cache) if args.artifact_cache else None)
+    _, changed_outputs = build_configs(
+        args.configs, cache=cache, jobs=args.jobs, typeconv=args.typeconv, profiler=profiler, artifacts=artifacts
+    )
+    if args.profile:
+        profiler.write_report(args.profile_report, top=args.profile_top)
+        print(profiler.summary(top=args.profile_top))
+        print(f"Wrote {args.profile_report}")
+    if args.exit_code and changed_outputs:
+        sys.exit(1)
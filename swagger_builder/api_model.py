@@ -0,0 +1,61 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# The order operations are listed in a path item in the openapi specification
+VERB_ORDER = {verb: index for index, verb in enumerate(["get", "put", "post", "delete", "options", "head", "patch", "trace"])}
+
+
+@dataclass
+class Parameter:
+    name: str
+    location: str
+    required: bool
+    description: Optional[str]
+    schema: Dict[str, Any]
+
+
+@dataclass
+class Response:
+    description: Optional[str]
+    # Schema by mimetype
+    content: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+@dataclass
+class RequestBody:
+    required: bool
+    description: Optional[str]
+    content: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+@dataclass
+class Operation:
+    tags: List[str]
+    summary: str
+    # Response by status code, the success response first and then the error codes the route returns
+    responses: Dict[str, Response]
+    is_secure: bool = True
+    request_body: Optional[RequestBody] = None
+    # None when the route takes neither path nor query parameters
+    parameters: Optional[List[Parameter]] = None
+
+
+@dataclass
+class ApiModel:
+    """
+    The api parsed from the source tree for one config, independent of the openapi version and format it is written in
+    """
+    # The top level members of the config, such as openapi and info
+    document: Dict[str, Any]
+    security: List[Dict[str, List[str]]] = field(default_factory=list)
+    security_schemes: Dict[str, Any] = field(default_factory=dict)
+    # Operation by path and verb, a later route file declaring the same operation replaces it
+    operations: Dict[Tuple[str, str], Operation] = field(default_factory=dict)
+    # Component schema by name, in the openapi 3.0 dialect the schemas are converted to
+    schemas: Dict[str, Any] = field(default_factory=dict)
+
+    def operation_keys(self) -> List[Tuple[str, str]]:
+        """
+        :return: Path and verb of every operation, sorted by path and then in the order of the openapi specification
+        """
+        return sorted(self.operations, key=lambda key: (key[0], VERB_ORDER.get(key[1], len(VERB_ORDER)), key[1]))
@@ -0,0 +1,248 @@
+from typing import Dict, List, Optional, Union
+from urllib.parse import quote, urlsplit
+import datetime
+import hashlib
+import hmac
+import io
+import json
+import os
+import tarfile
+import urllib.error
+import urllib.request
+
+from . import artifacts
+from .cache import source_digest
+from .patterns import FileMatcher, walk_matching
+from .schema_index import typeconv_source
+from .writer import file_digest, write_bytes_if_changed
+
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+class LocalArtifactStore:
+    """
+    Keeps the artifacts in a directory, such as one shared by the builds on a machine or mounted by every CI job
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def filename(self, key: str) -> str:
+        return f"{self.directory}/{key[:2]}/{key}.tar.gz"
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.filename(key), "rb") as fp:
+                return fp.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(self.filename(key)), exist_ok=True)
+        write_bytes_if_changed(data, self.filename(key))
+
+
+class S3ArtifactStore:
+    """
+    Keeps the artifacts in an S3 bucket, signing the requests with AWS signature version 4 when credentials are set.
+    With an endpoint, such as a local S3 or the stand-in of the load test harness, objects are addressed path style
+    as utils/awsS3.ts does, otherwise virtual hosted style on AWS
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint: Optional[str] = None,
+        region: str = "us-east-1",
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        session_token: Optional[str] = None,
+        timeout: float = 30,
+    ):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint = endpoint.rstrip("/") if endpoint else None
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.session_token = session_token
+        self.timeout = timeout
+
+    def url(self, key: str) -> str:
+        if self.endpoint:
+            return f"{self.endpoint}/{self.bucket}/{quote(self.prefix + key)}"
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{quote(self.prefix + key)}"
+
+    def sign(self, method: str, url: str, headers: Dict[str, str], payload_hash: str, now: datetime.datetime) -> Dict[str, str]:
+        """
+        :param method: The http method
+        :param url: The object url
+        :param headers: Headers to sign besides host, x-amz-date and x-amz-content-sha256
+        :param payload_hash: Hex sha256 of the body
+        :param now: The time of the request, in UTC
+        :return: The headers to send, with the authorization header when credentials are set
+        """
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        signed = {name.lower(): value.strip() for name, value in headers.items()}
+        signed.update({"host": urlsplit(url).netloc, "x-amz-content-sha256": payload_hash, "x-amz-date": amz_date})
+        if self.session_token:
+            signed["x-amz-security-token"] = self.session_token
+        if not (self.access_key and self.secret_key):
+            return signed
+
+        names = sorted(signed)
+        canonical_request = "\n".join(
+            [method, urlsplit(url).path or "/", urlsplit(url).query]
+            + [f"{name}:{signed[name]}" for name in names]
+            + ["", ";".join(names), payload_hash]
+        )
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join(
+            ["AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()]
+        )
+        key = f"AWS4{self.secret_key}".encode()
+        for part in [amz_date[:8], self.region, "s3", "aws4_request"]:
+            key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+        signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+        signed["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, SignedHeaders={';'.join(names)}, Signature={signature}"
+        )
+        return signed
+
+    def request(self, method: str, key: str, data: Optional[bytes] = None) -> bytes:
+        url = self.url(f"{key}.tar.gz")
+        payload_hash = hashlib.sha256(data).hexdigest() if data is not None else EMPTY_SHA256
+        headers = self.sign(method, url, {}, payload_hash, datetime.datetime.now(datetime.timezone.utc))
+        request = urllib.request.Request(url, data=data, method=method, headers=headers)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read()
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.request("GET", key)
+        except urllib.error.HTTPError as error:
+            if error.code == 404:
+                return None
+            raise
+
+    def put(self, key: str, data: bytes) -> None:
+        self.request("PUT", key, data)
+
+
+ArtifactStore = Union[LocalArtifactStore, S3ArtifactStore]
+
+
+def open_store(location: str) -> ArtifactStore:
+    """
+    :param location: s3://bucket/prefix, using S3_ENDPOINT and the AWS_* variables like the server does, or a directory
+    :return: The store for the location
+    """
+    if location.startswith("s3://"):
+        bucket, _, prefix = location[len("s3://"):].partition("/")
+        return S3ArtifactStore(
+            bucket=bucket,
+            prefix=f"{prefix.rstrip('/')}/" if prefix else "",
+            endpoint=os.environ.get("S3_ENDPOINT") or None,
+            region=os.environ.get("AWS_REGION") or "us-east-1",
+            access_key=os.environ.get("AWS_ACCESS_KEY_ID"),
+            secret_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
+            session_token=os.environ.get("AWS_SESSION_TOKEN"),
+        )
+    return LocalArtifactStore(location)
+
+
+def input_paths(file_matcher: FileMatcher, typeconv: bool) -> List[str]:
+    """
+    :return: Every file a build of a config with these _files can read: its route files, the schema files, and with
+             typeconv the typeconv output in build/
+    """
+    paths = [f"{root}/{filename}" for root, filename in walk_matching("src/api", [file_matcher])]
+    if os.path.isdir("src/schemas"):
+        paths.extend(f"src/schemas/{filename}" for filename in os.listdir("src/schemas") if not filename.startswith("."))
+    if typeconv and os.path.isdir("build"):
+        paths.extend(
+            f"build/{filename}" for filename in os.listdir("build")
+            if filename.endswith(".json") and os.path.exists(typeconv_source(f"build/{filename}"))
+        )
+    return sorted(paths)
+
+
+class ArtifactCache:
+    """
+    Looks up the files a build of a config writes by the hash of everything the build reads, so a config whose inputs
+    were built anywhere before is restored instead of built. Problems reaching the store never fail a build, they only
+    make it a miss
+    """
+
+    def __init__(self, store: Optional[ArtifactStore] = None):
+        """
+        :param store: A LocalArtifactStore or S3ArtifactStore, None disables the cache
+        """
+        self.store = store
+        self.enabled = store is not None
+
+    def key(self, config_filename: str, file_matcher: FileMatcher, typeconv: bool) -> str:
+        """
+        :return: Hex sha256 of the builder source, the config, the package.json version, whether the .br artifacts can
+                 be written and every input file. The python version is left out, so builds on any interpreter share
+                 their artifacts
+        """
+        digest = hashlib.sha256(f"{source_digest()}\0{artifacts.brotli is not None}".encode())
+        with open(config_filename, "rb") as fp:
+            digest.update(fp.read())
+        with open("package.json", "rt") as fp:
+            digest.update(f"\0{json.load(fp).get('version')}\0{typeconv}".encode())
+        for path in input_paths(file_matcher, typeconv):
+            digest.update(f"\0{path}\0{file_digest(path)}".encode())
+        return digest.hexdigest()
+
+    def restore(self, key: str) -> Optional[bool]:
+        """
+        Writes the files stored for key, leaving the files that already have their content untouched
+        :return: None on a miss, otherwise True if any file changed
+        """
+        try:
+            data = self.store.get(key)
+        except OSError as error:
+            print(f"Artifact cache unavailable: {error}")
+            return None
+        if data is None:
+            return None
+
+        files: Dict[str, bytes] = {}
+        try:
+            with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as archive:
+                for member in archive.getmembers():
+                    parts = member.name.split("/")
+                    if not member.isfile() or os.path.isabs(member.name) or ".." in parts:
+                        print(f"Ignoring artifact {key}, it has the unexpected member {member.name}")
+                        return None
+                    files[member.name] = archive.extractfile(member).read()
+        except (tarfile.TarError, OSError, EOFError) as error:
+            print(f"Ignoring artifact {key}: {error}")
+            return None
+
+        changed = False
+        for filename, content in files.items():
+            os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+            changed = write_bytes_if_changed(content, filename) or changed
+        return changed
+
+    def save(self, key: str, filenames: List[str]) -> None:
+        """
+        Stores the files a build wrote under key
+        """
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz", compresslevel=6) as archive:
+            for filename in sorted(set(filenames)):
+                with open(filename, "rb") as fp:
+                    content = fp.read()
+                info = tarfile.TarInfo(os.path.relpath(filename))
+                info.size = len(content)
+                info.mode = 0o644
+                archive.addfile(info, io.BytesIO(content))
+        try:
+            self.store.put(key, buffer.getvalue())
+        except OSError as error:
+            print(f"Artifact cache unavailable: {error}")
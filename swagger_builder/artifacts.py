@@ -0,0 +1,96 @@
+from typing import Any, Callable, Dict, List, Tuple
+import gzip
+import hashlib
+import os
+
+from .writer import write_bytes_if_changed, write_if_changed
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Set once the missing brotli has been reported, so a build with many shards and configs says it once
+brotli_warned = False
+
+
+def etag(data: bytes) -> str:
+    """
+    :param data: The bytes of one representation of the spec
+    :return: Strong entity tag for the representation
+    """
+    return f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+
+
+def manifest_filename(output_filename: str) -> str:
+    """
+    :param output_filename: The spec filename, such as swagger.json
+    :return: The manifest filename, such as swagger.manifest.json
+    """
+    return f"{os.path.splitext(output_filename)[0]}.manifest.json"
+
+
+def encoders() -> List[Tuple[str, str, Callable[[bytes], bytes]]]:
+    """
+    :return: List of content encoding, file extension and compress function for each precompressed variant
+    """
+    result: List[Tuple[str, str, Callable[[bytes], bytes]]] = [
+        ("gzip", "gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+    ]
+    if brotli is not None:
+        result.append(("br", "br", lambda data: brotli.compress(data, quality=11)))
+    return result
+
+
+def warn_missing_brotli() -> None:
+    global brotli_warned
+    if not brotli_warned:
+        print("brotli is not installed, skipping the .br artifacts")
+        brotli_warned = True
+
+
+def remove_stale(filename: str) -> bool:
+    """
+    Removes a precompressed file left by a build that had an encoder this one lacks, which the manifest no longer lists
+    :return: True if the file existed
+    """
+    try:
+        os.remove(filename)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def write_artifacts(document: Any, directory: str, output_filename: str) -> bool:
+    """
+    Writes a minified copy of the spec, a precompressed sibling of it for every available encoding and a manifest
+    with the size and strong ETag of each, for the swagger router to serve. Unchanged files are left untouched
+    :param document: The spec
+    :param directory: directory the spec is written to
+    :param output_filename: The spec filename, such as swagger.json
+    :return: True if any of the files changed
+    """
+    stem = os.path.splitext(output_filename)[0]
+    minified_filename = f"{stem}.min.json"
+    changed = write_if_changed(document, f"{directory}/{minified_filename}", minify=True)
+    with open(f"{directory}/{minified_filename}", "rb") as fp:
+        minified = fp.read()
+
+    encodings: Dict[str, Dict[str, Any]] = {}
+    for encoding, extension, compress in encoders():
+        data = compress(minified)
+        filename = f"{minified_filename}.{extension}"
+        changed = write_bytes_if_changed(data, f"{directory}/{filename}") or changed
+        encodings[encoding] = {"file": filename, "size": len(data), "etag": etag(data)}
+    if brotli is None:
+        changed = remove_stale(f"{directory}/{minified_filename}.br") or changed
+        warn_missing_brotli()
+
+    manifest = {
+        "file": minified_filename,
+        "size": len(minified),
+        "etag": etag(minified),
+        "contentType": "application/json",
+        "encodings": encodings,
+    }
+    return write_if_changed(manifest, f"{directory}/{manifest_filename(output_filename)}") or changed
@@ -0,0 +1,158 @@
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from . import schema_from_model
+from .builder import SwaggerBuilder
+from .cache import BuildCache
+from .synthetic import generate_project
+from .writer import write_if_changed
+
+
+@contextmanager
+def working_directory(directory: str) -> Iterator[None]:
+    # The builder works with paths relative to the project root
+    previous = os.getcwd()
+    os.chdir(directory)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def time_phases(config_filename: str, typeconv: bool, cache: BuildCache) -> Dict[str, float]:
+    """
+    Runs one build_from_config, timing each phase separately
+    :return: Dictionary of phase to seconds
+    """
+    builder = SwaggerBuilder(cache=cache, typeconv=typeconv)
+    steps: List[Tuple[str, Callable[[], Any]]] = [
+        ("load_config", lambda: builder.load_config(config_filename)),
+        ("load_corpus", lambda: setattr(builder, "corpus", builder.load_corpus([builder.file_matcher]))),
+        ("load_version", lambda: (builder.load_version("package.json"), builder.setup_model())),
+        ("process_api", builder.process_api),
+        ("load_schemas", builder.load_schemas),
+        ("add_schemas_in_use", builder.add_schemas_in_use),
+        ("emit", builder.emit),
+        ("write", builder.write),
+    ]
+    timings: Dict[str, float] = {}
+    for phase, step in steps:
+        started = time.perf_counter()
+        step()
+        timings[phase] = time.perf_counter() - started
+    cache.save()
+    return timings
+
+
+def best_of(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    return {phase: min(run[phase] for run in runs) for phase in runs[0]}
+
+
+def benchmark_size(directory: str, routes: int, schemas: int, repeat: int) -> List[Dict[str, Any]]:
+    """
+    Generates a project of one size and times the build in each mode, keeping the fastest of repeat runs
+    :return: List of results, one per mode
+    """
+    results: List[Dict[str, Any]] = []
+    config_filename = generate_project(directory, routes=routes, schemas=schemas)
+    with working_directory(directory):
+        for typeconv in [False, True]:
+            mode = "typeconv" if typeconv else "native"
+            cold = best_of([
+                time_phases(config_filename, typeconv, BuildCache(enabled=False)) for _ in range(repeat)
+            ])
+            cache = BuildCache(directory=f".swagger_cache_{mode}")
+            time_phases(config_filename, typeconv, cache)
+            warm = best_of([
+                time_phases(config_filename, typeconv, BuildCache(directory=f".swagger_cache_{mode}"))
+                for _ in range(repeat)
+            ])
+            for cache_state, phases in [("cold", cold), ("warm", warm)]:
+                results.append({
+                    "routes": routes,
+                    "schemas": schemas,
+                    "mode": mode,
+                    "cache": cache_state,
+                    "phases": phases,
+                    "total": sum(phases.values()),
+                })
+
+        # schema_from_model rewrites src/schemas, so it runs last
+        started = time.perf_counter()
+        schema_from_model.generate()
+        results.append({
+            "routes": routes,
+            "schemas": schemas,
+            "mode": "schema_from_model",
+            "cache": "cold",
+            "phases": {"generate": time.perf_counter() - started},
+            "total": time.perf_counter() - started,
+        })
+    return results
+
+
+def find_regressions(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], threshold: float) -> List[str]:
+    """
+    Compares results to an earlier run
+    :param threshold: how many times slower than the baseline a result may be
+    :return: List of descriptions of the results that got slower than allowed
+    """
+    def key(result: Dict[str, Any]) -> Tuple[Any, ...]:
+        return result["routes"], result["schemas"], result["mode"], result["cache"]
+
+    previous = {key(result): result for result in baseline}
+    regressions: List[str] = []
+    for result in results:
+        if key(result) in previous and result["total"] > previous[key(result)]["total"] * threshold:
+            regressions.append(
+                f"{result['mode']}/{result['cache']} with {result['routes']} routes and {result['schemas']} schemas: "
+                f"{result['total'] * 1000:.1f}ms, was {previous[key(result)]['total'] * 1000:.1f}ms"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m swagger_builder.benchmark",
+        description="Times each phase of the spec build on synthetic projects of several sizes",
+    )
+    parser.add_argument("--sizes", default="10x10,100x50,1000x300", help="comma separated ROUTESxSCHEMAS project sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the fastest is kept")
+    parser.add_argument("--output", default="build/benchmark.json", help="file to save the results to")
+    parser.add_argument("--compare", help="earlier results to compare to, exits with status 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown allowed by --compare")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    for size in args.sizes.split(","):
+        routes, schemas = [int(value) for value in size.split("x")]
+        with tempfile.TemporaryDirectory(prefix="swagger_benchmark_") as directory:
+            size_results = benchmark_size(directory, routes=routes, schemas=schemas, repeat=args.repeat)
+        for result in size_results:
+            print(f"{result['routes']:>6} routes {result['schemas']:>6} schemas  {result['mode']:<17} {result['cache']:<5}"
+                  f" {result['total'] * 1000:9.1f}ms  " +
+                  " ".join(f"{phase}={seconds * 1000:.1f}" for phase, seconds in result["phases"].items()))
+        results.extend(size_results)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    write_if_changed({"python": sys.version, "platform": platform.platform(), "results": results}, args.output)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, "rt") as fp:
+            regressions = find_regressions(results, json.load(fp)["results"], args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
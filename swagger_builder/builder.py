@@ -1,11 +1,31 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Set, Union
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+import io
 import re
 import os
 import json
 import yaml
 import sys
 
+from .api_model import ApiModel, Operation, Parameter, RequestBody, Response
+from .artifact_cache import ArtifactCache
+from .artifacts import write_artifacts
+from .cache import BuildCache
+from .components import share_components
+from .profiler import FileMetrics, Profiler
+from .schema_index import SchemaIndex, typeconv_source
+from .shards import write_shards
+from .dispatch import DispatchRoute, write_dispatch
+from .emitters import EMITTERS, write_document
+from .locks import file_lock
+from .patterns import FileMatcher, walk_matching
+from .validators import write_validators
+from .symbols import SymbolFile, SymbolTable
+from .ts_schema import SchemaFile, convert_interfaces
+from .writer import recording, write_if_changed
+
 
 @dataclass
 class RouteInfo:
@@ -19,18 +39,59 @@ class RouteInfo:
     response_type: Optional[str] = None
 
 
+@dataclass
+class RouteFile:
+    url_root: str
+    route_info: Optional[RouteInfo] = None
+    error_codes: Dict[int, str] = field(default_factory=dict)
+    config: Optional[Dict[str, Any]] = None
+
+
+@dataclass(frozen=True)
+class Corpus:
+    """
+    Everything parsed from the source tree, shared read only between the builds of each config
+    """
+    route_files: Tuple[Tuple[str, RouteFile], ...]
+    schemas: SchemaIndex
+
+
 class SwaggerBuilder:
-    def __init__(self):
+    def __init__(
+        self,
+        cache: Optional[BuildCache] = None,
+        corpus: Optional[Corpus] = None,
+        jobs: int = 1,
+        typeconv: bool = False,
+        profiler: Optional[Profiler] = None,
+        artifacts: Optional[ArtifactCache] = None,
+    ):
+        self.cache = cache or BuildCache(enabled=False)
+        self.profiler = profiler or Profiler(enabled=False)
+        self.artifacts = artifacts or ArtifactCache()
+        self.artifact_key: Optional[str] = None
+        self.symbols = SymbolTable(cache=self.cache)
+        self.corpus = corpus
+        self.jobs = jobs
+        self.typeconv = typeconv
         self.openapi: Dict[str, Any] = {}
-        self.schemas: Dict[str, Any] = {}
+        self.model = ApiModel(document={})
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.schemas: Mapping[str, Any] = {}
+        self.config_filename: str = ""
         self.output_filename: str = ""
-        self.include_files: List[str] = []
-        self.path_matcher = re.compile("router.(.*?)\(\"(.*?)\"")
-        self.request_matcher = re.compile("TypedRequest(.*?)<(.*?)>")
-        self.response_matcher = re.compile("TypedResponse<(.*?)>")
-        self.status_matcher = re.compile("\.status\((.*?)\).json")
-        self.error_matcher = re.compile("next\(new (.*?)\((.*?)[,)]")
-        self.enum_matcher = re.compile("export enum (.*?) {")
+        self.compress = False
+        self.shared_components = False
+        self.shards = False
+        self.dispatch: Optional[str] = None
+        self.validators: Optional[str] = None
+        self.targets: Dict[str, str] = {}
+        self.file_matcher = FileMatcher([])
+        self.path_matcher = self.profiler.wrap(re.compile("router.(.*?)\(\"(.*?)\""))
+        self.request_matcher = self.profiler.wrap(re.compile("TypedRequest(.*?)<(.*?)>"))
+        self.response_matcher = self.profiler.wrap(re.compile("TypedResponse<(.*?)>"))
+        self.status_matcher = self.profiler.wrap(re.compile("\.status\((.*?)\).json"))
+        self.error_matcher = self.profiler.wrap(re.compile("next\(new (.*?)\((.*?)[,)]"))
         self.directory_remap = {
             "/policyTemplates": "/policytemplates",  # Yuck
         }
@@ -42,6 +103,7 @@ class SwaggerBuilder:
     def load_config(self, filename: str) -> None:
         with open(filename, "rt") as fp:
             self.openapi = yaml.safe_load(fp)
+        self.config_filename = filename
 
         if "_output" not in self.openapi:
             print("_output must be set with the filename to output")
@@ -52,21 +114,32 @@ class SwaggerBuilder:
             sys.exit()
 
         self.output_filename = self.openapi.pop("_output")
-        self.include_files = [file.strip().replace("./", "").replace("*.ts", "") for file in self.openapi.pop("_files")]
+        self.compress = self.openapi.pop("_compress", False)
+        self.shared_components = self.openapi.pop("_shared_components", False)
+        self.shards = self.openapi.pop("_shards", False)
+        self.dispatch = self.openapi.pop("_dispatch", None)
+        self.validators = self.openapi.pop("_validators", None)
+        self.targets = self.openapi.pop("_targets", None) or {}
+        for target_filename, emitter in self.targets.items():
+            if emitter not in EMITTERS:
+                print(f"_targets: {target_filename} has unknown emitter {emitter}, use one of {', '.join(EMITTERS)}")
+                sys.exit(1)
+        self.file_matcher = FileMatcher(self.openapi.pop("_files"))
 
     def load_version(self, filename: str) -> None:
         with open(filename, "rt") as fp:
             data = json.load(fp)
             self.openapi["info"]["version"] = data["version"]
 
-    def setup_default_security_and_paths(self) -> None:
-        self.openapi["security"] = [
-            {
-                "OAuth2AuthorizationCodeBearer": []
-            }
-        ]
-        self.openapi["components"] = {
-            "securitySchemes": {
+    def setup_model(self) -> None:
+        self.model = ApiModel(
+            document=self.openapi,
+            security=[
+                {
+                    "OAuth2AuthorizationCodeBearer": []
+                }
+            ],
+            security_schemes={
                 "OAuth2AuthorizationCodeBearer": {
                     "type": "oauth2",
                     "flows": {
@@ -78,9 +151,8 @@ class SwaggerBuilder:
                     }
                 }
             },
-            "schemas": {},
-        }
-        self.openapi["paths"] = {}
+        )
+        self.documents = {}
 
     def get_schema_for_type(self, type_name: str, mimetype: str = "application/json") -> Dict[str, Any]:
         """
@@ -189,7 +261,13 @@ class SwaggerBuilder:
 
         return route_info
 
-    def process_api(self) -> None:
+    def parse_route_file(self, lines: Iterable[str], url_root: str) -> RouteFile:
+        """
+        Parses a single route file, collecting the route, the error codes it can return and the swagger comment config
+        :param lines: Lines of the typescript route file
+        :param url_root: root url for the routes in this file
+        :return: parsed RouteFile object
+        """
         def process_error(line: str, error_codes: Dict[int, str]) -> None:
             matches = self.error_matcher.search(line)
             if matches:
@@ -206,318 +284,691 @@ class SwaggerBuilder:
             "NotAuthorizedError": 401,
         }
 
-        for root, dirs, files in os.walk("src/api", topdown=False):
-            for filename in files:
-                if filename == "index.ts":
-                    continue
-                url_root = root.replace("src/api", "")
-                if url_root in self.directory_remap:
-                    url_root = self.directory_remap[url_root]
-                path = f"{root}/{filename}"
-                for include_file in self.include_files:
-                    if path.startswith(include_file):
-                        break
+        error_codes: Dict[int, str] = {}
+
+        next: Optional[List[str]] = None
+        router: Optional[List[str]] = None
+        route_info: Optional[RouteInfo] = None
+        comments: List[str] = []
+        in_comment = False
+        for line in lines:
+            line = line.rstrip()
+            if line.startswith("/**"):
+                in_comment = True
+                comments = []
+                continue
+            elif line.endswith("*/"):
+                in_comment = False
+                continue
+            if in_comment:
+                line = line[line.find("*")+1:]
+                if line and "@swagger" not in line:
+                    comments.append(line)
+                continue
+
+            if "router." in line:
+                router = [line.strip()]
+                if ")" in line:
+                    # Proceed to parsing now
+                    route_info = self.process_route(url_root=url_root, lines=router)
+                    router = None
+            elif router is not None:
+                router.append(line.strip())
+                if ")" in line:
+                    route_info = self.process_route(url_root=url_root, lines=router)
+                    router = None
+
+            if "next(" in line:
+                if ")" in line:
+                    process_error(line, error_codes)
                 else:
-                    continue
+                    next = [line.strip()]
+
+            elif next is not None:
+                next.append(line.strip())
+                if ")" in line:
+                    process_error("".join(next), error_codes)
+                    next = None
+
+            if ".status(" in line:
+                matches = self.status_matcher.search(line)
+                if matches:
+                    error_codes[int(matches.groups()[0])] = "Unknown"
+
+        config: Optional[Dict[str, Any]] = None
+        if route_info is not None and route_info.request_body and route_info.response_types:
+            with self.profiler.yaml():
+                config = yaml.safe_load("\n".join(comments)) or {}
+
+        return RouteFile(url_root=url_root, route_info=route_info, error_codes=error_codes, config=config)
+
+    def read_route_files(
+        self,
+        route_paths: List[Tuple[str, str]],
+        reuse: Optional[Mapping[str, RouteFile]] = None,
+    ) -> Tuple[Tuple[str, RouteFile], ...]:
+        """
+        Reads and parses route files, reusing cached results and spreading the rest over self.jobs processes. When
+        profiling the files are parsed in process, so each one is measured
+        :param route_paths: List of path and url root for each route file
+        :param reuse: Already parsed route files by path, which are known to be unchanged and are not read again
+        :return: Tuple of path and parsed RouteFile, in the same order as route_paths
+        """
+        reuse = reuse or {}
+        pooled = self.jobs > 1 and not self.profiler.enabled
+        route_files: List[Optional[RouteFile]] = []
+        misses: List[Tuple[int, str, bytes]] = []
+        for path, url_root in route_paths:
+            if path in reuse:
+                route_files.append(reuse[path])
+                continue
+            with self.profiler.file(path, "route") as metrics:
+                with open(path, "rb") as fp:
+                    data = fp.read()
+                metrics.bytes_read = len(data)
+                route_file = self.cache.get("routes", path, route_cache_key(url_root, data))
+                metrics.cached = route_file is not None
+                if route_file is None and not pooled:
+                    route_file = parse_route_file_job((url_root, data), self)
+                    self.cache.put("routes", path, route_cache_key(url_root, data), route_file)
+            if route_file is None:
+                misses.append((len(route_files), url_root, data))
+            route_files.append(route_file)
+
+        jobs = [(url_root, data) for _, url_root, data in misses]
+        if len(jobs) > 1:
+            # pool.map keeps the input order, so the output matches a serial build
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                parsed = list(pool.map(parse_route_file_job, jobs, chunksize=max(1, len(jobs) // (self.jobs * 4))))
+        else:
+            parsed = [parse_route_file_job(job, self) for job in jobs]
 
-                error_codes: Dict[int, str] = {}
+        for (index, url_root, data), route_file in zip(misses, parsed):
+            path = route_paths[index][0]
+            self.cache.put("routes", path, route_cache_key(url_root, data), route_file)
+            route_files[index] = route_file
 
-                next: Optional[List[str]] = None
-                router: Optional[List[str]] = None
-                route_info: Optional[RouteInfo] = None
-                comments: List[str] = []
-                in_comment = False
-                for line in open(path):
-                    line = line.rstrip()
-                    if line.startswith("/**"):
-                        in_comment = True
-                        comments = []
-                        continue
-                    elif line.endswith("*/"):
-                        in_comment = False
-                        continue
-                    if in_comment:
-                        line = line[line.find("*")+1:]
-                        if line and "@swagger" not in line:
-                            comments.append(line)
-                        continue
+        return tuple((path, route_file) for (path, _), route_file in zip(route_paths, route_files))
 
-                    if "router." in line:
-                        router = [line.strip()]
-                        if ")" in line:
-                            # Proceed to parsing now
-                            route_info = self.process_route(url_root=url_root, lines=router)
-                            router = None
-                    elif router is not None:
-                        router.append(line.strip())
-                        if ")" in line:
-                            route_info = self.process_route(url_root=url_root, lines=router)
-                            router = None
-
-                    if "next(" in line:
-                        if ")" in line:
-                            process_error(line, error_codes)
-                        else:
-                            next = [line.strip()]
-
-                    elif next is not None:
-                        next.append(line.strip())
-                        if ")" in line:
-                            process_error("".join(next), error_codes)
-                            next = None
-
-                    if ".status(" in line:
-                        matches = self.status_matcher.search(line)
-                        if matches:
-                            error_codes[int(matches.groups()[0])] = "Unknown"
-
-                if route_info is None:
-                    continue
-
-                if route_info.request_body and route_info.response_types:
-                    config = yaml.safe_load("\n".join(comments)) or {}
-                    mimetype = "application/json"
-                    body_mimetypes = ["application/json"]
-                    body_required = True
-                    query_params: Dict[str, any] = {}
-                    path_params: Dict[str, any] = {}
-
-                    if route_info.uri and route_info.method:
-                        # New way of loading docs
-                        query_params = config.get("query", {})
-                        path_params = config.get("path", {})
-                        if not config.get("openapi", True):
-                            continue
-
-                        mimetype = config.get("mimetype", "application/json")
-                        body_mimetypes = config.get("bodyMimetype", "application/json").split("|")
-                        body_required = config.get("bodyRequired", True)
-                        config = {
-                            route_info.uri: {
-                                route_info.method: {
-                                    "summary": config.get("summary"),
-                                    "tags": config.get("tags", self.default_tags.get(url_root)),
-                                    "requestBody": {
-                                        "description": config.get("body"),
-                                    },
-                                    "responses": {
-                                        "200": {
-                                            "description": config.get("response")
-                                        }
-                                    }
-                                }
+    def add_route_file(self, route_file: RouteFile) -> None:
+        """
+        Adds the operations for a parsed route file to the api model
+        :param route_file: parsed RouteFile object
+        """
+        route_info = route_file.route_info
+        url_root = route_file.url_root
+        error_codes = route_file.error_codes
+        if route_file.config is None:
+            return
+
+        config = route_file.config
+        mimetype = "application/json"
+        body_mimetypes = ["application/json"]
+        body_required = True
+        query_params: Dict[str, any] = {}
+        path_params: Dict[str, any] = {}
+
+        if route_info.uri and route_info.method:
+            # New way of loading docs
+            query_params = config.get("query", {})
+            path_params = config.get("path", {})
+            if not config.get("openapi", True):
+                return
+
+            mimetype = config.get("mimetype", "application/json")
+            body_mimetypes = config.get("bodyMimetype", "application/json").split("|")
+            body_required = config.get("bodyRequired", True)
+            config = {
+                route_info.uri: {
+                    route_info.method: {
+                        "summary": config.get("summary"),
+                        "tags": config.get("tags", self.default_tags.get(url_root)),
+                        "requestBody": {
+                            "description": config.get("body"),
+                        },
+                        "responses": {
+                            "200": {
+                                "description": config.get("response")
                             }
                         }
+                    }
+                }
+            }
 
-                    for path, path_config in config.items():
-                        params: Dict[str, str] = {}
-                        if route_info.request_params != "never":
-                            for param in route_info.request_params[1:-1].split(";"):
-                                param = param.strip()
-                                if not param:
-                                    continue
-                                key, type = param.strip().split(':', 1)
-                                key = key.strip()
-                                type = type.strip()
-                                params[key] = type
-                                path = path.replace(f":{key}", f"{{{key}}}")
-
-                        if path not in self.openapi["paths"]:
-                            self.openapi["paths"][path] = {}
-
-                        for verb, verb_config in path_config.items():
-                            self.openapi["paths"][path][verb] = {
-                                "tags": verb_config.get("tags", []),
-                                "summary": verb_config.get("summary", ""),
-                                "responses": {
-                                    "200": {
-                                        "description": verb_config.get("responses", {}).get("200", {}).get("description"),
-                                        "content": {
-                                            mimetype: {
-                                                "schema": self.get_schema_for_type(route_info.response_types[0], mimetype),
-                                            },
-                                        },
-                                    },
-                                },
-                            }
-                            if not route_info.is_secure:
-                                self.openapi["paths"][path][verb]["security"] = []
-
-                            for error_code, error_description in error_codes.items():
-                                self.openapi["paths"][path][verb]["responses"][error_code] = {
-                                    "description": error_description,
-                                    "content": {
-                                        "application/json": {
-                                            "schema": self.get_schema_for_type("ResultError"),
-                                        },
-                                    },
-                                }
-
-                            if route_info.request_body != "never":
-                                self.openapi["paths"][path][verb]["requestBody"] = {
-                                    "required": body_required,
-                                    "description": verb_config.get("requestBody", {}).get("description"),
-                                    "content": {}
-                                }
-
-                                body_types = route_info.request_body.split("|")
-                                for i in range(0, min(len(body_types), len(body_mimetypes))):
-                                    self.openapi["paths"][path][verb]["requestBody"]["content"][body_mimetypes[i].strip()] = {
-                                        "schema": self.get_schema_for_type(body_types[i].strip()),
-                                    }
-
-                            if route_info.request_params != "never" or route_info.request_query:
-                                self.openapi["paths"][path][verb]["parameters"] = []
-                                for key, type in params.items():
-                                    param_config = path_params.get(key, {})
-                                    if key == "id" and "schema" not in param_config:
-                                        schema = {"type": type, "format": "uuid"}
-                                    else:
-                                        schema = param_config.get("schema", {"type": type})
-
-                                    self.openapi["paths"][path][verb]["parameters"].append({
-                                        "name": key,
-                                        "in": "path",
-                                        "required": True,
-                                        "description": param_config.get("description"),
-                                        "schema": schema,
-                                    })
-
-                                if route_info.request_query != "never":
-                                    for param in route_info.request_query[1:-1].split(";"):
-                                        key, type = param.strip().split(':', 1)
-                                        key = key.strip()
-                                        required = True
-                                        if key.endswith("?"):
-                                            key = key[:-1]
-                                            required = False
-                                        type = type.strip()
-                                        param_config = query_params.get(key, {})
-
-                                        self.openapi["paths"][path][verb]["parameters"].append({
-                                            "name": key,
-                                            "in": "query",
-                                            "required": required,
-                                            "description": param_config.get("description"),
-                                            "schema": param_config.get("schema", {"type": type})
-                                        })
-
-    def get_enum_values(self, lines: List[str]) -> List[Union[str, int]]:
-        """
-        Converts the lines in a schema enum file to a list of enums for use in openapi
-        :param lines: Lines making up the enum
-        :return: Array of enum values
-        """
-        values: List[str] = []
-        for line in lines:
-            is_string = True
-            if '"' in line or "'" in line:
-                line = line.replace('"', '').replace("'", "").strip()
-            else:
-                is_string = False
-            if line.endswith(","):
-                line = line[:-1]
-            parts = [part.strip() for part in line.split("=")]
-            if is_string:
-                values.append(parts[1])
-            else:
-                values.append(int(parts[1]))
-        return values
+        for path, path_config in config.items():
+            params: Dict[str, str] = {}
+            if route_info.request_params != "never":
+                for param in route_info.request_params[1:-1].split(";"):
+                    param = param.strip()
+                    if not param:
+                        continue
+                    key, type = param.strip().split(':', 1)
+                    key = key.strip()
+                    type = type.strip()
+                    params[key] = type
+                    path = path.replace(f":{key}", f"{{{key}}}")
+
+            for verb, verb_config in path_config.items():
+                operation = Operation(
+                    tags=verb_config.get("tags", []),
+                    summary=verb_config.get("summary", ""),
+                    responses={
+                        "200": Response(
+                            description=verb_config.get("responses", {}).get("200", {}).get("description"),
+                            content={mimetype: self.get_schema_for_type(route_info.response_types[0], mimetype)},
+                        ),
+                    },
+                    is_secure=route_info.is_secure,
+                )
+
+                for error_code, error_description in error_codes.items():
+                    # A .status(200) is the success response, which the route's TypedResponse already describes
+                    if str(error_code) == "200":
+                        continue
+                    operation.responses[str(error_code)] = Response(
+                        description=error_description,
+                        content={"application/json": self.get_schema_for_type("ResultError")},
+                    )
+
+                if route_info.request_body != "never":
+                    operation.request_body = RequestBody(
+                        required=body_required,
+                        description=verb_config.get("requestBody", {}).get("description"),
+                    )
+
+                    body_types = route_info.request_body.split("|")
+                    for i in range(0, min(len(body_types), len(body_mimetypes))):
+                        operation.request_body.content[body_mimetypes[i].strip()] = self.get_schema_for_type(body_types[i].strip())
+
+                if route_info.request_params != "never" or route_info.request_query:
+                    operation.parameters = []
+                    for key, type in params.items():
+                        param_config = path_params.get(key, {})
+                        if key == "id" and "schema" not in param_config:
+                            schema = {"type": type, "format": "uuid"}
+                        else:
+                            schema = param_config.get("schema", {"type": type})
+
+                        operation.parameters.append(Parameter(
+                            name=key,
+                            location="path",
+                            required=True,
+                            description=param_config.get("description"),
+                            schema=schema,
+                        ))
+
+                    if route_info.request_query != "never":
+                        for param in route_info.request_query[1:-1].split(";"):
+                            key, type = param.strip().split(':', 1)
+                            key = key.strip()
+                            required = True
+                            if key.endswith("?"):
+                                key = key[:-1]
+                                required = False
+                            type = type.strip()
+                            param_config = query_params.get(key, {})
+
+                            operation.parameters.append(Parameter(
+                                name=key,
+                                location="query",
+                                required=required,
+                                description=param_config.get("description"),
+                                schema=param_config.get("schema", {"type": type}),
+                            ))
+
+                self.model.operations[(path, verb)] = operation
+
+    def find_route_files(self, matchers: List[FileMatcher]) -> List[Tuple[str, str]]:
+        """
+        Walks src/api for the route files matching any of the matchers, skipping the directories none of them include
+        :param matchers: The compiled _files patterns of each config
+        :return: List of path and url root for each route file, in walk order
+        """
+        route_files: List[Tuple[str, str]] = []
+        for root, filename in walk_matching("src/api", matchers):
+            if filename == "index.ts":
+                continue
+            url_root = root.replace("src/api", "")
+            if url_root in self.directory_remap:
+                url_root = self.directory_remap[url_root]
+            route_files.append((f"{root}/{filename}", url_root))
+        return route_files
 
-    def load_schemas(self) -> None:
-        # This pulls in the previously built schema built from typeconv
-        for filename in os.listdir("build"):
-            if filename.startswith(".") or filename == "openapi.json":
+    def process_api(self) -> None:
+        for path, route_file in self.corpus.route_files:
+            if not self.file_matcher.matches(path):
                 continue
-            with open(f"build/{filename}", "rt") as fp:
-                result = json.load(fp)
-                for type, definition in result["components"]["schemas"].items():
-                    if "properties" in definition:
-                        for key, property in definition["properties"].items():
-                            del definition["properties"][key]["title"]
-                            if definition["properties"][key].get("type") == "array" and "title" in definition["properties"][key]["items"]:
-                                del definition["properties"][key]["items"]["title"]
-                            if description := definition["properties"][key].get("description"):
-                                lines = description.split("\n")
-                                new_lines = []
-                                for line in lines:
-                                    if line.startswith("@"):
-                                        doc_key, doc_value = line[1:].split(" : ")
-                                        if definition["properties"][key]["type"] == "array":
-                                            definition["properties"][key]["items"][doc_key] = doc_value
-                                        else:
-                                            definition["properties"][key][doc_key] = doc_value
-                                    else:
-                                        new_lines.append(line)
-                                if len(new_lines) > 0:
-                                    if definition["properties"][key].get("type") and definition["properties"][key]["type"] == "array":
-                                        definition["properties"][key]["items"]["description"] = "\n".join(new_lines)
-                                        del definition["properties"][key]["description"]
-                                    else:
-                                        definition["properties"][key]["description"] = "\n".join(new_lines)
+
+            with self.profiler.file(path, "paths") as metrics:
+                schemas_used = len(self.schemas_used)
+                self.add_route_file(route_file)
+                metrics.schemas = len(self.schemas_used) - schemas_used
+
+    def clean_schemas(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Strips the typeconv titles from a build file and moves the @key : value pragmas out of the descriptions
+        :param result: Parsed json from a typeconv build file
+        :return: Dictionary of schema name to cleaned definition
+        """
+        schemas: Dict[str, Any] = {}
+        for type, definition in result["components"]["schemas"].items():
+            if "properties" in definition:
+                for key, property in definition["properties"].items():
+                    del definition["properties"][key]["title"]
+                    if definition["properties"][key].get("type") == "array" and "title" in definition["properties"][key]["items"]:
+                        del definition["properties"][key]["items"]["title"]
+                    if description := definition["properties"][key].get("description"):
+                        lines = description.split("\n")
+                        new_lines = []
+                        for line in lines:
+                            if line.startswith("@"):
+                                doc_key, doc_value = line[1:].split(" : ")
+                                if definition["properties"][key]["type"] == "array":
+                                    definition["properties"][key]["items"][doc_key] = doc_value
                                 else:
-                                    del definition["properties"][key]["description"]
+                                    definition["properties"][key][doc_key] = doc_value
+                            else:
+                                new_lines.append(line)
+                        if len(new_lines) > 0:
+                            if definition["properties"][key].get("type") and definition["properties"][key]["type"] == "array":
+                                definition["properties"][key]["items"]["description"] = "\n".join(new_lines)
+                                del definition["properties"][key]["description"]
+                            else:
+                                definition["properties"][key]["description"] = "\n".join(new_lines)
+                        else:
+                            del definition["properties"][key]["description"]
 
-                    del definition["title"]
-                    self.schemas[type] = definition
+            del definition["title"]
+            schemas[type] = definition
+        return schemas
 
-        for filename in os.listdir("src/schemas"):
-            if filename.startswith("."):
+    def parse_enums(self, symbol_file: SymbolFile) -> Dict[str, Any]:
+        """
+        Finds the enums declared in a schema file
+        :param symbol_file: The scan of the typescript schema file
+        :return: Dictionary of enum name to enum schema
+        """
+        enums: Dict[str, Any] = {}
+        for symbol in symbol_file.symbols:
+            if symbol.kind != "enum":
                 continue
-            with open(f"src/schemas/{filename}", "rt") as fp:
-                enum_name: Optional[str] = None
-                enum_lines: List[str] = []
-                for line in fp:
-                    line = line.strip()
-                    if " enum " in line:
-                        enum_name = self.enum_matcher.match(line).groups()[0]
-                        enum_lines = []
-                    elif "}" in line and enum_name:
-                        type = "string"
-                        values = self.get_enum_values(enum_lines)
-                        if len(values) > 0 and isinstance(values[0], int):
-                            type = "number"
-                        self.schemas[enum_name] = {
-                            "type": type,
-                            "enum": values,
-                        }
-                        enum_name = None
-                    elif enum_name:
-                        enum_lines.append(line)
+            type = "string"
+            if len(symbol.values) > 0 and isinstance(symbol.values[0], int):
+                type = "number"
+            enums[symbol.name] = {
+                "type": type,
+                "enum": symbol.values,
+            }
+        return enums
+
+    def read_schema_file(self, path: str) -> SchemaFile:
+        """
+        Reads the schemas from a typeconv build file, or from a file in src/schemas, converting the interfaces in
+        process unless typeconv output is used
+        :param path: path to the build or schema file
+        :return: SchemaFile with the schemas found in it
+        """
+        with self.profiler.file(path, "schema") as metrics:
+            schema_file = self.load_schema_file(path, metrics)
+            metrics.schemas = len(schema_file.schemas)
+        return schema_file
+
+    def load_schema_file(self, path: str, metrics: FileMetrics) -> SchemaFile:
+        with open(path, "rb") as fp:
+            data = fp.read()
+        metrics.bytes_read = len(data)
+
+        if path.startswith("build/"):
+            # This pulls in the previously built schema built from typeconv, with the parents of each interface taken
+            # from the schema file it was generated from
+            source = SymbolFile(path=typeconv_source(path), digest="")
+            if os.path.exists(typeconv_source(path)):
+                source = self.symbols.file(typeconv_source(path))
+            key = data + b"\0" + source.digest.encode()
+            schema_file = self.cache.get("schemas", path, key)
+            metrics.cached = schema_file is not None
+            if schema_file is None:
+                schema_file = SchemaFile(schemas=self.clean_schemas(json.loads(data)))
+                for symbol in source.symbols:
+                    if symbol.name in schema_file.schemas and symbol.kind != "enum" and symbol.parents:
+                        schema_file.parents[symbol.name] = symbol.parents
+                schema_file.index_refs()
+                self.cache.put("schemas", path, key, schema_file)
+            return schema_file
+
+        section = "enums" if self.typeconv else "ts_schemas"
+        symbol_file = self.symbols.file(path, data)
+        key = data
+        if not self.typeconv:
+            # The members of implemented interfaces are copied in, so their files are part of the key
+            key = b"\0".join([data] + [
+                self.symbols.file(implemented).digest.encode() for implemented in self.symbols.implemented_paths(path)
+            ])
+        schema_file = self.cache.get(section, path, key)
+        metrics.cached = schema_file is not None
+        if schema_file is None:
+            schema_file = SchemaFile()
+            if not self.typeconv:
+                schema_file = convert_interfaces(symbol_file.symbols, self.symbols)
+            schema_file.schemas.update(self.parse_enums(symbol_file))
+            schema_file.index_refs()
+            self.cache.put(section, path, key, schema_file)
+        return schema_file
+
+    def load_corpus(
+        self,
+        matchers: List[FileMatcher],
+        previous: Optional[Corpus] = None,
+        changed: Optional[Set[str]] = None,
+    ) -> Corpus:
+        """
+        Parses the route files any of the matchers include, once for all the configs being built. Schemas are only
+        indexed here and loaded on demand as the configs reference them
+        :param matchers: The compiled _files patterns of each config
+        :param previous: Corpus from an earlier load, whose entries are reused for every path not in changed
+        :param changed: Paths that changed, were added or were removed since previous was loaded
+        :return: The parsed Corpus
+        """
+        reuse_routes: Dict[str, RouteFile] = {}
+        if previous is not None:
+            changed = changed or set()
+            reuse_routes = {path: route_file for path, route_file in previous.route_files if path not in changed}
+
+        route_files = self.read_route_files(self.find_route_files(matchers), reuse_routes)
+        self.symbols = SymbolTable(
+            cache=self.cache,
+            previous=previous.schemas.symbols if previous is not None else None,
+            changed=changed,
+        )
+        schemas = SchemaIndex(
+            loader=self.read_schema_file,
+            symbols=self.symbols,
+            typeconv=self.typeconv,
+            previous=previous.schemas if previous is not None else None,
+            changed=changed,
+        )
+        return Corpus(route_files=route_files, schemas=schemas)
+
+    def load_schemas(self) -> None:
+        self.schemas = self.corpus.schemas
 
     def add_schemas_in_use(self) -> None:
-        schemas_added: Set[str] = set()
+        for type in self.corpus.schemas.closure_of(self.schemas_used):
+            self.model.schemas[type] = self.schemas[type]
 
-        def add_type(type: str) -> None:
-            if type in schemas_added:
-                return
-            schemas_added.add(type)
-            self.openapi["components"]["schemas"][type] = self.schemas[type]
-            if "properties" in self.schemas[type]:
-                for property, property_data in self.schemas[type]["properties"].items():
-                    if "$ref" in property_data:
-                        add_type(property_data["$ref"].replace("#/components/schemas/", ""))
-                    if "items" in property_data and "$ref" in property_data["items"]:
-                        add_type(property_data["items"]["$ref"].replace("#/components/schemas/", ""))
-
-        for type in self.schemas_used:
-            add_type(type)
-
-    def sort(self) -> None:
-        self.openapi["components"]["schemas"] = {key: self.openapi["components"]["schemas"][key] for key in sorted(self.openapi["components"]["schemas"].keys())}
-        self.openapi["paths"] = {key: self.openapi["paths"][key] for key in sorted(self.openapi["paths"].keys())}
-
-    def write(self) -> None:
-        with open(f"swagger/{self.output_filename}", "wt") as fp:
-            fp.write(json.dumps(self.openapi, indent=2))
-        print(f"Wrote {self.output_filename}")
-
-    def build_from_config(self, config_filename: str) -> None:
-        self.load_config(config_filename)
-        self.load_version("package.json")
-        self.setup_default_security_and_paths()
-        self.process_api()
-        self.load_schemas()
-        self.add_schemas_in_use()
-        self.sort()
-        self.write()
+    def document(self, emitter: str) -> Dict[str, Any]:
+        """
+        Emits the api model with the named emitter, once per build however many targets use it
+        :param emitter: name of the emitter in EMITTERS
+        :return: The emitted document, with the shared components moved out when _shared_components is set
+        """
+        if emitter not in self.documents:
+            document = EMITTERS[emitter]().document(self.model)
+            if self.shared_components:
+                share_components(document)
+            self.documents[emitter] = document
+        return self.documents[emitter]
+
+    def emit(self) -> None:
+        self.openapi = self.document("openapi30")
+
+    def write(self) -> bool:
+        """
+        Writes the spec, and its minified and precompressed artifacts when _compress is set in the config and a spec
+        per tag when _shards is set, then every output in _targets from the document of its emitter, leaving the files
+        untouched when their content would not change. Builds of the same output take turns, so the manifest and the
+        shard index always describe the files written with them
+        :return: True if any of the files changed
+        """
+        with file_lock(f"output-{self.output_filename}"):
+            changed = write_if_changed(self.openapi, f"swagger/{self.output_filename}")
+            if self.compress:
+                changed = write_artifacts(self.openapi, "swagger", self.output_filename) or changed
+            if self.shards:
+                changed = write_shards(self.openapi, "swagger", self.output_filename, self.compress) or changed
+            for target_filename, emitter in self.targets.items():
+                changed = write_document(self.document(emitter), f"swagger/{target_filename}") or changed
+        if changed:
+            print(f"Wrote {self.output_filename}")
+        else:
+            print(f"{self.output_filename} is unchanged")
+        return changed
+
+    def included_routes(self) -> List[DispatchRoute]:
+        """
+        :return: The routes of the included route files, by path of the file
+        """
+        routes: List[DispatchRoute] = []
+        for path, route_file in sorted(self.corpus.route_files, key=lambda entry: entry[0]):
+            if not self.file_matcher.matches(path):
+                continue
+            route_info = route_file.route_info
+            if route_info is not None and route_info.uri and route_info.method:
+                routes.append(DispatchRoute(method=route_info.method, uri=route_info.uri, file=path))
+        return routes
+
+    def write_dispatch(self) -> bool:
+        """
+        Writes the route dispatch table for the included routes to the module named by _dispatch in the config. Routes
+        that duplicate another or have wildcard segments stop the build, routes that shadow another are reported
+        :return: True if the module changed
+        """
+        routes = self.included_routes()
+        changed, errors, shadows = write_dispatch(routes, self.dispatch)
+        for shadow in shadows:
+            print(f"Warning: {shadow}")
+        if errors:
+            for error in errors:
+                print(error)
+            sys.exit(1)
+        if changed:
+            print(f"Wrote {self.dispatch}")
+        return changed
+
+    def build_from_config(self, config_filename: str) -> bool:
+        with self.profiler.phase(config_filename, "load_config"):
+            self.load_config(config_filename)
+        restored = self.restore_artifact()
+        if restored is not None:
+            return restored
+        return self.build()
+
+    def restore_artifact(self) -> Optional[bool]:
+        """
+        Looks up the files written by an earlier build of the loaded config from the same inputs in the artifact cache,
+        and writes them in place of building
+        :return: None when the artifact cache is disabled or has no build of these inputs, otherwise True if any file
+                 changed
+        """
+        if not self.artifacts.enabled:
+            return None
+        with self.profiler.phase(self.output_filename, "artifact_key"):
+            self.artifact_key = self.artifacts.key(self.config_filename, self.file_matcher, self.typeconv)
+        with self.profiler.phase(self.output_filename, "artifact_restore"):
+            with file_lock(f"output-{self.output_filename}"):
+                changed = self.artifacts.restore(self.artifact_key)
+        if changed is None:
+            return None
+        if changed:
+            print(f"Restored {self.output_filename} from the artifact cache")
+        else:
+            print(f"{self.output_filename} is unchanged")
+        return changed
+
+    def save_artifact(self, filenames: List[str]) -> None:
+        """
+        Stores the files a build wrote in the artifact cache, unless the inputs changed while building
+        :param filenames: The files written by the build
+        """
+        if not self.artifacts.enabled:
+            return
+        key = self.artifacts.key(self.config_filename, self.file_matcher, self.typeconv)
+        if key != self.artifact_key:
+            return
+        with file_lock(f"output-{self.output_filename}"):
+            self.artifacts.save(key, filenames)
+
+    def build(self) -> bool:
+        """
+        Builds and writes the spec for the loaded config, parsing the source tree first unless a corpus was provided
+        :return: True if the spec changed
+        """
+        if self.corpus is None:
+            with self.profiler.phase(self.output_filename, "load_corpus"):
+                self.corpus = self.load_corpus([self.file_matcher])
+        with self.profiler.phase(self.output_filename, "load_version"):
+            self.load_version("package.json")
+            self.setup_model()
+        with self.profiler.phase(self.output_filename, "process_api"):
+            self.process_api()
+        with self.profiler.phase(self.output_filename, "load_schemas"):
+            self.load_schemas()
+        with self.profiler.phase(self.output_filename, "add_schemas_in_use"):
+            self.add_schemas_in_use()
+        with self.profiler.phase(self.output_filename, "emit"):
+            self.emit()
+        with recording() as written:
+            with self.profiler.phase(self.output_filename, "write"):
+                changed = self.write()
+            if self.dispatch:
+                with self.profiler.phase(self.output_filename, "dispatch"):
+                    self.write_dispatch()
+            if self.validators:
+                with self.profiler.phase(self.output_filename, "validators"):
+                    if write_validators(self.openapi, self.validators):
+                        print(f"Wrote {self.validators}")
+        with self.profiler.phase(self.output_filename, "save_cache"):
+            self.cache.save()
+        if self.artifact_key is not None:
+            with self.profiler.phase(self.output_filename, "artifact_save"):
+                self.save_artifact(written)
+        return changed
+
+
+def load_configs(
+    config_filenames: List[str],
+    cache: Optional[BuildCache] = None,
+    jobs: int = 1,
+    typeconv: bool = False,
+    previous: Optional[Corpus] = None,
+    changed: Optional[Set[str]] = None,
+    profiler: Optional[Profiler] = None,
+) -> Tuple[Corpus, List[SwaggerBuilder]]:
+    """
+    Loads the configs and parses the source tree they include, once for all of them
+    :param config_filenames: config files to load
+    :param cache: Optional persistent cache of parsed inputs
+    :param jobs: number of processes used to parse the route files
+    :param typeconv: read the interface schemas from the typeconv output in build/ instead of converting them
+    :param previous: Corpus from an earlier load, only the changed paths are parsed again
+    :param changed: Paths that changed since previous was loaded
+    :param profiler: Optional profiler collecting the cost of each phase and input file
+    :return: The corpus, and a builder for each config using it
+    """
+    profiler = profiler or Profiler(enabled=False)
+    builders = read_configs(config_filenames, cache, typeconv, profiler)
+    return load_shared_corpus(builders, cache, jobs, typeconv, previous, changed, profiler), builders
+
+
+def read_configs(
+    config_filenames: List[str],
+    cache: Optional[BuildCache] = None,
+    typeconv: bool = False,
+    profiler: Optional[Profiler] = None,
+    artifacts: Optional[ArtifactCache] = None,
+) -> List[SwaggerBuilder]:
+    """
+    :return: A builder for each config, with the config loaded
+    """
+    builders: List[SwaggerBuilder] = []
+    for filename in config_filenames:
+        builder = SwaggerBuilder(cache=cache, typeconv=typeconv, profiler=profiler, artifacts=artifacts)
+        with builder.profiler.phase(filename, "load_config"):
+            builder.load_config(filename)
+        builders.append(builder)
+    return builders
+
+
+def load_shared_corpus(
+    builders: List[SwaggerBuilder],
+    cache: Optional[BuildCache] = None,
+    jobs: int = 1,
+    typeconv: bool = False,
+    previous: Optional[Corpus] = None,
+    changed: Optional[Set[str]] = None,
+    profiler: Optional[Profiler] = None,
+) -> Corpus:
+    """
+    Parses the source tree the builders include, once for all of them, and hands the corpus to each builder
+    :return: The corpus
+    """
+    profiler = profiler or Profiler(enabled=False)
+    with profiler.phase("", "load_corpus"):
+        corpus = SwaggerBuilder(cache=cache, jobs=jobs, typeconv=typeconv, profiler=profiler).load_corpus(
+            matchers=[builder.file_matcher for builder in builders],
+            previous=previous,
+            changed=changed,
+        )
+    for builder in builders:
+        builder.corpus = corpus
+    return corpus
+
+
+def build_configs(
+    config_filenames: List[str],
+    cache: Optional[BuildCache] = None,
+    jobs: int = 1,
+    typeconv: bool = False,
+    previous: Optional[Corpus] = None,
+    changed: Optional[Set[str]] = None,
+    profiler: Optional[Profiler] = None,
+    artifacts: Optional[ArtifactCache] = None,
+) -> Tuple[Optional[Corpus], List[str]]:
+    """
+    Builds every config from a single parse of the source tree. With an artifact cache, the configs whose inputs were
+    built before are restored from it first, and the source tree is only parsed for the others
+    :param config_filenames: config files to build
+    :param cache: Optional persistent cache of parsed inputs
+    :param jobs: number of processes used to parse the route files
+    :param typeconv: read the interface schemas from the typeconv output in build/ instead of converting them
+    :param previous: Corpus from an earlier build, only the changed paths are parsed again
+    :param changed: Paths that changed since previous was loaded
+    :param profiler: Optional profiler collecting the cost of each phase and input file
+    :param artifacts: Optional cache of the files written by earlier builds of the same inputs
+    :return: The corpus the configs were built from, None when every config was restored, and the output filenames
+             whose content changed
+    """
+    # The typeconv output is read on demand throughout the builds, so src/build_swagger.sh waits to replace it
+    with file_lock("typeconv", shared=True) if typeconv else nullcontext():
+        builders = read_configs(config_filenames, cache, typeconv, profiler, artifacts)
+        changed_outputs: List[str] = []
+        remaining: List[SwaggerBuilder] = []
+        for builder in builders:
+            restored = builder.restore_artifact()
+            if restored is None:
+                remaining.append(builder)
+            elif restored:
+                changed_outputs.append(builder.output_filename)
+        if not remaining:
+            return None, changed_outputs
+
+        corpus = load_shared_corpus(remaining, cache, jobs, typeconv, previous, changed, profiler)
+        for builder in remaining:
+            if builder.build():
+                changed_outputs.append(builder.output_filename)
+    return corpus, changed_outputs
+
+
+def route_cache_key(url_root: str, data: bytes) -> bytes:
+    return url_root.encode() + b"\0" + data
+
+
+def parse_route_file_job(job: Tuple[str, bytes], builder: Optional[SwaggerBuilder] = None) -> RouteFile:
+    """
+    Parses the content of one route file. Module level so it can be sent to a process pool
+    :param job: Tuple of the url root and the raw content of the route file
+    :param builder: Builder whose matchers to use, a fresh one is created in pool workers
+    :return: parsed RouteFile object
+    """
+    url_root, data = job
+    return (builder or SwaggerBuilder()).parse_route_file(io.TextIOWrapper(io.BytesIO(data)), url_root)
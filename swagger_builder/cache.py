@@ -0,0 +1,112 @@
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import os
+import pickle
+import sys
+
+from .locks import file_lock
+from .writer import temp_filename
+
+CACHE_DIRECTORY = "build/.swagger_cache"
+
+# Bump when the shape of the cached values changes in a way the source fingerprint would not catch
+CACHE_VERSION = 1
+
+
+def source_digest() -> str:
+    """
+    :return: Hex digest of the swagger_builder sources
+    """
+    digest = hashlib.sha256()
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for filename in sorted(os.listdir(package_dir)):
+        if filename.endswith(".py"):
+            with open(os.path.join(package_dir, filename), "rb") as fp:
+                digest.update(filename.encode())
+                digest.update(fp.read())
+    return digest.hexdigest()
+
+
+def source_fingerprint() -> str:
+    """
+    Hashes the builder source so that any change to the parsing code invalidates every cached entry. The python
+    version is part of it, as the cached values are pickled
+    :return: Hex digest of the swagger_builder sources, python version and cache version
+    """
+    return hashlib.sha256(f"{CACHE_VERSION}:{sys.version}:{source_digest()}".encode()).hexdigest()
+
+
+class BuildCache:
+    """
+    Persistent cache of parsed build inputs, stored per section as {path: (content hash, value)}.
+
+    Entries are looked up by the hash of the file content, so an edited file is reparsed and everything else is reused.
+    The _files list of a config only selects which paths are looked up, so changing it never invalidates entries.
+    Anything else a parse depends on (such as the url root of a route file) must be included in the data passed in.
+    Changes to the builder source invalidate the whole cache, and entries for deleted files are dropped on save.
+    Saves merge into what other builds saved meanwhile, so builds running in parallel keep each other's entries.
+    """
+
+    def __init__(self, directory: str = CACHE_DIRECTORY, enabled: bool = True):
+        self.directory = directory
+        self.enabled = enabled
+        self.fingerprint = source_fingerprint() if enabled else ""
+        self.sections: Dict[str, Dict[str, Tuple[str, Any]]] = {}
+        self.dirty: set = set()
+
+    def section(self, name: str) -> Dict[str, Tuple[str, Any]]:
+        if name not in self.sections:
+            self.sections[name] = self.read_section(name)
+        return self.sections[name]
+
+    def read_section(self, name: str) -> Dict[str, Tuple[str, Any]]:
+        try:
+            with open(f"{self.directory}/{name}.pickle", "rb") as fp:
+                fingerprint, entries = pickle.load(fp)
+            if fingerprint == self.fingerprint:
+                return entries
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+            pass
+        return {}
+
+    def get(self, section: str, path: str, data: bytes) -> Optional[Any]:
+        """
+        Returns the cached value for a path, if it was stored for exactly this content
+        :param section: Cache section, one per kind of input
+        :param path: Path of the input file
+        :param data: Everything the cached value was derived from, normally the file content
+        :return: The cached value or None on a miss
+        """
+        if not self.enabled:
+            return None
+        entry = self.section(section).get(path)
+        if entry is None or entry[0] != hashlib.sha256(data).hexdigest():
+            return None
+        return entry[1]
+
+    def put(self, section: str, path: str, data: bytes, value: Any) -> None:
+        if not self.enabled:
+            return
+        self.section(section)[path] = (hashlib.sha256(data).hexdigest(), value)
+        self.dirty.add(section)
+
+    def save(self) -> None:
+        if not self.enabled or not self.dirty:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with file_lock("cache", directory=self.directory):
+            for name in sorted(self.dirty):
+                merged = {**self.read_section(name), **self.sections[name]}
+                entries = {path: entry for path, entry in merged.items() if os.path.exists(path)}
+                filename = f"{self.directory}/{name}.pickle"
+                temp = temp_filename(filename)
+                try:
+                    with open(temp, "xb") as fp:
+                        pickle.dump((self.fingerprint, entries), fp, protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(temp, filename)
+                except BaseException:
+                    if os.path.exists(temp):
+                        os.remove(temp)
+                    raise
+                self.sections[name] = entries
+        self.dirty = set()
@@ -0,0 +1,99 @@
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import socket
+import sys
+
+# Kept free of the builder imports, so asking a running daemon does not pay for loading them
+DEFAULT_SOCKET = "build/.swagger_builder.sock"
+DEFAULT_CONFIG = "src/swagger/swagger-doc.yaml"
+
+
+def send(socket_path: str, request: Dict[str, Any], timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Sends a request to the daemon listening on socket_path
+    :param socket_path: The daemon's unix socket
+    :param request: The request, with its command
+    :param timeout: Seconds to wait for the response, forever by default
+    :return: The response, or None when no daemon is listening
+    """
+    try:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(timeout)
+        connection.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    with connection:
+        connection.sendall(json.dumps(request).encode() + b"\n")
+        with connection.makefile("rb") as fp:
+            line = fp.readline()
+    return json.loads(line) if line else None
+
+
+def run_in_process(request: Dict[str, Any], jobs: int, typeconv: bool, use_cache: bool) -> Dict[str, Any]:
+    """
+    Answers a request as the daemon would, from a cold start
+    """
+    from .cache import BuildCache
+    from .daemon import Session
+
+    session = Session(request.get("configs") or [DEFAULT_CONFIG], BuildCache(enabled=use_cache), jobs, typeconv)
+    return session.handle(request)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m swagger_builder client",
+        description="Asks the build daemon, or builds in process when no daemon is running",
+    )
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="the daemon's unix socket")
+    parser.add_argument("--no-fallback", action="store_true", help="fail instead of building in process without a daemon")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="processes used to parse the route files in process")
+    parser.add_argument("--typeconv", action="store_true", help="read the interface schemas from build/ in process")
+    parser.add_argument("--no-cache", action="store_true", help="ignore build/.swagger_cache in process")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build configs")
+    build.add_argument("configs", nargs="+", help="config files to build")
+    build.add_argument("--exit-code", action="store_true", help="exit with status 1 if any spec changed")
+    closure = commands.add_parser("closure", help="print the schemas of types and every type they reference")
+    closure.add_argument("types", nargs="+", help="the root types")
+    closure.add_argument("--config", action="append", help="configs whose sources to look in, the daemon's by default")
+    routes = commands.add_parser("routes", help="list the routes")
+    routes.add_argument("--config", action="append", help="configs whose routes to list, the daemon's by default")
+    routes.add_argument("--json", action="store_true", help="print the routes as json")
+    commands.add_parser("ping", help="check that the daemon is running")
+    commands.add_parser("stop", help="stop the daemon")
+    args = parser.parse_args(argv)
+
+    request: Dict[str, Any] = {"command": args.command}
+    if args.command == "build":
+        request["configs"] = args.configs
+    elif args.command in ("closure", "routes"):
+        request["configs"] = args.config
+        if args.command == "closure":
+            request["types"] = args.types
+
+    response = send(args.socket, request)
+    if response is None:
+        if args.no_fallback or args.command in ("ping", "stop"):
+            print(f"No daemon is listening on {args.socket}")
+            sys.exit(1)
+        response = run_in_process(request, args.jobs, args.typeconv, not args.no_cache)
+    sys.stdout.write(response.get("output", ""))
+    if not response["ok"]:
+        print(response["error"])
+        sys.exit(1)
+
+    result = response["result"]
+    if args.command == "closure":
+        print(json.dumps(result["schemas"], indent=2))
+    elif args.command == "routes":
+        if args.json:
+            print(json.dumps(result["routes"], indent=2))
+        else:
+            for route in result["routes"]:
+                print(f"{route['method'].upper():<7} {route['uri']:<40} {route['file']}")
+    elif args.command == "ping":
+        print(f"Daemon {result['pid']} is serving {', '.join(result['configs'])}")
+    elif args.command == "build" and args.exit_code and result["changed"]:
+        sys.exit(1)
@@ -0,0 +1,118 @@
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import json
+import re
+
+# Operation members that can be moved to components, by the components section they move to
+SHARED_SECTIONS = ["responses", "parameters", "requestBodies"]
+
+
+def canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def component_name(name: str) -> str:
+    """
+    :return: The name with the characters openapi does not allow in component names replaced
+    """
+    return re.sub(r"[^a-zA-Z0-9._-]", "_", name) or "_"
+
+
+def response_name(response: Dict[str, Any]) -> str:
+    return str(response.get("description") or "Response")
+
+
+def parameter_name(parameter: Dict[str, Any]) -> str:
+    return f"{parameter.get('name', 'parameter')}{str(parameter.get('in', '')).capitalize()}"
+
+
+def request_body_name(request_body: Dict[str, Any]) -> str:
+    for content in request_body.get("content", {}).values():
+        ref = content.get("schema", {}).get("$ref") or content.get("schema", {}).get("items", {}).get("$ref")
+        if ref:
+            return ref.split("/")[-1]
+    return "RequestBody"
+
+
+class Interner:
+    """
+    Names structurally identical objects once, so each distinct object gets one component and every copy refers to it
+    """
+
+    def __init__(self, section: str, namer: Callable[[Dict[str, Any]], str], taken: Iterable[str] = ()):
+        """
+        :param section: The components section the objects are moved to
+        :param namer: Suggests a component name for an object
+        :param taken: Names already used in the section
+        """
+        self.section = section
+        self.namer = namer
+        self.taken = set(taken)
+        self.counts: Dict[str, int] = {}
+        self.names: Dict[str, str] = {}
+        self.components: Dict[str, Any] = {}
+
+    def count(self, value: Dict[str, Any]) -> None:
+        key = canonical(value)
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def intern(self, value: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        :return: A $ref to the component for value if it occurs more than once, otherwise value itself
+        """
+        key = canonical(value)
+        if self.counts.get(key, 0) < 2:
+            return value
+        if key not in self.names:
+            base = component_name(self.namer(value))
+            name, suffix = base, 2
+            while name in self.components or name in self.taken:
+                name, suffix = f"{base}{suffix}", suffix + 1
+            self.names[key] = name
+            self.components[name] = value
+        return {"$ref": f"#/components/{self.section}/{self.names[key]}"}
+
+
+def operations(openapi: Dict[str, Any]) -> List[Tuple[str, str, Dict[str, Any]]]:
+    return [
+        (path, verb, operation)
+        for path, verbs in openapi.get("paths", {}).items()
+        for verb, operation in verbs.items()
+        if isinstance(operation, dict)
+    ]
+
+
+def share_components(openapi: Dict[str, Any]) -> None:
+    """
+    Moves the responses, parameters and request bodies that occur more than once into components.responses,
+    components.parameters and components.requestBodies, replacing each copy with a $ref. Objects that occur once stay
+    inline, as a reference would only add to them. Names come from the first occurrence in path order, so sort the
+    paths first for a stable spec
+    :param openapi: The openapi document, changed in place
+    """
+    components = openapi.setdefault("components", {})
+    interners = {
+        section: Interner(section, namer, components.get(section, {}))
+        for section, namer in zip(SHARED_SECTIONS, [response_name, parameter_name, request_body_name])
+    }
+    for _, _, operation in operations(openapi):
+        for response in operation.get("responses", {}).values():
+            interners["responses"].count(response)
+        for parameter in operation.get("parameters", []):
+            interners["parameters"].count(parameter)
+        if "requestBody" in operation:
+            interners["requestBodies"].count(operation["requestBody"])
+
+    for _, _, operation in operations(openapi):
+        if "responses" in operation:
+            operation["responses"] = {
+                status: interners["responses"].intern(response) for status, response in operation["responses"].items()
+            }
+        if "parameters" in operation:
+            operation["parameters"] = [interners["parameters"].intern(parameter) for parameter in operation["parameters"]]
+        if "requestBody" in operation:
+            operation["requestBody"] = interners["requestBodies"].intern(operation["requestBody"])
+
+    for section in SHARED_SECTIONS:
+        if interners[section].components:
+            shared = {**components.get(section, {}), **interners[section].components}
+            components[section] = {name: shared[name] for name in sorted(shared)}
@@ -0,0 +1,191 @@
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+import argparse
+import contextlib
+import io
+import json
+import os
+import socketserver
+import sys
+import traceback
+
+from .builder import Corpus, build_configs, load_configs
+from .cache import BuildCache
+from .client import DEFAULT_SOCKET, send
+from .watch import changed_paths, watched_mtimes
+
+
+class Session:
+    """
+    Answers build, closure and route requests, keeping the parsed corpus of each set of configs between requests and
+    parsing again only the files whose mtime changed since
+    """
+
+    def __init__(self, configs: List[str], cache: Optional[BuildCache] = None, jobs: int = 1, typeconv: bool = False):
+        """
+        :param configs: The configs closure and route requests look in when they do not name any
+        :param cache: Optional persistent cache of parsed inputs
+        :param jobs: number of processes used to parse the route files
+        :param typeconv: read the interface schemas from the typeconv output in build/ instead of converting them
+        """
+        self.configs = configs
+        self.cache = cache or BuildCache(enabled=False)
+        self.jobs = jobs
+        self.typeconv = typeconv
+        self.corpora: Dict[Tuple[str, ...], Tuple[Corpus, Dict[str, int]]] = {}
+
+    def changes(self, configs: List[str]) -> Tuple[Optional[Corpus], Optional[Set[str]], Dict[str, int]]:
+        """
+        :return: The corpus last loaded for the configs, the paths changed since, and the current mtimes
+        """
+        current = watched_mtimes(configs)
+        if tuple(configs) not in self.corpora:
+            return None, None, current
+        corpus, mtimes = self.corpora[tuple(configs)]
+        return corpus, changed_paths(mtimes, current), current
+
+    def build(self, configs: List[str]) -> List[str]:
+        """
+        :return: The output filenames whose content changed
+        """
+        previous, changed, current = self.changes(configs)
+        corpus, changed_outputs = build_configs(
+            configs, cache=self.cache, jobs=self.jobs, typeconv=self.typeconv, previous=previous, changed=changed
+        )
+        if corpus is not None:
+            self.corpora[tuple(configs)] = (corpus, current)
+        return changed_outputs
+
+    def load(self, configs: List[str]) -> Tuple[Corpus, List[Any]]:
+        """
+        :return: The up to date corpus of the configs, and a builder for each config
+        """
+        previous, changed, current = self.changes(configs)
+        corpus, builders = load_configs(
+            configs, cache=self.cache, jobs=self.jobs, typeconv=self.typeconv, previous=previous, changed=changed
+        )
+        self.cache.save()
+        self.corpora[tuple(configs)] = (corpus, current)
+        return corpus, builders
+
+    def closure(self, configs: List[str], types: List[str]) -> Dict[str, Any]:
+        """
+        :return: Dictionary of the schema of each type and of every type they reference, directly or indirectly
+        """
+        corpus, _ = self.load(configs)
+        missing = [name for name in types if name not in corpus.schemas]
+        if missing:
+            raise ValueError(f"Unknown types: {', '.join(missing)}")
+        return {name: corpus.schemas[name] for name in corpus.schemas.closure_of(types)}
+
+    def routes(self, configs: List[str]) -> List[Dict[str, str]]:
+        """
+        :return: The routes the configs include, by path of their file
+        """
+        _, builders = self.load(configs)
+        routes: Dict[Tuple[str, str, str], Dict[str, str]] = {}
+        for builder in builders:
+            for route in builder.included_routes():
+                routes[(route.file, route.method, route.uri)] = asdict(route)
+        return [routes[key] for key in sorted(routes)]
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        :param request: The command and its arguments
+        :return: The response, with ok and the result or the error
+        """
+        command = request.get("command")
+        configs = request.get("configs") or self.configs
+        try:
+            if command == "build":
+                result: Dict[str, Any] = {"changed": self.build(configs)}
+            elif command == "closure":
+                result = {"schemas": self.closure(configs, request.get("types", []))}
+            elif command == "routes":
+                result = {"routes": self.routes(configs)}
+            elif command in ("ping", "stop"):
+                result = {"pid": os.getpid(), "configs": self.configs}
+            else:
+                return {"ok": False, "error": f"Unknown command {command}"}
+        except SystemExit:
+            return {"ok": False, "error": f"{command} failed"}
+        except ValueError as error:
+            return {"ok": False, "error": str(error)}
+        except Exception as error:
+            traceback.print_exc()
+            return {"ok": False, "error": f"{command} failed: {error}"}
+        return {"ok": True, "result": result}
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """
+    Serves one request at a time, so requests never see the session half updated
+    """
+
+    def __init__(self, socket_path: str, session: Session):
+        self.session = session
+        self.stopping = False
+        super().__init__(socket_path, DaemonHandler)
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    server: DaemonServer
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        output = io.StringIO()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            response: Dict[str, Any] = {"ok": False, "error": "Requests are one json object per line"}
+        else:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                response = self.server.session.handle(request)
+            self.server.stopping = request.get("command") == "stop"
+        response["output"] = output.getvalue()
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+def serve(socket_path: str, session: Session) -> None:
+    """
+    Answers requests on the unix socket until a stop request, replacing the socket of a daemon that is gone
+    :param socket_path: The unix socket to listen on
+    :param session: The session answering the requests
+    """
+    if send(socket_path, {"command": "ping"}, timeout=5) is not None:
+        print(f"A daemon is already listening on {socket_path}")
+        sys.exit(1)
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(socket_path)
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+
+    with DaemonServer(socket_path, session) as server:
+        try:
+            while not server.stopping:
+                server.handle_request()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(socket_path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m swagger_builder daemon",
+        description="Keeps the parsed sources in memory and answers build requests on a unix socket",
+    )
+    parser.add_argument("configs", nargs="+", help="config files to load, the default of closure and routes requests")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="the unix socket to listen on")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of processes used to parse the route files")
+    parser.add_argument("--no-cache", action="store_true", help="reparse every input instead of using build/.swagger_cache")
+    parser.add_argument("--typeconv", action="store_true", help="read the interface schemas from the typeconv output in build/")
+    args = parser.parse_args(argv)
+
+    session = Session(args.configs, BuildCache(enabled=not args.no_cache), args.jobs, args.typeconv)
+    session.load(args.configs)
+    print(f"Listening on {args.socket}")
+    sys.stdout.flush()
+    serve(args.socket, session)
@@ -0,0 +1,182 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Tuple
+import itertools
+import json
+import os
+import re
+
+from .writer import write_bytes_if_changed
+
+MATCHER_MODULE = "src/utils/dispatch"
+GENERATED_BANNER = "// Do not modify this file directly. It is generated by swagger_builder from the routes in src/api.\n"
+# The segments the dispatch tree can express: a static segment, a parameter and an optional parameter
+PARAM_SEGMENT = re.compile(r":\w+\??")
+STATIC_SEGMENT = re.compile(r"[^:*?+()]+")
+
+
+@dataclass
+class DispatchRoute:
+    method: str
+    uri: str
+    file: str
+
+    @property
+    def segments(self) -> List[str]:
+        return [segment for segment in self.uri.split("/") if segment]
+
+    @property
+    def pattern(self) -> Tuple[str, ...]:
+        """
+        :return: The segments with parameters replaced by ":", optional parameters by ":?" and static segments lower
+                 cased, as express matches them
+        """
+        return tuple(
+            (":?" if segment.endswith("?") else ":") if segment.startswith(":") else segment.lower()
+            for segment in self.segments
+        )
+
+    @property
+    def supported(self) -> bool:
+        """
+        :return: False if a segment is a wildcard, a regular expression or a parameter pattern other than :name and
+                 :name?, which the dispatch tree cannot match like express does
+        """
+        return all(PARAM_SEGMENT.fullmatch(segment) or STATIC_SEGMENT.fullmatch(segment) for segment in self.segments)
+
+    def expansions(self) -> List[List[str]]:
+        """
+        :return: The segments of every path shape the route matches, with and without each optional parameter
+        """
+        optional = [
+            index for index, segment in enumerate(self.segments) if segment.startswith(":") and segment.endswith("?")
+        ]
+        result = []
+        for present in itertools.product([True, False], repeat=len(optional)):
+            omitted = {index for index, keep in zip(optional, present) if not keep}
+            result.append([segment.rstrip("?") for index, segment in enumerate(self.segments) if index not in omitted])
+        return result
+
+    def patterns(self) -> List[Tuple[str, ...]]:
+        """
+        :return: The pattern of every path shape the route matches, parameters replaced by ":"
+        """
+        return [
+            tuple(":" if segment.startswith(":") else segment.lower() for segment in segments)
+            for segments in self.expansions()
+        ]
+
+
+def overlaps(first: Tuple[str, ...], second: Tuple[str, ...]) -> bool:
+    """
+    :return: True if some path matches both patterns
+    """
+    return len(first) == len(second) and all(a == b or ":" in (a, b) for a, b in zip(first, second))
+
+
+def find_conflicts(routes: List[DispatchRoute]) -> Tuple[List[str], List[str]]:
+    """
+    Checks the routes for errors and for shadowing. Duplicates can never both be reached, and wildcard or regular
+    expression segments cannot be put in the dispatch table, so both are errors. A route shadows another when some
+    path matches both, such as a parameter segment of one matching a static segment of the other, or an optional
+    parameter making a route match the paths of a shorter one. Express takes the route registered first and the
+    dispatch table the most static one, so shadowed routes are ambiguous and worth a look
+    :param routes: The discovered routes
+    :return: Lists of the error and of the shadowing descriptions
+    """
+    errors: List[str] = []
+    shadows: List[str] = []
+    by_method: Dict[str, List[DispatchRoute]] = {}
+    for route in routes:
+        if route.supported:
+            by_method.setdefault(route.method, []).append(route)
+        else:
+            errors.append(
+                f"{route.method.upper()} {route.uri} in {route.file} has a segment the dispatch table cannot match, "
+                "only static segments, :name and :name? are supported"
+            )
+
+    for method, method_routes in by_method.items():
+        seen: Dict[Tuple[str, ...], DispatchRoute] = {}
+        for route in method_routes:
+            if route.pattern in seen:
+                errors.append(
+                    f"{method.upper()} {route.uri} in {route.file} duplicates {seen[route.pattern].uri} in "
+                    f"{seen[route.pattern].file}"
+                )
+            else:
+                seen[route.pattern] = route
+
+        # Only path shapes of the same length can overlap, and optional parameters give a route several lengths
+        unique = list(seen.values())
+        by_length: Dict[int, List[Tuple[int, Tuple[str, ...]]]] = {}
+        for index, route in enumerate(unique):
+            for pattern in route.patterns():
+                by_length.setdefault(len(pattern), []).append((index, pattern))
+        pairs = set()
+        for same_length in by_length.values():
+            for position, (first, first_pattern) in enumerate(same_length):
+                for second, second_pattern in same_length[position + 1:]:
+                    if first != second and overlaps(first_pattern, second_pattern):
+                        pairs.add((min(first, second), max(first, second)))
+        for first, second in sorted(pairs):
+            shadows.append(
+                f"{method.upper()} {unique[first].uri} in {unique[first].file} and {unique[second].uri} in "
+                f"{unique[second].file} match some of the same paths"
+            )
+    return errors, shadows
+
+
+def build_tree(routes: Iterable[DispatchRoute]) -> Dict[str, Any]:
+    """
+    Builds the static-segment tree the generated module dispatches with. A node has its static children by lower
+    cased segment, a single parameter child and the routes ending at it by method, with the names of their parameters.
+    A route with optional parameters ends at a node for each of its path shapes
+    :param routes: The routes, without duplicates or unsupported segments
+    :return: The root node
+    """
+    root: Dict[str, Any] = {}
+    for index, route in enumerate(routes):
+        for segments in route.expansions():
+            node = root
+            params: List[str] = []
+            for segment in segments:
+                if segment.startswith(":"):
+                    params.append(segment[1:])
+                    node = node.setdefault("param", {})
+                else:
+                    node = node.setdefault("static", {}).setdefault(segment.lower(), {})
+            # A path shape a route registered earlier already matches stays with it, as in express
+            node.setdefault("routes", {}).setdefault(route.method.upper(), {"id": index, "params": params})
+    return root
+
+
+def render_module(routes: List[DispatchRoute], filename: str) -> str:
+    """
+    :param routes: The routes, without duplicates or unsupported segments
+    :param filename: The typescript module the table is written to, which the matcher is imported relative to
+    :return: The typescript module with the route list and dispatch tree
+    """
+    matcher = os.path.relpath(MATCHER_MODULE, os.path.dirname(filename) or ".")
+    if not matcher.startswith("."):
+        matcher = f"./{matcher}"
+    route_list = [{"method": route.method.upper(), "path": route.uri, "file": route.file} for route in routes]
+    return (
+        GENERATED_BANNER
+        + f'import {{ DispatchNode, DispatchRoute }} from "{matcher}";\n\n'
+        + f"export const routes: DispatchRoute[] = {json.dumps(route_list, indent=2)};\n\n"
+        + f"export const dispatchTree: DispatchNode = {json.dumps(build_tree(routes), indent=2)};\n"
+    )
+
+
+def write_dispatch(routes: List[DispatchRoute], filename: str) -> Tuple[bool, List[str], List[str]]:
+    """
+    Checks the routes and writes the dispatch module, leaving it untouched when its content would not change
+    :param routes: The discovered routes, in registration order
+    :param filename: The typescript module to write
+    :return: Whether the module changed, and the error and shadowing descriptions. Nothing is written when there are
+             errors
+    """
+    errors, shadows = find_conflicts(routes)
+    if errors:
+        return False, errors, shadows
+    return write_bytes_if_changed(render_module(routes, filename).encode(), filename), errors, shadows
@@ -0,0 +1,145 @@
+from typing import Any, Dict, Type
+import os
+import yaml
+
+from .api_model import ApiModel, Operation, Parameter
+from .writer import write_bytes_if_changed, write_if_changed
+
+# Schema members holding one schema, and holding a list of schemas
+SCHEMA_MEMBERS = ["items", "additionalProperties", "not"]
+SCHEMA_LIST_MEMBERS = ["allOf", "anyOf", "oneOf"]
+
+
+class OpenAPI30Emitter:
+    """
+    Produces an openapi 3.0 document from the api model in one pass, with the paths, verbs and schemas sorted so the
+    document is stable. Subclasses change how the document or its schemas are written for other versions
+    """
+    # The openapi version written, None keeps the one set in the config
+    version = None
+
+    def document(self, model: ApiModel) -> Dict[str, Any]:
+        document = dict(model.document)
+        if self.version:
+            document["openapi"] = self.version
+        document["security"] = model.security
+        document["components"] = {
+            "securitySchemes": model.security_schemes,
+            "schemas": {name: self.schema(model.schemas[name]) for name in sorted(model.schemas)},
+        }
+        paths: Dict[str, Dict[str, Any]] = {}
+        for path, verb in model.operation_keys():
+            paths.setdefault(path, {})[verb] = self.operation(model.operations[(path, verb)])
+        document["paths"] = paths
+        return document
+
+    def operation(self, operation: Operation) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "tags": operation.tags,
+            "summary": operation.summary,
+            "responses": {
+                status: {
+                    "description": response.description,
+                    "content": {mimetype: {"schema": self.schema(schema)} for mimetype, schema in response.content.items()},
+                }
+                for status, response in operation.responses.items()
+            },
+        }
+        if not operation.is_secure:
+            result["security"] = []
+        if operation.request_body is not None:
+            result["requestBody"] = {
+                "required": operation.request_body.required,
+                "description": operation.request_body.description,
+                "content": {
+                    mimetype: {"schema": self.schema(schema)} for mimetype, schema in operation.request_body.content.items()
+                },
+            }
+        if operation.parameters is not None:
+            result["parameters"] = [self.parameter(parameter) for parameter in operation.parameters]
+        return result
+
+    def parameter(self, parameter: Parameter) -> Dict[str, Any]:
+        return {
+            "name": parameter.name,
+            "in": parameter.location,
+            "required": parameter.required,
+            "description": parameter.description,
+            "schema": self.schema(parameter.schema),
+        }
+
+    def schema(self, schema: Any) -> Any:
+        # The model holds its schemas in the openapi 3.0 dialect already
+        return schema
+
+
+class OpenAPI31Emitter(OpenAPI30Emitter):
+    """
+    Produces an openapi 3.1 document, whose schemas are JSON schema: nullable becomes a union with the null type and
+    boolean exclusive bounds become numeric ones
+    """
+    version = "3.1.0"
+
+    def schema(self, schema: Any) -> Any:
+        if not isinstance(schema, dict):
+            return schema
+        result: Dict[str, Any] = {}
+        for key, value in schema.items():
+            if key == "properties" and isinstance(value, dict):
+                result[key] = {name: self.schema(member) for name, member in value.items()}
+            elif key in SCHEMA_MEMBERS:
+                result[key] = self.schema(value)
+            elif key in SCHEMA_LIST_MEMBERS and isinstance(value, list):
+                result[key] = [self.schema(member) for member in value]
+            else:
+                result[key] = value
+
+        for bound, exclusive in [("minimum", "exclusiveMinimum"), ("maximum", "exclusiveMaximum")]:
+            if result.get(exclusive) is True and bound in result:
+                result[exclusive] = result.pop(bound)
+            elif isinstance(result.get(exclusive), bool):
+                del result[exclusive]
+
+        if not result.pop("nullable", False):
+            return result
+        if "type" in result:
+            types = result["type"] if isinstance(result["type"], list) else [result["type"]]
+            result["type"] = types if "null" in types else types + ["null"]
+            if "enum" in result and None not in result["enum"]:
+                result["enum"] = result["enum"] + [None]
+            return result
+        if not result:
+            return result
+        if list(result) == ["anyOf"]:
+            return {"anyOf": result["anyOf"] + [{"type": "null"}]}
+        # A nullable $ref is written as a single member allOf in openapi 3.0
+        if list(result) == ["allOf"] and len(result["allOf"]) == 1:
+            result = result["allOf"][0]
+        return {"anyOf": [result, {"type": "null"}]}
+
+
+# Emitters by the name used for them in the _targets of a config
+EMITTERS: Dict[str, Type[OpenAPI30Emitter]] = {
+    "openapi30": OpenAPI30Emitter,
+    "openapi31": OpenAPI31Emitter,
+}
+
+
+class YamlDumper(yaml.SafeDumper):
+    # Schemas shared between operations would otherwise be written as anchors and aliases
+    def ignore_aliases(self, data: Any) -> bool:
+        return True
+
+
+def write_document(document: Dict[str, Any], filename: str) -> bool:
+    """
+    Writes an emitted document as yaml when filename ends in .yaml or .yml and as json otherwise, leaving the file
+    untouched when its content would not change
+    :param document: The emitted document
+    :param filename: file to write
+    :return: True if the file changed
+    """
+    if os.path.splitext(filename)[1].lower() in (".yaml", ".yml"):
+        text = yaml.dump(document, Dumper=YamlDumper, sort_keys=False, allow_unicode=True, width=120)
+        return write_bytes_if_changed(text.encode(), filename)
+    return write_if_changed(document, filename)
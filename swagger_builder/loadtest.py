@@ -0,0 +1,515 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode, urlsplit
+import argparse
+import asyncio
+import base64
+import json
+import math
+import os
+import random
+import re
+import signal
+import sys
+
+from .payloads import PayloadGenerator
+from .writer import write_if_changed
+
+DEFAULT_REPORT = "build/loadtest.json"
+VERBS = ["get", "post", "put", "patch", "delete", "head", "options"]
+
+
+@dataclass
+class Operation:
+    method: str
+    path: str
+    path_params: Dict[str, Any] = field(default_factory=dict)
+    query_params: Dict[str, Any] = field(default_factory=dict)
+    body: Optional[Any] = None
+    weight: float = 1.0
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+@dataclass
+class OperationStats:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Dict[int, int] = field(default_factory=dict)
+    errors: int = 0
+
+
+def resolve(openapi: Dict[str, Any], value: Any) -> Any:
+    """
+    :return: The component a $ref points to, followed until the value is not a $ref
+    """
+    seen = set()
+    while isinstance(value, dict) and isinstance(value.get("$ref"), str) and value["$ref"] not in seen:
+        seen.add(value["$ref"])
+        target: Any = openapi
+        for part in value["$ref"].lstrip("#/").split("/"):
+            target = target.get(part, {}) if isinstance(target, dict) else {}
+        value = target
+    return value
+
+
+def discover_operations(openapi: Dict[str, Any]) -> List[Operation]:
+    """
+    Lists the operations of a built spec with the schemas of their parameters and json request body
+    :param openapi: The spec
+    :return: List of the operations, in the order of the spec
+    """
+    result: List[Operation] = []
+    for path, verbs in openapi.get("paths", {}).items():
+        shared = verbs.get("parameters", [])
+        for verb, operation in verbs.items():
+            if verb not in VERBS or not isinstance(operation, dict):
+                continue
+            entry = Operation(method=verb.upper(), path=path)
+            for parameter in shared + operation.get("parameters", []):
+                parameter = resolve(openapi, parameter)
+                if parameter.get("in") == "path":
+                    entry.path_params[parameter["name"]] = parameter.get("schema", {"type": "string"})
+                elif parameter.get("in") == "query" and parameter.get("required"):
+                    entry.query_params[parameter["name"]] = parameter.get("schema", {"type": "string"})
+            for name in re.findall(r"{([^}]+)}", path):
+                entry.path_params.setdefault(name, {"type": "string"})
+            content = resolve(openapi, operation.get("requestBody", {})).get("content", {})
+            if "application/json" in content:
+                entry.body = content["application/json"].get("schema", {})
+            result.append(entry)
+    return result
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """
+    :return: The nearest rank percentile of sorted values, 0 when there are none
+    """
+    if not ordered:
+        return 0.0
+    return ordered[max(0, min(len(ordered), math.ceil(fraction * len(ordered))) - 1)]
+
+
+class RequestFactory:
+    """
+    Makes the requests of the load, choosing operations by weight and generating their parameters and bodies
+    """
+
+    def __init__(self, operations: List[Operation], schemas: Dict[str, Any], params: Dict[str, List[str]], seed: int = 0):
+        """
+        :param operations: The operations to send, with their weights
+        :param schemas: The component schemas the parameter and body schemas refer to
+        :param params: Values to use for parameters by name, instead of generated ones
+        :param seed: Seed of the choices and of the generated values
+        """
+        self.operations = operations
+        self.weights = [operation.weight for operation in operations]
+        self.params = params
+        self.rng = random.Random(seed)
+        self.generator = PayloadGenerator(schemas, seed=seed, max_depth=3)
+        self.generator.rng = self.rng
+
+    def parameter(self, name: str, schema: Any) -> str:
+        if name in self.params:
+            return self.rng.choice(self.params[name])
+        value = self.generator.value(schema, 0)
+        return json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+
+    def make(self) -> Tuple[Operation, str, Optional[bytes]]:
+        """
+        :return: The operation, its request target and its body
+        """
+        operation = self.rng.choices(self.operations, self.weights)[0]
+        target = operation.path
+        for name, schema in operation.path_params.items():
+            target = target.replace(f"{{{name}}}", quote(self.parameter(name, schema), safe=""))
+        if operation.query_params:
+            target += "?" + urlencode({name: self.parameter(name, schema) for name, schema in operation.query_params.items()})
+        body = None
+        if operation.body is not None:
+            body = json.dumps(self.generator.value(operation.body, 0), separators=(",", ":")).encode()
+        return operation, target, body
+
+
+class Connection:
+    """
+    A keep-alive HTTP/1.1 client connection, reopened when the server closes it
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method: str, target: str, body: Optional[bytes]) -> int:
+        """
+        :return: The response status, after reading the whole response
+        """
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = f"{method} {target} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        self.writer.write(head.encode() + b"\r\n" + (body or b""))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by the server")
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            pass
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            while size := int((await self.reader.readline()).split(b";")[0], 16):
+                await self.reader.readexactly(size + 2)
+            while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+        elif "content-length" in headers:
+            await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            await self.reader.read()
+            headers["connection"] = "close"
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status
+
+
+async def run_load(
+    host: str,
+    port: int,
+    factory: RequestFactory,
+    concurrency: int,
+    duration: Optional[float] = None,
+    requests: Optional[int] = None,
+    warmup: float = 0.0,
+) -> Tuple[Dict[str, OperationStats], float]:
+    """
+    Sends requests from concurrent connections until the duration has passed or the number of requests was sent
+    :param host: Host of the server
+    :param port: Port of the server
+    :param factory: Makes the requests
+    :param concurrency: Number of connections, each with one request in flight
+    :param duration: Seconds to send requests for, after the warmup
+    :param requests: Number of requests to send, after the warmup
+    :param warmup: Seconds to send requests for before measuring
+    :return: The statistics by operation name, and the measured seconds
+    """
+    loop = asyncio.get_running_loop()
+    stats: Dict[str, OperationStats] = {operation.name: OperationStats() for operation in factory.operations}
+    state = {"sent": 0, "measuring": warmup <= 0}
+    start = loop.time() + warmup
+    deadline = start + duration if duration is not None else None
+
+    async def worker() -> None:
+        connection = Connection(host, port)
+        try:
+            while True:
+                now = loop.time()
+                if deadline is not None and now >= deadline:
+                    return
+                measuring = now >= start
+                if measuring and requests is not None:
+                    if state["sent"] >= requests:
+                        return
+                    state["sent"] += 1
+                operation, target, body = factory.make()
+                began = loop.time()
+                try:
+                    status = await connection.request(operation.method, target, body)
+                except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError, OSError):
+                    await connection.close()
+                    status = None
+                if not measuring:
+                    continue
+                operation_stats = stats[operation.name]
+                operation_stats.latencies.append(loop.time() - began)
+                if status is None or status >= 500:
+                    operation_stats.errors += 1
+                if status is not None:
+                    operation_stats.statuses[status] = operation_stats.statuses.get(status, 0) + 1
+        finally:
+            await connection.close()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return stats, max(loop.time() - start, 1e-9)
+
+
+def report(stats: Dict[str, OperationStats], seconds: float, concurrency: int, url: str) -> Dict[str, Any]:
+    """
+    :return: The json report with the request count, error count, statuses, latency percentiles in milliseconds and
+             requests per second of each operation and of all of them
+    """
+    def summarize(latencies: List[float], statuses: Dict[int, int], errors: int) -> Dict[str, Any]:
+        ordered = sorted(latencies)
+        return {
+            "requests": len(ordered),
+            "errors": errors,
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            "rps": round(len(ordered) / seconds, 2),
+            "p50": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99": round(percentile(ordered, 0.99) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        }
+
+    statuses: Dict[int, int] = {}
+    for operation_stats in stats.values():
+        for status, count in operation_stats.statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "seconds": round(seconds, 3),
+        "total": summarize(
+            [latency for operation_stats in stats.values() for latency in operation_stats.latencies],
+            statuses,
+            sum(operation_stats.errors for operation_stats in stats.values()),
+        ),
+        "operations": {
+            name: summarize(operation_stats.latencies, operation_stats.statuses, operation_stats.errors)
+            for name, operation_stats in stats.items()
+            if operation_stats.latencies
+        },
+    }
+
+
+def find_regressions(current: Dict[str, Any], previous: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    :param current: The report of this run
+    :param previous: The report of an earlier run to compare to
+    :param threshold: Allowed ratio of the p95 latency, and of the requests per second the other way
+    :return: Descriptions of the operations whose p95 latency or throughput got worse by more than the threshold
+    """
+    regressions: List[str] = []
+    for name, result in current["operations"].items():
+        earlier = previous.get("operations", {}).get(name)
+        if earlier is None:
+            continue
+        if earlier["p95"] > 0 and result["p95"] > earlier["p95"] * threshold:
+            regressions.append(f"{name} p95 {earlier['p95']}ms -> {result['p95']}ms")
+        if result["rps"] > 0 and result["rps"] * threshold < earlier["rps"]:
+            regressions.append(f"{name} {earlier['rps']} -> {result['rps']} requests per second")
+    return regressions
+
+
+class S3StandIn:
+    """
+    An in-memory stand-in for the S3 object api, path style, for the HEAD, GET, PUT and DELETE object calls the
+    server makes. Requests are not authenticated
+    """
+
+    def __init__(self, objects: Optional[Dict[str, bytes]] = None):
+        """
+        :param objects: Initial objects by "bucket/key"
+        """
+        self.objects: Dict[str, bytes] = dict(objects or {})
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """
+        :return: The port the stand-in listens on
+        """
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while request_line := await reader.readline():
+                method, target = request_line.decode("latin-1").split()[:2]
+                headers: Dict[str, str] = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if headers.get("expect", "").lower() == "100-continue":
+                    writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                writer.write(self.respond(method, urlsplit(target).path.lstrip("/"), body))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def respond(self, method: str, key: str, body: bytes) -> bytes:
+        status, content, content_type = 200, b"", "application/octet-stream"
+        if method == "PUT":
+            self.objects[key] = body
+        elif method == "DELETE":
+            self.objects.pop(key, None)
+            status = 204
+        elif key not in self.objects:
+            status, content_type = 404, "application/xml"
+            content = b"<?xml version=\"1.0\" encoding=\"UTF-8\"?><Error><Code>NoSuchKey</Code></Error>"
+        else:
+            content = self.objects[key]
+        head = (
+            f"HTTP/1.1 {status} {'OK' if status < 300 else 'Not Found'}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(content)}\r\n"
+            f"ETag: \"{len(content):x}\"\r\n\r\n"
+        )
+        return head.encode() + (b"" if method == "HEAD" else content)
+
+
+async def wait_for_port(host: str, port: int, timeout: float) -> bool:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return True
+        except OSError:
+            await asyncio.sleep(0.1)
+    return False
+
+
+async def load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    with open(args.spec, "rt") as fp:
+        openapi = json.load(fp)
+    schemas = openapi.get("components", {}).get("schemas", {})
+    operations = discover_operations(openapi)
+    if args.mix:
+        weights: Dict[str, float] = {}
+        for entry in args.mix:
+            name, _, weight = entry.rpartition("=")
+            weights[name.strip()] = float(weight)
+        unknown = set(weights) - {operation.name for operation in operations}
+        if unknown:
+            print(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+            sys.exit(1)
+        operations = [operation for operation in operations if weights.get(operation.name, 0) > 0]
+        for operation in operations:
+            operation.weight = weights[operation.name]
+    if not operations:
+        print(f"No operations to send from {args.spec}")
+        sys.exit(1)
+
+    params: Dict[str, List[str]] = {}
+    for entry in args.param or []:
+        name, _, values = entry.partition("=")
+        params[name] = values.split(",")
+
+    url = urlsplit(args.url)
+    host, port = url.hostname or "127.0.0.1", url.port or 80
+    env = dict(os.environ)
+    stand_in: Optional[S3StandIn] = None
+    if args.s3:
+        if args.s3_object:
+            with open(args.s3_object, "rb") as fp:
+                content = fp.read()
+        elif args.s3_schema in schemas:
+            content = json.dumps(next(PayloadGenerator(schemas, seed=args.seed).instances(args.s3_schema, 1))).encode()
+        else:
+            content = b"{}"
+        bucket, keyfile = env.get("BUCKET") or "loadtest", env.get("KEYFILE") or "accounts.json"
+        stand_in = S3StandIn({f"{bucket}/{keyfile}": content})
+        s3_port = await stand_in.start()
+        env.update({
+            "S3_ENDPOINT": f"http://127.0.0.1:{s3_port}",
+            "BUCKET": bucket,
+            "KEYFILE": keyfile,
+            "AWS_ACCESS_KEY_ID": "loadtest",
+            "AWS_SECRET_ACCESS_KEY": "loadtest",
+            # Without a region the server encrypts with a local key instead of calling KMS
+            "AWS_REGION": "",
+            "DATA_KEY": env.get("DATA_KEY") or base64.b64encode(random.Random(args.seed).randbytes(32)).decode(),
+        })
+        print(f"S3 stand-in on {env['S3_ENDPOINT']} serving {bucket}/{keyfile}")
+
+    server = None
+    try:
+        if args.server:
+            env["PORT"] = str(port)
+            # In its own process group, so the servers that npm or a shell start are stopped with it
+            server = await asyncio.create_subprocess_shell(
+                args.server,
+                env=env,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        if not await wait_for_port(host, port, args.startup_timeout):
+            print(f"Nothing is listening on {host}:{port}")
+            sys.exit(1)
+
+        factory = RequestFactory(operations, schemas, params, seed=args.seed)
+        stats, seconds = await run_load(
+            host,
+            port,
+            factory,
+            concurrency=args.concurrency,
+            duration=args.duration if args.requests is None else None,
+            requests=args.requests,
+            warmup=args.warmup,
+        )
+        return report(stats, seconds, args.concurrency, args.url)
+    finally:
+        if server is not None and server.returncode is None:
+            os.killpg(server.pid, signal.SIGTERM)
+            await server.wait()
+        if stand_in is not None:
+            await stand_in.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m swagger_builder loadtest",
+        description="Sends a mix of the operations in a built spec to a local server and reports latency and throughput",
+    )
+    parser.add_argument("spec", nargs="?", default="swagger/swagger.json", help="the built spec to take the operations from")
+    parser.add_argument("--url", default="http://127.0.0.1:3010", help="base url of the server")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="number of connections")
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="seconds to send requests for")
+    parser.add_argument("-n", "--requests", type=int, help="number of requests to send instead of a duration")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds of requests before measuring")
+    parser.add_argument("--mix", action="append", metavar="'METHOD PATH=WEIGHT'",
+                        help="weight of an operation, may be repeated, only the listed operations are sent")
+    parser.add_argument("--param", action="append", metavar="NAME=VALUE[,VALUE...]",
+                        help="values to pick parameters from instead of generating them")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the operation choices and generated values")
+    parser.add_argument("--server", metavar="COMMAND", help="command starting the server, run with PORT and the S3 settings")
+    parser.add_argument("--startup-timeout", type=float, default=30.0, help="seconds to wait for the server to listen")
+    parser.add_argument("--s3", action="store_true", help="serve the object the server reads and writes from a local stand-in")
+    parser.add_argument("--s3-object", metavar="FILE", help="initial content of the object, generated by default")
+    parser.add_argument("--s3-schema", default="Accounts", help="schema the initial content is generated from")
+    parser.add_argument("--output", default=DEFAULT_REPORT, help="file to save the report to")
+    parser.add_argument("--compare", help="earlier report to compare to, exits with status 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown allowed by --compare")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(load_test(args))
+    for name, summary in [("total", result["total"]), *result["operations"].items()]:
+        print(f"{name:<40} {summary['requests']:>8} req {summary['rps']:>9.1f}/s  p50={summary['p50']:.2f}ms "
+              f"p95={summary['p95']:.2f}ms p99={summary['p99']:.2f}ms errors={summary['errors']}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    write_if_changed(result, args.output)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, "rt") as fp:
+            regressions = find_regressions(result, json.load(fp), args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+from typing import Iterator
+import os
+import re
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Shared with src/build_swagger.sh, which takes the typeconv lock with flock(1) while it publishes the typeconv output
+LOCK_DIRECTORY = "build/.locks"
+
+
+def lock_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9._-]", "_", name)
+
+
+@contextmanager
+def file_lock(name: str, shared: bool = False, directory: str = LOCK_DIRECTORY) -> Iterator[None]:
+    """
+    Holds an advisory lock on {directory}/{name}.lock, so the builds running on one machine take turns at a stage they
+    share. Without fcntl, as on Windows, builds are not serialized
+    :param name: The stage, such as cache or typeconv
+    :param shared: take a shared lock, held by any number of readers at once, instead of an exclusive one
+    :param directory: directory of the lock files
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(directory, exist_ok=True)
+    with open(f"{directory}/{lock_name(name)}.lock", "ab") as fp:
+        fcntl.flock(fp.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
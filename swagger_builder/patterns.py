@@ -0,0 +1,235 @@
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Pattern, Tuple
+import fnmatch
+import os
+import re
+
+States = FrozenSet["PatternNode"]
+# Whether a path is included and whether it is excluded
+Verdict = Tuple[bool, bool]
+# The verdict for any file name in a directory, by literal file name, and for file names matching each glob
+FileTest = Tuple[Verdict, Dict[str, Verdict], List[Tuple[Pattern[str], Verdict]]]
+
+
+class PatternNode:
+    """
+    One step of the compiled patterns, reached by matching a path segment. Patterns sharing leading segments share
+    their nodes, so each segment of a path is matched once however many patterns start with it
+    """
+
+    def __init__(self, absorbs: bool = False):
+        self.literals: Dict[str, PatternNode] = {}
+        self.globs: Dict[str, Tuple[Pattern[str], PatternNode]] = {}
+        self.recursive: Optional[PatternNode] = None
+        # A ** node matches any number of segments, staying on itself for each
+        self.absorbs = absorbs
+        self.include = False
+        self.exclude = False
+        # An include pattern ends at or below this node
+        self.live = False
+
+    def closure(self) -> Iterator["PatternNode"]:
+        node: Optional[PatternNode] = self
+        while node is not None:
+            yield node
+            node = node.recursive
+
+    def mark_live(self) -> bool:
+        children = list(self.literals.values()) + [child for _, child in self.globs.values()]
+        if self.recursive is not None:
+            children.append(self.recursive)
+        live = [child.mark_live() for child in children]
+        self.live = self.include or any(live)
+        return self.live
+
+
+def has_wildcards(text: str) -> bool:
+    return any(c in text for c in "*?[")
+
+
+def split_pattern(pattern: str) -> Tuple[bool, List[str]]:
+    """
+    :param pattern: A _files entry, such as ./src/api/identrust/*.ts, ./src/api/**/*.ts or !src/api/legacy
+    :return: True for an exclude, and the segments of the pattern
+    """
+    pattern = pattern.strip()
+    exclude = pattern.startswith("!")
+    if exclude:
+        pattern = pattern[1:].strip()
+
+    # Entries were path prefixes once *.ts and ./ were dropped from them, so ./src/*.ts names everything below src.
+    # Entries with no other wildcards keep meaning that, and any file whose path starts with the prefix matches
+    prefix = pattern.replace("./", "").replace("*.ts", "")
+    if not has_wildcards(prefix):
+        directory, _, partial = prefix.rpartition("/")
+        segments = [segment for segment in directory.split("/") if segment and segment != "."]
+        if partial:
+            segments.append(f"{partial}*")
+        return exclude, segments + ["**"]
+
+    while pattern.startswith("./"):
+        pattern = pattern[2:]
+    segments = [segment for segment in pattern.strip("/").split("/") if segment and segment != "."]
+    return exclude, segments
+
+
+class FileMatcher:
+    """
+    The _files patterns of a config compiled into a trie of path segments. Patterns are relative to the project root.
+    A pattern with no wildcards besides *.ts is a path prefix, as _files entries always were. Any other pattern is a
+    glob: * and ? match within a segment and ** matches any number of segments. A pattern starting with ! excludes
+    what it matches from every other pattern. A directory is only entered while some include pattern can still match
+    below it and no exclude covers all of it, so excluded and unrelated subtrees are never walked
+    """
+
+    def __init__(self, patterns: List[str]):
+        """
+        :param patterns: The _files entries
+        """
+        self.patterns = patterns
+        self.root = PatternNode()
+        for pattern in patterns:
+            exclude, segments = split_pattern(pattern)
+            node = self.root
+            for segment in segments:
+                if segment == "**":
+                    node.recursive = node.recursive or PatternNode(absorbs=True)
+                    node = node.recursive
+                elif not has_wildcards(segment):
+                    node = node.literals.setdefault(segment, PatternNode())
+                else:
+                    if segment not in node.globs:
+                        node.globs[segment] = (re.compile(fnmatch.translate(segment)), PatternNode())
+                    node = node.globs[segment][1]
+            if exclude:
+                node.exclude = True
+            else:
+                node.include = True
+        self.root.mark_live()
+        self.start: States = frozenset(self.root.closure())
+        self.file_tests: Dict[States, FileTest] = {}
+        self.directory_states: Dict[str, States] = {}
+
+    def enter(self, states: States, segment: str) -> States:
+        """
+        :param states: The nodes reached by a directory
+        :param segment: The name of a file or directory in it
+        :return: The nodes reached by the file or directory
+        """
+        reached = set()
+        for node in states:
+            if node.absorbs:
+                reached.add(node)
+            child = node.literals.get(segment)
+            if child is not None:
+                reached.update(child.closure())
+            for regex, child in node.globs.values():
+                if regex.match(segment):
+                    reached.update(child.closure())
+        return frozenset(reached)
+
+    def file_test(self, states: States) -> FileTest:
+        """
+        :param states: The nodes reached by a directory
+        :return: The test of the names of the files in the directory, made once for each set of states
+        """
+        if states not in self.file_tests:
+            def verdict(nodes: Iterable[PatternNode]) -> Verdict:
+                nodes = list(nodes)
+                return any(node.include for node in nodes), any(node.exclude for node in nodes)
+
+            literals: Dict[str, List[PatternNode]] = {}
+            globs: List[Tuple[Pattern[str], Verdict]] = []
+            for node in states:
+                for name, child in node.literals.items():
+                    literals.setdefault(name, []).extend(child.closure())
+                for regex, child in node.globs.values():
+                    globs.append((regex, verdict(child.closure())))
+            self.file_tests[states] = (
+                verdict(node for node in states if node.absorbs),
+                {name: verdict(nodes) for name, nodes in literals.items()},
+                globs,
+            )
+        return self.file_tests[states]
+
+    def states(self, directory: str) -> States:
+        """
+        :return: The nodes reached by a directory, relative to the project root
+        """
+        if directory not in self.directory_states:
+            states = self.start
+            for segment in directory.split("/"):
+                if segment and segment != ".":
+                    states = self.enter(states, segment)
+            self.directory_states[directory] = states
+        return self.directory_states[directory]
+
+    def may_include(self, states: States) -> bool:
+        """
+        :return: False when no file below the directory that reached states can match, so it does not need walking
+        """
+        if any(node.exclude and node.absorbs for node in states):
+            return False
+        return any(node.live for node in states)
+
+    def matches(self, path: str) -> bool:
+        """
+        :param path: path of a file, relative to the project root
+        :return: True if the patterns include the file
+        """
+        directory, _, filename = path.rpartition("/")
+        return test_file(self.file_test(self.states(directory)), filename)
+
+
+def test_file(test: FileTest, filename: str) -> bool:
+    (included, excluded), literals, globs = test
+    if filename in literals:
+        included, excluded = included or literals[filename][0], excluded or literals[filename][1]
+    for regex, (glob_included, glob_excluded) in globs:
+        # A glob that cannot change the verdict is not matched
+        if (glob_excluded or (glob_included and not included)) and regex.match(filename):
+            included, excluded = included or glob_included, excluded or glob_excluded
+    return included and not excluded
+
+
+def walk_matching(top: str, matchers: List[FileMatcher]) -> List[Tuple[str, str]]:
+    """
+    Walks top for the files any of the matchers include, in the order of os.walk(top, topdown=False), without entering
+    the directories none of them can include files from
+    :param top: directory to walk, relative to the project root the patterns are relative to
+    :param matchers: The compiled patterns of each config
+    :return: List of the directory and name of each matching file
+    """
+    matching: List[Tuple[str, str]] = []
+    states = [matcher.states(top) for matcher in matchers]
+    if any(matcher.may_include(state) for matcher, state in zip(matchers, states)):
+        walk_directory(top, matchers, states, matching)
+    return matching
+
+
+def walk_directory(directory: str, matchers: List[FileMatcher], states: List[States], matching: List[Tuple[str, str]]) -> None:
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    files: List[str] = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if not is_dir:
+            files.append(entry.name)
+            continue
+        # Like os.walk, symlinked directories are not followed
+        if entry.is_symlink():
+            continue
+        child_states = [matcher.enter(state, entry.name) for matcher, state in zip(matchers, states)]
+        if any(matcher.may_include(state) for matcher, state in zip(matchers, child_states)):
+            walk_directory(f"{directory}/{entry.name}", matchers, child_states, matching)
+
+    tests = [matcher.file_test(state) for matcher, state in zip(matchers, states)]
+    for filename in files:
+        for test in tests:
+            if test_file(test, filename):
+                matching.append((directory, filename))
+                break
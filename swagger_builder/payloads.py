@@ -0,0 +1,213 @@
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional
+import argparse
+import datetime
+import json
+import math
+import random
+import string
+import sys
+import uuid
+
+from .ts_schema import REF_PREFIX, is_number, pragma_number
+
+EPOCH = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet"]
+
+FORMATS: Dict[str, Callable[[random.Random], str]] = {
+    "uuid": lambda rng: str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+    "date-time": lambda rng: (EPOCH + datetime.timedelta(seconds=rng.randrange(10 ** 8))).isoformat().replace("+00:00", "Z"),
+    "date": lambda rng: (EPOCH + datetime.timedelta(days=rng.randrange(3650))).date().isoformat(),
+    "email": lambda rng: f"{rng.choice(WORDS)}.{rng.randrange(10 ** 6)}@example.com",
+    "uri": lambda rng: f"https://example.com/{rng.choice(WORDS)}/{rng.randrange(10 ** 6)}",
+    "hostname": lambda rng: f"{rng.choice(WORDS)}{rng.randrange(1000)}.example.com",
+    "ipv4": lambda rng: ".".join(str(rng.randrange(1, 255)) for _ in range(4)),
+    "byte": lambda rng: "".join(rng.choice(string.ascii_letters + string.digits) for _ in range(16)) + "==",
+}
+
+
+def numeric_bounds(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    :param schema: A number or integer schema, whose bounds can come from doc comments, such as @minimum, as strings
+    :return: minimum, maximum, exclusiveMinimum, exclusiveMaximum and multipleOf as numbers, leaving out values that
+             are not numbers, except for boolean exclusive bounds
+    """
+    bounds: Dict[str, Any] = {}
+    for keyword in ["minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum", "multipleOf"]:
+        value = pragma_number(schema.get(keyword))
+        if is_number(value) or (value is True and keyword.startswith("exclusive")):
+            bounds[keyword] = value
+    return bounds
+
+
+class PayloadGenerator:
+    """
+    Generates values matching the component schemas of a spec, each schema drawing from its own random sequence so
+    the values for a schema only depend on the seed and not on which other schemas are generated
+    """
+
+    def __init__(
+        self,
+        schemas: Dict[str, Any],
+        seed: int = 0,
+        max_depth: int = 4,
+        max_items: int = 3,
+        optional: float = 0.5,
+    ):
+        """
+        :param schemas: The component schemas, by name
+        :param seed: Seed of the random sequences
+        :param max_depth: Nesting below which only required properties and the fewest array items are generated, so
+                          recursive schemas end
+        :param max_items: Most items generated for arrays and maps without maxItems
+        :param optional: Probability of generating each optional property
+        """
+        self.schemas = schemas
+        self.seed = seed
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.optional = optional
+        self.rng = random.Random(seed)
+
+    def instances(self, name: str, count: Optional[int] = None) -> Iterator[Any]:
+        """
+        :param name: The schema to generate values of
+        :param count: Number of values, or None to generate them forever
+        :return: Iterator of the values, each made as it is consumed
+        """
+        self.rng = random.Random(f"{self.seed}:{name}")
+        generated = 0
+        while count is None or generated < count:
+            yield self.value(self.schemas[name], 0)
+            generated += 1
+
+    def value(self, schema: Any, depth: int) -> Any:
+        if not isinstance(schema, dict):
+            return None
+        ref = schema.get("$ref")
+        if isinstance(ref, str):
+            return self.value(self.schemas.get(ref[len(REF_PREFIX):], {}), depth + 1)
+        if schema.get("nullable") and (depth >= self.max_depth or self.rng.random() < 0.1):
+            return None
+        if "enum" in schema:
+            return self.rng.choice(schema["enum"])
+        if "allOf" in schema:
+            merged: Dict[str, Any] = {}
+            values = [self.value(member, depth) for member in schema["allOf"]]
+            if not all(isinstance(value, dict) for value in values):
+                return values[-1] if values else None
+            for value in values:
+                merged.update(value)
+            return merged
+        members = schema.get("anyOf") or schema.get("oneOf")
+        if members:
+            return self.value(self.rng.choice(members), depth)
+
+        types = schema.get("type")
+        if isinstance(types, list):
+            types = self.rng.choice(types) if types else None
+        if types is None:
+            types = "object" if "properties" in schema or "additionalProperties" in schema else "string"
+        return getattr(self, f"{types}_value", self.null_value)(schema, depth)
+
+    def null_value(self, schema: Dict[str, Any], depth: int) -> Any:
+        return None
+
+    def boolean_value(self, schema: Dict[str, Any], depth: int) -> bool:
+        return self.rng.random() < 0.5
+
+    def integer_value(self, schema: Dict[str, Any], depth: int) -> int:
+        bounds = numeric_bounds(schema)
+        low = bounds.get("minimum", 0)
+        high = bounds.get("maximum", low + 1000)
+        low = math.floor(low) + 1 if bounds.get("exclusiveMinimum") is True else math.ceil(low)
+        high = math.ceil(high) - 1 if bounds.get("exclusiveMaximum") is True else math.floor(high)
+        # Numeric exclusive bounds, as in openapi 3.1
+        if is_number(bounds.get("exclusiveMinimum")):
+            low = max(low, math.floor(bounds["exclusiveMinimum"]) + 1)
+        if is_number(bounds.get("exclusiveMaximum")):
+            high = min(high, math.ceil(bounds["exclusiveMaximum"]) - 1)
+        step = bounds.get("multipleOf") or 1
+        first = math.ceil(low / step)
+        return step * self.rng.randint(first, max(first, math.floor(high / step)))
+
+    def number_value(self, schema: Dict[str, Any], depth: int) -> float:
+        if "multipleOf" in schema or any(key in schema for key in ["exclusiveMinimum", "exclusiveMaximum"]):
+            return self.integer_value(schema, depth)
+        if self.rng.random() < 0.5:
+            return self.integer_value(schema, depth)
+        bounds = numeric_bounds(schema)
+        low = bounds.get("minimum", 0)
+        high = bounds.get("maximum", low + 1000)
+        return min(high, max(low, round(self.rng.uniform(low, high), 2)))
+
+    def string_value(self, schema: Dict[str, Any], depth: int) -> str:
+        if schema.get("format") in FORMATS:
+            return FORMATS[schema["format"]](self.rng)
+        # Lengths from doc comments, such as @maxLength, are strings in the spec
+        low = int(schema.get("minLength", 1))
+        high = max(low, min(int(schema.get("maxLength", low + 16)), low + 16))
+        text = f"{self.rng.choice(WORDS)}-{self.rng.randrange(10 ** 6)}"
+        while len(text) < low:
+            text += self.rng.choice(string.ascii_lowercase)
+        return text[:self.rng.randint(low, high)] if len(text) > high else text
+
+    def array_value(self, schema: Dict[str, Any], depth: int) -> List[Any]:
+        low = int(schema.get("minItems", 0))
+        high = low if depth >= self.max_depth else max(low, int(schema.get("maxItems", low + self.max_items)))
+        return [self.value(schema.get("items", {}), depth + 1) for _ in range(self.rng.randint(low, high))]
+
+    def object_value(self, schema: Dict[str, Any], depth: int) -> Dict[str, Any]:
+        required = set(schema.get("required", []))
+        value: Dict[str, Any] = {}
+        for name, property_schema in schema.get("properties", {}).items():
+            if name in required or (depth < self.max_depth and self.rng.random() < self.optional):
+                value[name] = self.value(property_schema, depth + 1)
+        additional = schema.get("additionalProperties")
+        if isinstance(additional, dict) and depth < self.max_depth:
+            for index in range(self.rng.randint(0, self.max_items)):
+                value[f"{self.rng.choice(WORDS)}{index}"] = self.value(additional, depth + 1)
+        return value
+
+
+def stream(generator: PayloadGenerator, names: List[str], count: int) -> Iterator[str]:
+    """
+    :param generator: Generator of the values
+    :param names: The schemas to generate values of, in turn
+    :param count: Number of values per schema
+    :return: Iterator of NDJSON lines, the bare values for a single schema and the schema name with each value for
+             several
+    """
+    for name in names:
+        for value in generator.instances(name, count):
+            record = value if len(names) == 1 else {"schema": name, "value": value}
+            yield json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m swagger_builder payloads",
+        description="Streams synthetic values of the schemas in a built spec as NDJSON",
+    )
+    parser.add_argument("spec", nargs="?", default="swagger/swagger.json", help="the built spec to read the schemas from")
+    parser.add_argument("-s", "--schema", action="append", help="schema to generate, may be repeated, all by default")
+    parser.add_argument("-n", "--count", type=int, default=100, help="number of values per schema")
+    parser.add_argument("--seed", type=int, default=0, help="seed, the same seed gives the same values")
+    parser.add_argument("--max-depth", type=int, default=4, help="nesting below which only required members are made")
+    parser.add_argument("-o", "--output", help="file to write to instead of stdout")
+    args = parser.parse_args(argv)
+
+    with open(args.spec, "rt") as fp:
+        schemas = json.load(fp).get("components", {}).get("schemas", {})
+    names = args.schema or sorted(schemas)
+    for name in names:
+        if name not in schemas:
+            print(f"{name} is not a schema in {args.spec}")
+            sys.exit(1)
+
+    generator = PayloadGenerator(schemas, seed=args.seed, max_depth=args.max_depth)
+    output: IO[str] = open(args.output, "wt") if args.output else sys.stdout
+    try:
+        output.writelines(stream(generator, names, args.count))
+    finally:
+        if args.output:
+            output.close()
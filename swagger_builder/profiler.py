@@ -0,0 +1,178 @@
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, List, Pattern, Union
+import os
+import time
+
+from .writer import write_if_changed
+
+DEFAULT_REPORT = "build/swagger_profile.json"
+
+
+@dataclass
+class PhaseMetrics:
+    config: str
+    phase: str
+    seconds: float = 0.0
+
+
+@dataclass
+class FileMetrics:
+    """
+    What handling one input file cost. Stage is "route" for parsing a route file, "paths" for adding its paths to a
+    spec and "schema" for loading a schema file
+    """
+    path: str
+    stage: str
+    seconds: float = 0.0
+    bytes_read: int = 0
+    regex_calls: int = 0
+    yaml_seconds: float = 0.0
+    schemas: int = 0
+    cached: bool = False
+
+
+Hook = Callable[[Union[PhaseMetrics, FileMetrics]], None]
+
+
+class CountingPattern:
+    """
+    Wraps a compiled regex, counting its calls against the file being profiled
+    """
+
+    def __init__(self, pattern: Pattern[str], profiler: "Profiler"):
+        self.pattern = pattern
+        self.profiler = profiler
+
+    def search(self, string: str) -> Any:
+        self.profiler.count_regex()
+        return self.pattern.search(string)
+
+    def match(self, string: str) -> Any:
+        self.profiler.count_regex()
+        return self.pattern.match(string)
+
+    def findall(self, string: str) -> List[Any]:
+        self.profiler.count_regex()
+        return self.pattern.findall(string)
+
+
+class Profiler:
+    """
+    Collects the wall time of every build phase and what handling each input file cost. Hooks are called with each
+    PhaseMetrics and FileMetrics as they complete, so metrics can be collected without the report file
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.phases: List[PhaseMetrics] = []
+        self.files: List[FileMetrics] = []
+        self.hooks: List[Hook] = []
+        self.current: List[FileMetrics] = []
+
+    def add_hook(self, hook: Hook) -> None:
+        self.hooks.append(hook)
+
+    def emit(self, metrics: Union[PhaseMetrics, FileMetrics]) -> None:
+        for hook in self.hooks:
+            hook(metrics)
+
+    def wrap(self, pattern: Pattern[str]) -> Any:
+        """
+        :return: The pattern, counting its calls when profiling is enabled
+        """
+        return CountingPattern(pattern, self) if self.enabled else pattern
+
+    def count_regex(self) -> None:
+        if self.current:
+            self.current[-1].regex_calls += 1
+
+    @contextmanager
+    def phase(self, config: str, phase: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            metrics = PhaseMetrics(config=config, phase=phase, seconds=time.perf_counter() - started)
+            self.phases.append(metrics)
+            self.emit(metrics)
+
+    @contextmanager
+    def file(self, path: str, stage: str) -> Iterator[FileMetrics]:
+        """
+        Profiles the handling of one file. The regex calls and YAML parsing in the block are counted against it
+        :return: The metrics, for the block to add the bytes read, schemas and whether the cache was used
+        """
+        metrics = FileMetrics(path=path, stage=stage)
+        if not self.enabled:
+            yield metrics
+            return
+        self.current.append(metrics)
+        started = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            metrics.seconds = time.perf_counter() - started
+            self.current.pop()
+            self.files.append(metrics)
+            self.emit(metrics)
+
+    @contextmanager
+    def yaml(self) -> Iterator[None]:
+        if not self.enabled or not self.current:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current[-1].yaml_seconds += time.perf_counter() - started
+
+    def slowest(self, top: int) -> List[FileMetrics]:
+        return sorted(self.files, key=lambda metrics: metrics.seconds, reverse=True)[:top]
+
+    def report(self, top: int = 10) -> Dict[str, Any]:
+        """
+        :return: Dictionary with every phase and file metric, per phase totals and the top slowest files
+        """
+        totals: Dict[str, float] = {}
+        for metrics in self.phases:
+            totals[metrics.phase] = totals.get(metrics.phase, 0.0) + metrics.seconds
+        return {
+            "phases": [asdict(metrics) for metrics in self.phases],
+            "files": [asdict(metrics) for metrics in self.files],
+            "totals": {
+                "phases": totals,
+                "files": len(self.files),
+                "bytes_read": sum(metrics.bytes_read for metrics in self.files),
+                "regex_calls": sum(metrics.regex_calls for metrics in self.files),
+                "yaml_seconds": sum(metrics.yaml_seconds for metrics in self.files),
+                "schemas": sum(metrics.schemas for metrics in self.files if metrics.stage == "schema"),
+            },
+            "slowest": [asdict(metrics) for metrics in self.slowest(top)],
+        }
+
+    def write_report(self, filename: str = DEFAULT_REPORT, top: int = 10) -> None:
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        write_if_changed(self.report(top), filename)
+
+    def summary(self, top: int = 10) -> str:
+        """
+        :return: Human readable per phase totals and top slowest files
+        """
+        report = self.report(top)
+        lines = ["Phase totals:"]
+        for phase, seconds in sorted(report["totals"]["phases"].items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"  {seconds * 1000:9.1f}ms  {phase}")
+        lines.append(f"Slowest {len(report['slowest'])} of {report['totals']['files']} files:")
+        for metrics in self.slowest(top):
+            lines.append(
+                f"  {metrics.seconds * 1000:9.1f}ms  {metrics.stage:<6} {metrics.path}"
+                f"  {metrics.bytes_read}B {metrics.regex_calls} regex {metrics.yaml_seconds * 1000:.1f}ms yaml"
+                f" {metrics.schemas} schemas{' (cached)' if metrics.cached else ''}"
+            )
+        return "\n".join(lines)
+
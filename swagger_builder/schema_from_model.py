@@ -1,15 +1,19 @@
-from typing import List, Optional, Dict
-import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+import argparse
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
+from .cache import BuildCache
+from .symbols import GENERATED_HEADER, Symbol, SymbolFile, SymbolTable, filename_for_type, parents_from_header
+from .writer import write_bytes_if_changed
 
-def camel_to_snake_case(camel: str) -> str:
-    return re.sub('^_', '', re.sub('_+', '_', re.sub('([A-Z][a-z])', '_\\1', re.sub(r'([A-Z]+)', '_\\1', camel)))).lower()
+# The symbol table of the schema files, shared with the pool workers
+table = SymbolTable()
 
 
-def filename_for_type(typename: str) -> str:
-    return typename[0].lower() + typename[1:]
+def camel_to_snake_case(camel: str) -> str:
+    return re.sub('^_', '', re.sub('_+', '_', re.sub('([A-Z][a-z])', '_\\1', re.sub(r'([A-Z]+)', '_\\1', camel)))).lower()
 
 
 @dataclass
@@ -19,31 +23,75 @@ class Parameter:
     comments: List[str]
 
 
-def attributes_from_implements(name: str) -> List[str]:
-    with open(f"src/schemas/{filename_for_type(name)}.ts", "rt") as fp:
-        lines = fp.readlines()
-        return [line.split(":")[0].replace("?", "").strip() for line in lines if ":" in line]
+@dataclass
+class Interface:
+    name: str
+    extends: Optional[str] = None
+    implements: Optional[str] = None
+    parents: List[str] = field(default_factory=list)
+    params: List[Parameter] = field(default_factory=list)
+    index_types: Optional[List[str]] = None
+    imports: Set[str] = field(default_factory=set)
+    comments: List[str] = field(default_factory=list)
+
 
+def attributes_from_implements(name: str, symbols: Optional[SymbolTable] = None) -> List[str]:
+    symbol = (symbols or SymbolTable()).lookup(name)
+    return symbol.fields if symbol is not None else []
 
-def process_enum(name: str, lines: List[str]) -> None:
-    with open(f"src/schemas/{filename_for_type(name)}.ts", "wt") as fp:
-        fp.write("/**\n * Do not modify this file directly. It is automatically generated from the model definition.\n */\n")
-        fp.write("\n".join(lines)+"\n")
 
+def render_enum(lines: List[str]) -> str:
+    return GENERATED_HEADER + "\n".join(lines) + "\n"
 
-def process_interface(lines: List[str], comments: List[str]) -> None:
+
+def normalize_types(type_str: str, name: str, imports: Set[str]) -> List[str]:
+    """
+    Splits a typescript union into its member types, mapping model types to their schema names
+    :param type_str: The type as written after the colon
+    :param name: Name of the interface being parsed, which is never imported into itself
+    :param imports: Set the names of referenced interfaces are added to
+    :return: List of the member types, with [] kept on array types
+    """
     global_overrides: Dict[str, str] = {
         "models.SAN": "string",
     }
+    param_types: List[str] = []
+    param_type_strs = [val.strip() for val in type_str.strip().rstrip(";").split("|")]
+    for param_type in param_type_strs:
+        is_array = param_type.endswith("[]")
+        if is_array:
+            param_type = param_type.replace("[]", "")
+        if param_type in global_overrides:
+            param_type = global_overrides[param_type]
+        if param_type == "Date":
+            param_type = "string"
+        elif param_type not in {"string", "number", "boolean", "null", "object"} and not param_type.endswith("}"):
+            if param_type.startswith("models."):
+                param_type = param_type[7:]
+            if param_type != name:
+                imports.add(param_type)
+        if is_array:
+            param_type += "[]"
+        param_types.append(param_type)
+    return param_types
+
+
+def parse_interface(lines: List[str], comments: List[str], symbols: Optional[SymbolTable] = None) -> Optional[Interface]:
+    """
+    Parses an exported interface or class into its parameters
+    :param lines: Lines of the declaration, from the export line to the closing brace
+    :param comments: Lines of the comment block before the declaration
+    :param symbols: Symbol table to look the implemented interface up in, the schema files are read if not given
+    :return: Parsed Interface, or None for enums and the model base classes that have no schema
+    """
     parts = lines[0].split(" ")
     name = parts[2]
 
     if parts[1] == "enum":
-        process_enum(name, lines)
-        return
+        return None
 
     if name in {"ListOfModels", "ModelWithAssociate", "ModelWithFilters", "RedshiftAdapterRow"}:
-        return
+        return None
     params: List[Parameter] = []
     imports = set()
     in_comments = False
@@ -52,18 +100,21 @@ def process_interface(lines: List[str], comments: List[str]) -> None:
     private_attributes: List[str] = []
     private_attribute_line = ""
     type_override: Optional[str] = None
+    index_types: Optional[List[str]] = None
 
     extends = None
     implements = None
     implements_attributes: List[str] = []
 
-    if len(parts) >= 4 and parts[3] == "extends" and parts[4] not in {"ModelWithAssociate", "ModelWithFilters"}:
-        extends = parts[4]
+    # A generated interface declares the implemented interface as a second parent, "extends Model, BaseThing"
+    parents = parents_from_header(lines[0])
+    if len(parts) >= 5 and parts[3] == "extends" and parents[0] not in {"ModelWithAssociate", "ModelWithFilters"}:
+        extends = parents[0]
         imports.add(extends)
-    if len(parts) >= 6 and parts[5] == "implements":
-        implements = parts[6]
+    if len(parts) >= 6 and parts[3] == "extends" and len(parents) > 1:
+        implements = parents[1]
         imports.add(implements)
-        implements_attributes = attributes_from_implements(implements)
+        implements_attributes = attributes_from_implements(implements, symbols)
 
     for line in lines[1:]:
         if "//" in line:
@@ -79,7 +130,7 @@ def process_interface(lines: List[str], comments: List[str]) -> None:
         line = line.strip()
         if line.startswith("/*"):
             param_comments = [line]
-            in_comments = True
+            in_comments = not line.endswith("*/")
             continue
         elif in_comments:
             param_comments.append(line)
@@ -112,99 +163,155 @@ def process_interface(lines: List[str], comments: List[str]) -> None:
 
         if len(line.strip()) == 0:
             continue
+        if line.startswith("["):
+            # Index signature, such as [accountId: string]: Account;
+            index_types = normalize_types(line[line.index("]") + 1:].lstrip(" :"), name, imports)
+            param_comments = []
+            continue
         parts = line.split(":")
         if len(parts) != 2:
-            if parts[-1].endswith("};"):
+            if len(parts) > 2 and parts[-1].strip().rstrip(";").rstrip("[]").endswith("}"):
                 parts = [parts[0], ":".join(parts[1:])]
             else:
                 continue
         param_name = parts[0].strip()
         if param_name.replace("?", "") in private_attributes or param_name.replace("?", "") in implements_attributes:
             continue
-        param_types: List[str] = []
         if type_override:
             parts[1] = type_override
             type_override = None
-        param_type_strs = [val.strip() for val in parts[1].replace(";", "").strip().split("|")]
-        for param_type in param_type_strs:
-            is_array = param_type.endswith("[]")
-            if is_array:
-                param_type = param_type.replace("[]", "")
-            if param_type in global_overrides:
-                param_type = global_overrides[param_type]
-            if param_type == "Date":
-                param_type = "string"
-            elif param_type not in {"string", "number", "boolean", "null", "object"} and not param_type.endswith("}"):
-                if param_type.startswith("models."):
-                    param_type = param_type[7:]
-                if param_type != name:
-                    imports.add(param_type)
-            if is_array:
-                param_type += "[]"
-            param_types.append(param_type)
+        param_types = normalize_types(parts[1], name, imports)
 
         params.append(Parameter(param_name, param_types, param_comments))
         param_comments = []
 
-    with open(f"src/schemas/{filename_for_type(name)}.ts", "wt") as fp:
-        fp.write("/**\n * Do not modify this file directly. It is automatically generated from the model definition.\n */\n")
-
-        for import_interface in sorted(imports):
-            fp.write(f'import {{ {import_interface} }} from "./{filename_for_type(import_interface)}";\n')
-        if len(imports) > 0:
-            fp.write("\n")
-        if comments:
-            for comment_line in comments:
-                if len(comment_line) > 0 and comment_line[0] != "/":
-                    comment_line = " " + comment_line
-                fp.write(comment_line + "\n")
-        fp.write(f"export interface {name} ")
-        if extends:
-            if implements:
-                fp.write(f"extends {extends}, {implements} ")
-            else:
-                fp.write(f"extends {extends} ")
-        elif implements:
-            fp.write(f"extends {implements} ")
-        fp.write("{\n")
-        for parameter in params:
-            if parameter.comments:
-                for comment_line in parameter.comments:
-                    if len(comment_line) > 0 and comment_line[0] != "/":
-                        comment_line = " " + comment_line
-                    fp.write(f"  {comment_line}\n")
-            fp.write(f"  {parameter.name}: {' | '.join(parameter.types)};\n")
-        fp.write("}\n")
-
-
-for root, dirs, files in os.walk("src/schemas", topdown=False):
-    for file in files:
-        if not file.endswith(".ts"):
-            continue
-        interface: Optional[List[str]] = None
-        comments: List[str] = []
-        in_comments = False
-
-        path = root + "/" + file
-        for line in open(path, "rt"):
-            line = line.rstrip()
-            if line.startswith("export interface") or line.startswith("export class") or line.startswith("export enum"):
-                interface = [line]
-            elif interface is not None:
-                interface.append(line)
-                if line.startswith("}"):
-                    process_interface(interface, comments)
-                    interface = None
-                    comments = []
-            elif line.startswith("/*"):
-                in_comments = True
-                comments = [line.strip()]
-            elif in_comments:
-                line = line.strip()
-                if line.startswith("*/"):
-                    in_comments = False
-                comments.append(line)
-            elif line.startswith("function"):
-                # empty any comments we have
-                comments = []
+    return Interface(
+        name=name,
+        extends=extends,
+        implements=implements,
+        parents=parents,
+        params=params,
+        index_types=index_types,
+        imports=imports,
+        comments=comments,
+    )
+
+
+def render_interface(interface: Interface, comments: List[str]) -> str:
+    """
+    :return: The content of the generated schema file for a parsed interface
+    """
+    output: List[str] = [GENERATED_HEADER]
+    for import_interface in sorted(interface.imports):
+        output.append(f'import {{ {import_interface} }} from "./{filename_for_type(import_interface)}";\n')
+    if len(interface.imports) > 0:
+        output.append("\n")
+    for comment_line in comments:
+        if len(comment_line) > 0 and comment_line[0] != "/":
+            comment_line = " " + comment_line
+        output.append(comment_line + "\n")
+    output.append(f"export interface {interface.name} ")
+    if interface.extends:
+        if interface.implements:
+            output.append(f"extends {interface.extends}, {interface.implements} ")
+        else:
+            output.append(f"extends {interface.extends} ")
+    elif interface.implements:
+        output.append(f"extends {interface.implements} ")
+    output.append("{\n")
+    for parameter in interface.params:
+        for comment_line in parameter.comments:
+            if len(comment_line) > 0 and comment_line[0] != "/":
+                comment_line = " " + comment_line
+            output.append(f"  {comment_line}\n")
+        output.append(f"  {parameter.name}: {' | '.join(parameter.types)};\n")
+    output.append("}\n")
+    return "".join(output)
+
+
+def render_declaration(symbol: Symbol) -> Optional[Tuple[str, str]]:
+    """
+    :param symbol: The declaration
+    :return: The path and content of the schema file generated for the declaration, or None if it has no schema
+    """
+    if symbol.kind == "enum":
+        return f"{table.directory}/{filename_for_type(symbol.name)}.ts", render_enum(symbol.lines)
+
+    interface = parse_interface(symbol.lines, symbol.comments, table)
+    if interface is None:
+        return None
+    return f"{table.directory}/{filename_for_type(interface.name)}.ts", render_interface(interface, symbol.comments)
+
+
+def render_file(path: str) -> List[Tuple[str, str]]:
+    """
+    :return: List of the path and content of each schema file generated from the declarations in a schema file
+    """
+    return [output for output in map(render_declaration, table.file(path).symbols) if output is not None]
+
+
+def share_symbols(files: Dict[str, SymbolFile]) -> None:
+    global table
+    table = SymbolTable()
+    table.files = files
+
+
+def source_key(path: str) -> bytes:
+    """
+    Combines the hash of a schema file with those of the files of the interfaces it implements, as their members are
+    left out of it
+    :return: Key that changes whenever the file would generate different output
+    """
+    digests = [table.file(path).digest] + [table.file(implemented).digest for implemented in table.implemented_paths(path)]
+    return "\0".join(digests).encode()
+
+
+def generate(jobs: int = 1, cache: Optional[BuildCache] = None) -> List[str]:
+    """
+    Generates the schema interfaces from the model classes and enums in src/schemas, in place. Every schema file is
+    scanned once into the symbol table. Files whose content, and that of the interfaces they implement, is unchanged
+    since the last run are skipped, and generated files are only written when their content differs
+    :param jobs: number of processes used to render the schema files
+    :param cache: Optional persistent cache of the scans and of which files are up to date
+    :return: List of the paths that were written
+    """
+    global table
+    cache = cache or BuildCache(enabled=False)
+    table = SymbolTable(cache=cache)
+    paths = table.paths()
+    pending = [path for path in paths if cache.get("generated", path, source_key(path)) is None]
+
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=share_symbols, initargs=(table.files,)) as pool:
+            rendered = list(pool.map(render_file, pending, chunksize=max(1, len(pending) // (jobs * 4))))
+    else:
+        rendered = [render_file(path) for path in pending]
+
+    # Later declarations of a type win, as when each file was written in turn
+    outputs: Dict[str, str] = {}
+    for output in rendered:
+        outputs.update(output)
+    written = [path for path, content in outputs.items() if write_bytes_if_changed(content.encode(), path)]
+
+    for path in written:
+        table.forget(path)
+    for path in table.paths():
+        cache.put("generated", path, source_key(path), True)
+    cache.save()
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m swagger_builder.schema_from_model", description="Generates src/schemas from the models"
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of processes used to render the schemas")
+    parser.add_argument("--no-cache", action="store_true", help="regenerate every file instead of skipping unchanged ones")
+    args = parser.parse_args()
+
+    written = generate(jobs=args.jobs, cache=BuildCache(enabled=not args.no_cache))
+    print(f"Wrote {len(written)} schema files")
+
 
+if __name__ == "__main__":
+    main()
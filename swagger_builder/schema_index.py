@@ -0,0 +1,236 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set
+import os
+
+from .symbols import SymbolTable, filename_for_type
+from .ts_schema import SchemaFile, extend_schema
+
+
+def typeconv_source(path: str) -> str:
+    """
+    :param path: path to a typeconv build file, or to a schema file
+    :return: The schema file a typeconv build file was generated from, or the path itself for other files
+    """
+    if path.startswith("build/") and path.endswith(".json"):
+        return f"src/schemas/{os.path.basename(path)[:-len('.json')]}.ts"
+    return path
+
+
+class SchemaIndex(Mapping[str, Any]):
+    """
+    Schemas by type name, loaded on demand. A type is looked for in the file named after it first, and only when that
+    misses is every schema file scanned for its declarations. So building a spec reads and converts just the files of
+    the types it references, their parents and the types they reference in turn.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], SchemaFile],
+        symbols: SymbolTable,
+        typeconv: bool = False,
+        previous: Optional["SchemaIndex"] = None,
+        changed: Optional[Set[str]] = None,
+    ):
+        """
+        :param loader: Reads and converts one schema file
+        :param symbols: Symbol table the declarations of the schema files are looked up in
+        :param typeconv: interfaces come from the typeconv output in build/ and only enums from src/schemas
+        :param previous: Index from an earlier build, whose loaded files are reused unless their path is in changed
+        :param changed: Paths that changed, were added or were removed since previous was built
+        """
+        self.loader = loader
+        self.symbols = symbols
+        self.typeconv = typeconv
+        self.files: Dict[str, SchemaFile] = {}
+        self.index: Optional[Dict[str, str]] = None
+        self.merged: Dict[str, Any] = {}
+        self.dependencies: Dict[str, List[str]] = {}
+        self.closures: Dict[str, List[str]] = {}
+        if previous is not None:
+            changed = changed or set()
+            affected = self.declared_in(changed, previous.symbols)
+            self.files = {
+                path: schema_file for path, schema_file in previous.files.items()
+                if path not in changed and typeconv_source(path) not in changed and not self.inherits(path, affected)
+            }
+
+    def declared_in(self, paths: Set[str], previous: SymbolTable) -> Set[str]:
+        """
+        :param paths: The changed paths
+        :param previous: Symbol table from before the change
+        :return: The names the schema files among paths declared before or declare now
+        """
+        names: Set[str] = set()
+        for path in paths:
+            if not path.startswith(f"{self.symbols.directory}/") or not path.endswith(".ts"):
+                continue
+            if path in previous.files:
+                names.update(symbol.name for symbol in previous.files[path].symbols)
+            if os.path.exists(path):
+                names.update(symbol.name for symbol in self.symbols.file(path).symbols)
+        return names
+
+    def inherits(self, path: str, names: Set[str]) -> bool:
+        """
+        :return: True if a declaration of the schema file extends or implements any of names, so its loaded schemas
+                 can hold their members
+        """
+        if not names or not os.path.exists(typeconv_source(path)):
+            return False
+        return any(parent in names for symbol in self.symbols.file(typeconv_source(path)).symbols for parent in symbol.parents)
+
+    def paths(self) -> List[str]:
+        """
+        :return: Every schema file, in load order so later files override earlier ones
+        """
+        paths: List[str] = []
+        if self.typeconv and os.path.isdir("build"):
+            paths.extend(
+                f"build/{filename}" for filename in os.listdir("build")
+                if not filename.startswith(".") and filename != "openapi.json"
+            )
+        paths.extend(f"src/schemas/{filename}" for filename in os.listdir("src/schemas") if not filename.startswith("."))
+        return paths
+
+    def conventional_paths(self, name: str) -> List[str]:
+        """
+        :return: The files a type is normally declared in, most specific first
+        """
+        if self.typeconv:
+            return [f"src/schemas/{filename_for_type(name)}.ts", f"build/{filename_for_type(name)}.json"]
+        return [f"src/schemas/{filename_for_type(name)}.ts"]
+
+    def load(self, path: str) -> SchemaFile:
+        if path not in self.files:
+            self.files[path] = self.loader(path)
+        return self.files[path]
+
+    def names_in(self, path: str) -> Set[str]:
+        """
+        Finds the types a file provides from the symbol table, rather than loading the file where possible
+        """
+        if path.startswith("build/"):
+            source = typeconv_source(path)
+            if not os.path.exists(source):
+                return set(self.load(path).schemas)
+            path = source
+            kinds = {"interface", "class"}
+        else:
+            kinds = {"enum"} if self.typeconv else {"interface", "class", "enum"}
+        return {symbol.name for symbol in self.symbols.file(path).symbols if symbol.kind in kinds}
+
+    def full_index(self) -> Dict[str, str]:
+        if self.index is None:
+            self.index = {}
+            for path in self.paths():
+                for name in self.names_in(path):
+                    self.index[name] = path
+        return self.index
+
+    def find(self, name: str) -> Optional[SchemaFile]:
+        for path in self.conventional_paths(name):
+            if os.path.exists(path) and name in self.load(path).schemas:
+                return self.files[path]
+        path = self.full_index().get(name)
+        if path is not None and name in self.load(path).schemas:
+            return self.files[path]
+        return None
+
+    def parents_of(self, name: str) -> List[str]:
+        schema_file = self.find(name)
+        if schema_file is None:
+            raise KeyError(name)
+        parents: List[str] = []
+        for parent in schema_file.parents.get(name, []):
+            if self.find(parent) is not None:
+                parents.append(parent)
+            else:
+                print(f"Cannot extend {name} from unknown schema {parent}")
+        return parents
+
+    def extends_order(self, name: str, done: Mapping[str, Any]) -> List[str]:
+        """
+        Orders a type and its not yet resolved ancestors topologically, with an iterative depth first walk over the
+        extends graph. A cycle is broken where it closes, instead of recursing forever
+        :param name: The type name
+        :param done: Types that are already resolved and are not walked again
+        :return: List of the types to resolve, every parent before the types that extend it
+        """
+        order: List[str] = []
+        visiting: Set[str] = set()
+        stack = [(name, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if expanded:
+                order.append(current)
+                continue
+            if current in done or current in visiting:
+                continue
+            visiting.add(current)
+            stack.append((current, True))
+            stack.extend((parent, False) for parent in reversed(self.parents_of(current)))
+        return order
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self.merged:
+            for type in self.extends_order(name, self.merged):
+                schema = self.find(type).schemas[type]
+                parents = [self.merged[parent] for parent in self.parents_of(type) if parent in self.merged]
+                self.merged[type] = extend_schema(schema, parents) if parents else schema
+        return self.merged[name]
+
+    def dependencies_of(self, name: str) -> List[str]:
+        """
+        Looks up the adjacency list of a type in the dependency graph, which for a type that extends others also holds
+        the references of its parents, as their properties are merged in
+        :param name: The type name
+        :return: List of the types it references directly
+        """
+        if name not in self.dependencies:
+            for type in self.extends_order(name, self.dependencies):
+                dependencies = {ref: None for ref in self.find(type).refs.get(type, [])}
+                for parent in self.parents_of(type):
+                    dependencies.update((ref, None) for ref in self.dependencies.get(parent, []))
+                self.dependencies[type] = list(dependencies)
+        return self.dependencies[name]
+
+    def closure(self, name: str) -> List[str]:
+        """
+        Walks the dependency graph iteratively, so deep models cannot hit the recursion limit. Closures are memoized
+        per root type, and a memoized closure found during a walk is used as is instead of being walked again
+        :param name: The root type
+        :return: List of the root and every type it references, directly or indirectly
+        """
+        if name in self.closures:
+            return self.closures[name]
+        seen: Dict[str, None] = {}
+        stack = [name]
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            if current != name and current in self.closures:
+                seen.update((type, None) for type in self.closures[current])
+                continue
+            seen[current] = None
+            stack.extend(reversed(self.dependencies_of(current)))
+        self.closures[name] = list(seen)
+        return self.closures[name]
+
+    def closure_of(self, names: Iterable[str]) -> List[str]:
+        """
+        :param names: The root types
+        :return: List of the roots and every type they reference, directly or indirectly
+        """
+        types: Dict[str, None] = {}
+        for name in names:
+            types.update((type, None) for type in self.closure(name))
+        return list(types)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and (name in self.merged or self.find(name) is not None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(name for name in self.full_index() if name in self)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
@@ -0,0 +1,146 @@
+from typing import Any, Dict, List, Set, Tuple
+import json
+import os
+import re
+
+from .artifacts import manifest_filename, write_artifacts
+from .writer import write_if_changed
+
+COMPONENTS_PREFIX = "#/components/"
+DEFAULT_TAG = "default"
+
+
+def shard_name(tag: str) -> str:
+    """
+    :return: The tag as a lower case slug for filenames and urls, such as identrust for Identrust
+    """
+    return re.sub(r"[^a-z0-9]+", "-", tag.lower()).strip("-") or DEFAULT_TAG
+
+
+def index_filename(output_filename: str) -> str:
+    """
+    :param output_filename: The spec filename, such as swagger.json
+    :return: The shard index filename, such as swagger.index.json
+    """
+    return f"{os.path.splitext(output_filename)[0]}.index.json"
+
+
+def shard_filename(output_filename: str, name: str) -> str:
+    return f"{os.path.splitext(output_filename)[0]}.{name}.json"
+
+
+def component_refs(value: Any) -> List[Tuple[str, str]]:
+    """
+    :return: List of the section and name of every component referenced in value, in the order they first appear
+    """
+    refs: Dict[Tuple[str, str], None] = {}
+    stack = [value]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            ref = current.get("$ref")
+            if isinstance(ref, str) and ref.startswith(COMPONENTS_PREFIX) and ref.count("/") == 3:
+                section, name = ref[len(COMPONENTS_PREFIX):].split("/")
+                refs[(section, name)] = None
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+    return list(refs)
+
+
+def reachable_components(openapi: Dict[str, Any], paths: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Finds the components the paths reference, directly or through other components
+    :param openapi: The whole spec, whose components are looked in
+    :param paths: The paths of one shard
+    :return: Dictionary of components section to the components it needs, in the order of the spec
+    """
+    components = openapi.get("components", {})
+    seen: Dict[Tuple[str, str], None] = {}
+    stack = list(reversed(component_refs(paths)))
+    while stack:
+        section, name = stack.pop()
+        if (section, name) in seen or name not in components.get(section, {}):
+            continue
+        seen[(section, name)] = None
+        stack.extend(reversed(component_refs(components[section][name])))
+
+    reachable: Dict[str, Dict[str, Any]] = {}
+    for section, members in components.items():
+        if section == "securitySchemes":
+            reachable[section] = members
+            continue
+        needed = {name: value for name, value in members.items() if (section, name) in seen}
+        if needed:
+            reachable[section] = needed
+    return reachable
+
+
+def split_by_tag(openapi: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Splits a spec into one self-contained spec per tag. An operation with several tags is in each of their shards, one
+    without tags is in the default shard
+    :param openapi: The whole spec, with its paths sorted
+    :return: Dictionary of tag to its shard, in the order the tags first appear
+    """
+    tagged: Dict[str, Dict[str, Any]] = {}
+    for path, verbs in openapi.get("paths", {}).items():
+        for verb, operation in verbs.items():
+            for tag in (operation.get("tags") if isinstance(operation, dict) else None) or [DEFAULT_TAG]:
+                tagged.setdefault(tag, {}).setdefault(path, {})[verb] = operation
+
+    shards: Dict[str, Dict[str, Any]] = {}
+    for tag, paths in tagged.items():
+        shard = {key: value for key, value in openapi.items() if key not in {"paths", "components", "tags"}}
+        shard["info"] = {**openapi.get("info", {}), "title": f"{openapi.get('info', {}).get('title', '')} - {tag}"}
+        if "tags" in openapi:
+            shard["tags"] = [entry for entry in openapi["tags"] if entry.get("name") == tag]
+        shard["paths"] = paths
+        shard["components"] = reachable_components(openapi, paths)
+        shards[tag] = shard
+    return shards
+
+
+def write_shards(openapi: Dict[str, Any], directory: str, output_filename: str, compress: bool = False) -> bool:
+    """
+    Writes a spec per tag and an index document listing them, removing the shards of tags that no longer exist.
+    Unchanged files are left untouched
+    :param openapi: The whole spec, with its paths sorted
+    :param directory: directory the spec is written to
+    :param output_filename: The spec filename, such as swagger.json
+    :param compress: also write the minified and precompressed artifacts of each shard
+    :return: True if any of the files changed
+    """
+    changed = False
+    entries: List[Dict[str, Any]] = []
+    names: Set[str] = set()
+    for tag, shard in split_by_tag(openapi).items():
+        name, suffix = shard_name(tag), 2
+        while name in names:
+            name, suffix = f"{shard_name(tag)}-{suffix}", suffix + 1
+        names.add(name)
+        filename = shard_filename(output_filename, name)
+        changed = write_if_changed(shard, f"{directory}/{filename}") or changed
+        if compress:
+            changed = write_artifacts(shard, directory, filename) or changed
+        entries.append({
+            "tag": tag,
+            "name": name,
+            "file": filename,
+            "operations": sum(len(verbs) for verbs in shard["paths"].values()),
+            "schemas": len(shard["components"].get("schemas", {})),
+        })
+
+    index_path = f"{directory}/{index_filename(output_filename)}"
+    if os.path.exists(index_path):
+        with open(index_path, "rt") as fp:
+            previous = {entry["file"] for entry in json.load(fp).get("shards", [])}
+        for filename in previous - {entry["file"] for entry in entries}:
+            stem = os.path.splitext(filename)[0]
+            for stale in [filename, f"{stem}.min.json", f"{stem}.min.json.gz", f"{stem}.min.json.br", manifest_filename(filename)]:
+                if os.path.exists(f"{directory}/{stale}"):
+                    os.remove(f"{directory}/{stale}")
+                    changed = True
+
+    index = {"spec": output_filename, "shards": entries}
+    return write_if_changed(index, index_path) or changed
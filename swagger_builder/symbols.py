@@ -0,0 +1,231 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+import hashlib
+import os
+import re
+
+from .cache import BuildCache
+
+GENERATED_HEADER = "/**\n * Do not modify this file directly. It is automatically generated from the model definition.\n */\n"
+SCHEMA_DIRECTORY = "src/schemas"
+FIELD_MATCHER = re.compile(r"^(?:declare |readonly |public )*([A-Za-z_$][\w$]*)\??\s*:")
+
+
+def filename_for_type(typename: str) -> str:
+    return typename[0].lower() + typename[1:]
+
+
+def parents_from_header(header: str) -> List[str]:
+    """
+    Finds every interface named after extends or implements in a declaration line
+    :param header: The declaration line, such as "export interface A extends B, C {"
+    :return: List of the parent names, in declaration order
+    """
+    header = header.split("{")[0]
+    parents: List[str] = []
+    for clause in re.findall(r" (?:extends|implements) ([\w., ]+?)(?= implements |$)", header.rstrip() + " "):
+        parents.extend(name.strip() for name in clause.split(",") if name.strip())
+    return parents
+
+
+def parse_declarations(lines: Iterable[str]) -> Iterator[Tuple[List[str], List[str]]]:
+    """
+    Finds the exported interfaces, classes and enums in a typescript file
+    :param lines: Lines of the typescript file
+    :return: Iterator of the declaration lines and the comment block before each declaration
+    """
+    interface: Optional[List[str]] = None
+    comments: List[str] = []
+    in_comments = False
+
+    for line in lines:
+        line = line.rstrip()
+        if line.startswith("export interface") or line.startswith("export class") or line.startswith("export enum"):
+            interface = [line]
+        elif interface is not None:
+            interface.append(line)
+            if line.startswith("}"):
+                yield interface, comments
+                interface = None
+                comments = []
+        elif line.startswith("/*"):
+            in_comments = True
+            comments = [line.strip()]
+        elif in_comments:
+            line = line.strip()
+            if line.startswith("*/"):
+                in_comments = False
+                if comments + [line] == [header_line.strip() for header_line in GENERATED_HEADER.splitlines()]:
+                    comments = []
+                    continue
+            comments.append(line)
+        elif line.startswith("function"):
+            # empty any comments we have
+            comments = []
+
+
+def enum_values(lines: List[str]) -> List[Union[str, int]]:
+    """
+    Converts the member lines of an enum to its values
+    :param lines: Lines between the enum declaration and its closing brace
+    :return: List of the values, strings for quoted members and ints otherwise
+    """
+    values: List[Union[str, int]] = []
+    for line in lines:
+        line = line.strip()
+        if "=" not in line or line.startswith("/") or line.startswith("*"):
+            continue
+        is_string = True
+        if '"' in line or "'" in line:
+            line = line.replace('"', '').replace("'", "").strip()
+        else:
+            is_string = False
+        if line.endswith(","):
+            line = line[:-1]
+        parts = [part.strip() for part in line.split("=")]
+        if is_string:
+            values.append(parts[1])
+        else:
+            values.append(int(parts[1]))
+    return values
+
+
+@dataclass
+class Symbol:
+    """
+    An exported interface, class or enum, with what the builder stages need to know about it without parsing it again
+    """
+    name: str
+    kind: str
+    path: str
+    extends: List[str] = field(default_factory=list)
+    implements: List[str] = field(default_factory=list)
+    fields: List[str] = field(default_factory=list)
+    values: List[Union[str, int]] = field(default_factory=list)
+    lines: List[str] = field(default_factory=list)
+    comments: List[str] = field(default_factory=list)
+
+    @property
+    def parents(self) -> List[str]:
+        return self.extends + self.implements
+
+
+@dataclass
+class SymbolFile:
+    path: str
+    digest: str
+    symbols: List[Symbol] = field(default_factory=list)
+
+
+def scan_file(path: str, data: bytes) -> SymbolFile:
+    """
+    Scans a typescript file for its exported declarations
+    :param path: path of the file
+    :param data: content of the file
+    :return: SymbolFile with a Symbol for every exported interface, class and enum, in declaration order
+    """
+    symbol_file = SymbolFile(path=path, digest=hashlib.sha256(data).hexdigest())
+    for lines, comments in parse_declarations(data.decode().splitlines()):
+        parts = lines[0].split(" ")
+        symbol = Symbol(name=parts[2], kind=parts[1], path=path, lines=lines, comments=comments)
+        if symbol.kind == "enum":
+            symbol.values = enum_values(lines[1:-1])
+        else:
+            header = lines[0].split("{")[0]
+            if " implements " in header:
+                header, implemented = header.split(" implements ", 1)
+                symbol.implements = parents_from_header(f" implements {implemented}")
+            symbol.extends = parents_from_header(header)
+            symbol.fields = [match.group(1) for match in map(FIELD_MATCHER.match, (line.strip() for line in lines[1:])) if match]
+        symbol_file.symbols.append(symbol)
+    return symbol_file
+
+
+class SymbolTable:
+    """
+    The exported declarations of the schema files, each file scanned once per content and shared by the schema
+    generator, the schema index and the schema conversion. Scans are kept in the build cache by file hash
+    """
+
+    def __init__(
+        self,
+        cache: Optional[BuildCache] = None,
+        directory: str = SCHEMA_DIRECTORY,
+        previous: Optional["SymbolTable"] = None,
+        changed: Optional[Set[str]] = None,
+    ):
+        """
+        :param cache: Optional persistent cache of the scans
+        :param directory: The schema directory
+        :param previous: Table from an earlier build, whose scans are reused unless their path is in changed
+        :param changed: Paths that changed, were added or were removed since previous was built
+        """
+        self.cache = cache or BuildCache(enabled=False)
+        self.directory = directory
+        self.files: Dict[str, SymbolFile] = {}
+        self.index: Optional[Dict[str, Symbol]] = None
+        if previous is not None:
+            changed = changed or set()
+            self.files = {path: symbol_file for path, symbol_file in previous.files.items() if path not in changed}
+
+    def file(self, path: str, data: Optional[bytes] = None) -> SymbolFile:
+        """
+        :param path: path of a typescript file
+        :param data: content of the file, when the caller has already read it
+        :return: The scan of the file
+        """
+        if path not in self.files or (data is not None and self.files[path].digest != hashlib.sha256(data).hexdigest()):
+            if data is None:
+                with open(path, "rb") as fp:
+                    data = fp.read()
+            symbol_file = self.cache.get("symbols", path, data)
+            if symbol_file is None:
+                symbol_file = scan_file(path, data)
+                self.cache.put("symbols", path, data, symbol_file)
+            self.files[path] = symbol_file
+            self.index = None
+        return self.files[path]
+
+    def forget(self, path: str) -> None:
+        self.files.pop(path, None)
+        self.index = None
+
+    def paths(self) -> List[str]:
+        paths: List[str] = []
+        for root, dirs, files in os.walk(self.directory, topdown=False):
+            paths.extend(f"{root}/{filename}" for filename in files if filename.endswith(".ts"))
+        return paths
+
+    def scan(self) -> List[SymbolFile]:
+        """
+        :return: The scans of every file in the schema directory, in walk order
+        """
+        return [self.file(path) for path in self.paths()]
+
+    def implemented_paths(self, path: str) -> List[str]:
+        """
+        :param path: path of a schema file
+        :return: The files declaring the interfaces its declarations implement, whose members are copied into them
+        """
+        paths: List[str] = []
+        for symbol in self.file(path).symbols:
+            for parent in symbol.parents[1:]:
+                implemented = self.lookup(parent)
+                if implemented is not None and implemented.path not in paths:
+                    paths.append(implemented.path)
+        return paths
+
+    def lookup(self, name: str) -> Optional[Symbol]:
+        """
+        Finds a declaration in the file named after it, and only when that misses in every file of the directory
+        :param name: The declared name
+        :return: The Symbol, or None if nothing declares the name
+        """
+        path = f"{self.directory}/{filename_for_type(name)}.ts"
+        if path in self.files or os.path.exists(path):
+            for symbol in self.file(path).symbols:
+                if symbol.name == name:
+                    return symbol
+        if self.index is None:
+            self.index = {symbol.name: symbol for symbol_file in self.scan() for symbol in symbol_file.symbols}
+        return self.index.get(name)
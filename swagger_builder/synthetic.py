@@ -0,0 +1,189 @@
+from typing import Any, Dict, List
+import json
+import os
+import random
+
+from .symbols import filename_for_type
+
+VERBS = ["get", "post", "put", "delete"]
+
+# Schemas the builder always references
+STANDARD_SCHEMAS = {
+    "Account": ["  accountType: number;", "  apiKey: string;", "  apiPassword?: string;"],
+    "ResultError": ["  status: number;", "  message: string;"],
+}
+
+
+def interface_properties(index: int, enums: int, rng: random.Random) -> List[str]:
+    """
+    :return: The member lines of synthetic interface Model{index}, referencing an enum and earlier models
+    """
+    lines = [
+        f"  id{index}: string;",
+        "  /**",
+        f"   * Name of model {index}",
+        "   * @maxLength : 64",
+        "   */",
+        f"  name{index}?: string;",
+        f"  count{index}: number;",
+        f"  kind{index}: Kind{index % enums};",
+        f"  meta{index}: {{ created: string; tags?: string[] }};",
+    ]
+    if index > 0:
+        lines.append(f"  child{index}?: Model{rng.randrange(index)};")
+        lines.append(f"  children{index}: Model{rng.randrange(index)}[];")
+    return lines
+
+
+def interface_parent(index: int) -> str:
+    """
+    :return: The parent of Model{index}, so models form extends chains of up to four levels
+    """
+    return f"Model{index - 1}" if index % 4 else ""
+
+
+def build_json(name: str, members: List[str]) -> Dict[str, Any]:
+    """
+    Builds the typeconv output for a synthetic interface, with its own members only and typeconv's titles
+    """
+    properties: Dict[str, Any] = {}
+    required: List[str] = []
+    description: List[str] = []
+    for line in members:
+        line = line.strip()
+        if line.startswith("/**") or line.startswith("*/"):
+            continue
+        if line.startswith("*"):
+            description.append(line[1:].strip())
+            continue
+        key, type = [part.strip() for part in line.rstrip(";").split(":", 1)]
+        if key.endswith("?"):
+            key = key[:-1]
+        else:
+            required.append(key)
+        if type in {"string", "number"}:
+            schema: Dict[str, Any] = {"type": type}
+        elif type.startswith("{"):
+            schema = {
+                "type": "object",
+                "properties": {
+                    "created": {"type": "string", "title": f"{name}.{key}.created"},
+                    "tags": {"type": "array", "items": {"type": "string"}, "title": f"{name}.{key}.tags"},
+                },
+                "required": ["created"],
+                "additionalProperties": False,
+            }
+        elif type.endswith("[]"):
+            schema = {"type": "array", "items": {"$ref": f"#/components/schemas/{type[:-2]}"}}
+        else:
+            schema = {"$ref": f"#/components/schemas/{type}"}
+        schema["title"] = f"{name}.{key}"
+        if description:
+            schema["description"] = "\n".join(description)
+            description = []
+        properties[key] = schema
+
+    definition = {
+        "properties": properties,
+        "required": required,
+        "additionalProperties": False,
+        "type": "object",
+        "title": name,
+    }
+    return {"openapi": "3.0.0", "info": {"title": "Converted", "version": "1"}, "paths": {}, "components": {"schemas": {name: definition}}}
+
+
+def route_file(index: int, schemas: int, rng: random.Random) -> str:
+    """
+    :return: The source of synthetic route file {index}, in the style of src/api
+    """
+    verb = VERBS[index % len(VERBS)]
+    response = f"Model{rng.randrange(schemas)}"
+    if verb in {"post", "put"}:
+        request = f"TypedRequest<Model{rng.randrange(schemas)}, never, {{ id: string }}>"
+    else:
+        request = "TypedRequestPath<{ id: string }>"
+    return f'''import {{ NextFunction, Router }} from "express";
+import {{ {request.split("<")[0]}, TypedResponse }} from "../../types";
+import {{ NotFoundError, NotAllowedError }} from "../../utils/error";
+
+/**
+ * @swagger
+ * summary: Synthetic route {index}
+ * response: The {response}
+ * path:
+ *   id:
+ *     description: The id of the model
+ */
+export function addRoute(router: Router): void {{
+  router.{verb}(
+    "/:id/route{index}",
+    async (
+      req: {request},
+      res: TypedResponse<{response}>,
+      next: NextFunction
+    ) => {{
+      try {{
+        if (!req.params.id) {{
+          next(new NotFoundError(
+            "No model {index}"
+          ));
+        }}
+        if (req.params.id === "locked") {{
+          next(new NotAllowedError("Locked"));
+        }}
+        res.status(200).json(await handle(req));
+      }} catch (error) {{
+        next(error);
+      }}
+    }}
+  );
+}}
+'''
+
+
+def generate_project(directory: str, routes: int, schemas: int, seed: int = 0) -> str:
+    """
+    Writes a synthetic project: route files spread over services in src/api, interface schemas with extends chains,
+    enums and nested references in src/schemas, the matching typeconv output in build/, a package.json and a config
+    :param directory: directory to write the project to
+    :param routes: number of route files
+    :param schemas: number of interface schemas
+    :param seed: seed for the random references, so the same sizes always give the same project
+    :return: filename of the config, relative to directory
+    """
+    rng = random.Random(seed)
+    enums = max(1, schemas // 10)
+    for path in ["src/api", "src/schemas", "build", "swagger"]:
+        os.makedirs(f"{directory}/{path}", exist_ok=True)
+
+    for index in range(enums):
+        with open(f"{directory}/src/schemas/kind{index}.ts", "wt") as fp:
+            fp.write(f"export enum Kind{index} {{\n")
+            for value in range(rng.randint(2, 6)):
+                fp.write(f'  Value{value} = "value{value}",\n')
+            fp.write("}\n")
+
+    models = [(name, members, "") for name, members in STANDARD_SCHEMAS.items()]
+    models.extend(
+        (f"Model{index}", interface_properties(index, enums, rng), interface_parent(index)) for index in range(schemas)
+    )
+    for name, members, parent in models:
+        with open(f"{directory}/src/schemas/{filename_for_type(name)}.ts", "wt") as fp:
+            fp.write(f"export interface {name} {f'extends {parent} ' if parent else ''}{{\n")
+            fp.write("\n".join(members) + "\n}\n")
+        with open(f"{directory}/build/{filename_for_type(name)}.json", "wt") as fp:
+            json.dump(build_json(name, members), fp, indent=2)
+
+    for index in range(routes):
+        service = f"{directory}/src/api/service{index // 10}"
+        os.makedirs(service, exist_ok=True)
+        with open(f"{service}/route{index}.ts", "wt") as fp:
+            fp.write(route_file(index, schemas, rng))
+
+    with open(f"{directory}/package.json", "wt") as fp:
+        json.dump({"name": "synthetic", "version": "1.0.0"}, fp)
+    with open(f"{directory}/config.yaml", "wt") as fp:
+        fp.write('_output: "synthetic.json"\n_files:\n  - "./src/api/**/*.ts"\n\n')
+        fp.write("openapi: 3.0.3\ninfo:\n  title: Synthetic API\n  version: 1.0.0\n")
+    return "config.yaml"
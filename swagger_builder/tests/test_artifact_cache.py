@@ -0,0 +1,93 @@
+import io
+import sys
+import tarfile
+
+import pytest
+
+from .. import artifacts
+from ..artifact_cache import ArtifactCache, LocalArtifactStore
+from ..patterns import FileMatcher
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    (tmp_path / "src" / "api").mkdir(parents=True)
+    (tmp_path / "src" / "schemas").mkdir()
+    (tmp_path / "package.json").write_text('{"version": "1.0.0"}')
+    (tmp_path / "swagger-doc.yaml").write_text("openapi: 3.0.3\n")
+    (tmp_path / "src" / "api" / "things.ts").write_text("router.get('/things', handler);\n")
+    (tmp_path / "src" / "schemas" / "thing.ts").write_text("export interface Thing {\n  id: string;\n}\n")
+    (tmp_path / "swagger").mkdir()
+    (tmp_path / "swagger" / "swagger.json").write_text('{"openapi": "3.0.3"}')
+    (tmp_path / "swagger" / "swagger.min.json").write_text('{"openapi":"3.0.3"}')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def key() -> str:
+    return ArtifactCache(LocalArtifactStore("store")).key("swagger-doc.yaml", FileMatcher(["src/api"]), False)
+
+
+def test_round_trip(project):
+    cache = ArtifactCache(LocalArtifactStore(str(project / "store")))
+    filenames = ["swagger/swagger.json", str(project / "swagger" / "swagger.min.json")]
+    cache.save(key(), filenames)
+    expected = {name: (project / name).read_bytes() for name in ["swagger/swagger.json", "swagger/swagger.min.json"]}
+
+    (project / "swagger" / "swagger.json").unlink()
+    (project / "swagger" / "swagger.min.json").write_text("changed")
+    assert cache.restore(key()) is True
+    assert {name: (project / name).read_bytes() for name in expected} == expected
+    assert cache.restore(key()) is False
+    assert cache.restore("0" * 64) is None
+
+
+def test_key_follows_inputs_not_interpreter(project, monkeypatch):
+    before = key()
+    monkeypatch.setattr(sys, "version", "0.0.0 (other interpreter)")
+    assert key() == before
+
+    with monkeypatch.context() as patch:
+        patch.setattr(artifacts, "brotli", None if artifacts.brotli else object())
+        assert key() != before
+    assert key() == before
+
+    (project / "src" / "api" / "things.ts").write_text("router.post('/things', handler);\n")
+    assert key() != before
+    before = key()
+
+    (project / "src" / "schemas" / "thing.ts").write_text("export interface Thing {\n  name: string;\n}\n")
+    assert key() != before
+
+
+def archive(name: str, member_type: bytes = tarfile.REGTYPE) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        info = tarfile.TarInfo(name)
+        info.type = member_type
+        info.linkname = "/etc/passwd" if member_type == tarfile.SYMTYPE else ""
+        info.size = 0 if member_type == tarfile.SYMTYPE else 4
+        tar.addfile(info, io.BytesIO(b"evil") if info.size else None)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("name, member_type", [
+    ("../escaped.json", tarfile.REGTYPE),
+    ("swagger/../../escaped.json", tarfile.REGTYPE),
+    ("/tmp/escaped.json", tarfile.REGTYPE),
+    ("swagger/link.json", tarfile.SYMTYPE),
+])
+def test_unexpected_members_are_a_miss(project, capsys, name, member_type):
+    store = LocalArtifactStore(str(project / "store"))
+    store.put("a" * 64, archive(name, member_type))
+    assert ArtifactCache(store).restore("a" * 64) is None
+    assert "unexpected member" in capsys.readouterr().out
+    assert not (project.parent / "escaped.json").exists()
+    assert not (project / "swagger" / "link.json").exists()
+
+
+def test_corrupt_archive_is_a_miss(project, capsys):
+    store = LocalArtifactStore(str(project / "store"))
+    store.put("b" * 64, b"not a tar")
+    assert ArtifactCache(store).restore("b" * 64) is None
+    assert "Ignoring artifact" in capsys.readouterr().out
@@ -0,0 +1,33 @@
+import gzip
+import json
+
+from .. import artifacts
+from ..artifacts import etag, write_artifacts
+
+DOCUMENT = {"openapi": "3.0.3", "paths": {"/things": {"get": {"summary": "Things"}}}}
+
+
+def test_write_artifacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "brotli", None)
+    assert write_artifacts(DOCUMENT, str(tmp_path), "swagger.json")
+    minified = (tmp_path / "swagger.min.json").read_bytes()
+    assert json.loads(minified) == DOCUMENT
+    assert gzip.decompress((tmp_path / "swagger.min.json.gz").read_bytes()) == minified
+
+    manifest = json.loads((tmp_path / "swagger.manifest.json").read_text())
+    assert manifest["etag"] == etag(minified)
+    assert list(manifest["encodings"]) == ["gzip"]
+    assert manifest["encodings"]["gzip"]["file"] == "swagger.min.json.gz"
+    assert not write_artifacts(DOCUMENT, str(tmp_path), "swagger.json")
+
+
+def test_missing_brotli_removes_stale_artifact_and_warns_once(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(artifacts, "brotli", None)
+    monkeypatch.setattr(artifacts, "brotli_warned", False)
+    write_artifacts(DOCUMENT, str(tmp_path), "swagger.json")
+    (tmp_path / "swagger.min.json.br").write_bytes(b"stale")
+
+    assert write_artifacts(DOCUMENT, str(tmp_path), "swagger.json")
+    assert not (tmp_path / "swagger.min.json.br").exists()
+    write_artifacts(DOCUMENT, str(tmp_path), "shard.json")
+    assert capsys.readouterr().out.count("brotli is not installed") == 1
@@ -0,0 +1,99 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import pytest
+
+from ..cache import BuildCache
+from ..locks import file_lock, fcntl
+
+CACHE = "build/.swagger_cache"
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in "abcdefgh":
+        (tmp_path / f"{name}.ts").write_text(name)
+    return tmp_path
+
+
+def test_get_put(project):
+    cache = BuildCache(directory=CACHE)
+    assert cache.get("routes", "a.ts", b"a") is None
+    cache.put("routes", "a.ts", b"a", {"parsed": "a"})
+    cache.save()
+
+    cache = BuildCache(directory=CACHE)
+    assert cache.get("routes", "a.ts", b"a") == {"parsed": "a"}
+    assert cache.get("routes", "a.ts", b"changed") is None
+    assert BuildCache(directory=CACHE, enabled=False).get("routes", "a.ts", b"a") is None
+
+
+def test_save_merges_with_other_builds(project):
+    first = BuildCache(directory=CACHE)
+    second = BuildCache(directory=CACHE)
+    first.get("routes", "a.ts", b"a")
+    second.get("routes", "b.ts", b"b")
+    first.put("routes", "a.ts", b"a", "A")
+    second.put("routes", "b.ts", b"b", "B")
+    second.put("schemas", "c.ts", b"c", "C")
+    first.save()
+    second.save()
+
+    cache = BuildCache(directory=CACHE)
+    assert cache.get("routes", "a.ts", b"a") == "A"
+    assert cache.get("routes", "b.ts", b"b") == "B"
+    assert cache.get("schemas", "c.ts", b"c") == "C"
+
+
+def test_save_drops_deleted_files(project):
+    cache = BuildCache(directory=CACHE)
+    cache.put("routes", "a.ts", b"a", "A")
+    cache.put("routes", "b.ts", b"b", "B")
+    os.remove("b.ts")
+    cache.save()
+    assert set(BuildCache(directory=CACHE).section("routes")) == {"a.ts"}
+
+
+def test_stale_fingerprint_is_ignored(project):
+    cache = BuildCache(directory=CACHE)
+    cache.put("routes", "a.ts", b"a", "A")
+    cache.save()
+    cache = BuildCache(directory=CACHE)
+    cache.fingerprint = "older builder"
+    assert cache.get("routes", "a.ts", b"a") is None
+
+
+def put_and_save(name: str) -> None:
+    cache = BuildCache(directory=CACHE)
+    cache.get("routes", f"{name}.ts", name.encode())
+    cache.put("routes", f"{name}.ts", name.encode(), name.upper())
+    cache.save()
+
+
+def test_parallel_saves_keep_every_entry(project):
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(put_and_save, "abcdefgh"))
+    cache = BuildCache(directory=CACHE)
+    assert {name: cache.get("routes", f"{name}.ts", name.encode()) for name in "abcdefgh"} == {
+        name: name.upper() for name in "abcdefgh"
+    }
+    assert [filename for filename in os.listdir(CACHE) if filename.endswith(".tmp")] == []
+
+
+def try_lock(name: str) -> bool:
+    with open(f"build/.locks/{name}.lock", "ab") as fp:
+        try:
+            fcntl.flock(fp.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+def test_file_lock(project):
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        with file_lock("cache"):
+            assert not pool.submit(try_lock, "cache").result()
+            assert pool.submit(try_lock, "typeconv").result()
+        assert pool.submit(try_lock, "cache").result()
@@ -0,0 +1,65 @@
+import copy
+
+from ..components import share_components
+
+ACCOUNT = {"$ref": "#/components/schemas/Account"}
+ID = {"name": "id", "in": "path", "required": True, "schema": {"type": "string"}}
+NOT_FOUND = {"description": "Not found", "content": {"application/json": {"schema": {"type": "string"}}}}
+BODY = {"required": True, "content": {"application/json": {"schema": ACCOUNT}}}
+
+
+def document() -> dict:
+    return {
+        "paths": {
+            "/accounts/{id}": {
+                "get": {
+                    "parameters": [copy.deepcopy(ID)],
+                    "responses": {"200": {"description": "Account"}, "404": copy.deepcopy(NOT_FOUND)},
+                },
+                "put": {
+                    "parameters": [copy.deepcopy(ID), {"name": "force", "in": "query", "schema": {"type": "boolean"}}],
+                    "requestBody": copy.deepcopy(BODY),
+                    "responses": {"404": copy.deepcopy(NOT_FOUND)},
+                },
+            },
+            "/accounts": {
+                "post": {"requestBody": copy.deepcopy(BODY), "responses": {"201": {"description": "Created"}}},
+            },
+        },
+        "components": {
+            "schemas": {"Account": {"type": "object"}},
+            "responses": {"Not_found": {"description": "Taken"}},
+        },
+    }
+
+
+def test_duplicates_are_interned():
+    openapi = document()
+    share_components(openapi)
+    account = openapi["paths"]["/accounts/{id}"]
+    assert account["get"]["parameters"] == [{"$ref": "#/components/parameters/idPath"}]
+    assert account["put"]["parameters"][0] == {"$ref": "#/components/parameters/idPath"}
+    assert account["get"]["responses"]["404"] == {"$ref": "#/components/responses/Not_found2"}
+    assert account["put"]["responses"]["404"] == {"$ref": "#/components/responses/Not_found2"}
+    assert account["put"]["requestBody"] == {"$ref": "#/components/requestBodies/Account"}
+    assert openapi["paths"]["/accounts"]["post"]["requestBody"] == {"$ref": "#/components/requestBodies/Account"}
+
+    components = openapi["components"]
+    assert components["parameters"] == {"idPath": ID}
+    assert components["responses"] == {"Not_found": {"description": "Taken"}, "Not_found2": NOT_FOUND}
+    assert components["requestBodies"] == {"Account": BODY}
+
+
+def test_single_use_objects_stay_inline():
+    openapi = document()
+    share_components(openapi)
+    assert openapi["paths"]["/accounts/{id}"]["get"]["responses"]["200"] == {"description": "Account"}
+    assert openapi["paths"]["/accounts/{id}"]["put"]["parameters"][1] == {
+        "name": "force", "in": "query", "schema": {"type": "boolean"},
+    }
+    assert openapi["paths"]["/accounts"]["post"]["responses"] == {"201": {"description": "Created"}}
+
+    openapi = {"paths": {"/things": {"get": {"parameters": [ID], "responses": {"200": {"description": "Things"}}}}}}
+    share_components(openapi)
+    assert openapi["paths"]["/things"]["get"] == {"parameters": [ID], "responses": {"200": {"description": "Things"}}}
+    assert openapi["components"] == {}
@@ -0,0 +1,48 @@
+import json
+import socket
+import threading
+
+import pytest
+
+from ..client import send
+from ..daemon import DaemonServer, Session
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    path = str(tmp_path / "daemon.sock")
+    server = DaemonServer(path, Session(["swagger-doc.yaml"]))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+
+
+def send_line(path: str, line: bytes) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(10)
+        connection.connect(path)
+        connection.sendall(line + b"\n")
+        with connection.makefile("rb") as fp:
+            return json.loads(fp.readline())
+
+
+def test_ping(socket_path):
+    response = send(socket_path, {"command": "ping"}, timeout=10)
+    assert response["ok"] and response["result"]["configs"] == ["swagger-doc.yaml"]
+
+
+def test_unknown_command(socket_path):
+    assert send(socket_path, {"command": "rebuild"}, timeout=10) == {
+        "ok": False, "error": "Unknown command rebuild", "output": "",
+    }
+
+
+@pytest.mark.parametrize("line", [b"not json", b"[]", b'"build"', b"1", b"null"])
+def test_requests_that_are_not_objects(socket_path, line):
+    assert send_line(socket_path, line) == {
+        "ok": False, "error": "Requests are one json object per line", "output": "",
+    }
+    # The daemon keeps answering
+    assert send(socket_path, {"command": "ping"}, timeout=10)["ok"]
@@ -0,0 +1,74 @@
+from ..dispatch import DispatchRoute, build_tree, find_conflicts, write_dispatch
+
+
+def route(method: str, uri: str, file: str = "") -> DispatchRoute:
+    return DispatchRoute(method=method, uri=uri, file=file or f"src/api{uri}.ts")
+
+
+def test_duplicates_ignore_case_and_parameter_names():
+    errors, shadows = find_conflicts([
+        route("get", "/accounts/:id", "a.ts"),
+        route("get", "/Accounts/:key", "b.ts"),
+        route("post", "/accounts/:id", "c.ts"),
+    ])
+    assert errors == ["GET /Accounts/:key in b.ts duplicates /accounts/:id in a.ts"]
+    assert shadows == []
+
+
+def test_shadowing_parameters():
+    errors, shadows = find_conflicts([
+        route("get", "/accounts/:id", "a.ts"),
+        route("get", "/accounts/search", "b.ts"),
+        route("get", "/accounts/search/all", "c.ts"),
+    ])
+    assert errors == []
+    assert shadows == ["GET /accounts/:id in a.ts and /accounts/search in b.ts match some of the same paths"]
+
+
+def test_optional_parameters_overlap_shorter_routes():
+    routes = [
+        route("get", "/accounts/:id?", "a.ts"),
+        route("get", "/accounts", "b.ts"),
+        route("get", "/accounts/:id/keys/:key?", "c.ts"),
+        route("get", "/accounts/:other/keys", "d.ts"),
+        route("get", "/users/:id?", "e.ts"),
+    ]
+    errors, shadows = find_conflicts(routes)
+    assert errors == []
+    assert shadows == [
+        "GET /accounts/:id? in a.ts and /accounts in b.ts match some of the same paths",
+        "GET /accounts/:id/keys/:key? in c.ts and /accounts/:other/keys in d.ts match some of the same paths",
+    ]
+
+    # Each path shape of an optional parameter gets a node, and a shape an earlier route has stays with it
+    tree = build_tree(routes)
+    assert tree["static"]["accounts"]["routes"] == {"GET": {"id": 0, "params": []}}
+    assert tree["static"]["accounts"]["param"]["routes"] == {"GET": {"id": 0, "params": ["id"]}}
+    assert tree["static"]["users"]["routes"] == {"GET": {"id": 4, "params": []}}
+    assert tree["static"]["users"]["param"]["routes"] == {"GET": {"id": 4, "params": ["id"]}}
+
+
+def test_optional_and_required_parameter_duplicate():
+    errors, _ = find_conflicts([route("get", "/accounts/:id?", "a.ts"), route("get", "/accounts/:key?", "b.ts")])
+    assert errors == ["GET /accounts/:key? in b.ts duplicates /accounts/:id? in a.ts"]
+    errors, shadows = find_conflicts([route("get", "/accounts/:id?", "a.ts"), route("get", "/accounts/:key", "b.ts")])
+    assert errors == []
+    assert shadows == ["GET /accounts/:id? in a.ts and /accounts/:key in b.ts match some of the same paths"]
+
+
+def test_wildcards_are_rejected(tmp_path):
+    routes = [
+        route("get", "/files/*", "a.ts"),
+        route("get", "/ab?cd", "b.ts"),
+        route("get", "/accounts/:id(\\d+)", "c.ts"),
+        route("get", "/accounts/:id", "d.ts"),
+    ]
+    errors, _ = find_conflicts(routes)
+    assert [error.split(" in ")[0] for error in errors] == ["GET /files/*", "GET /ab?cd", "GET /accounts/:id(\\d+)"]
+    assert all("only static segments, :name and :name? are supported" in error for error in errors)
+
+    filename = str(tmp_path / "routes.ts")
+    changed, errors, _ = write_dispatch(routes, filename)
+    assert not changed
+    assert len(errors) == 3
+    assert not (tmp_path / "routes.ts").exists()
@@ -0,0 +1,96 @@
+import json
+
+import yaml
+
+from ..api_model import ApiModel, Operation, Parameter, RequestBody, Response
+from ..emitters import EMITTERS, write_document
+
+REF = {"$ref": "#/components/schemas/Account"}
+
+
+def model() -> ApiModel:
+    return ApiModel(
+        document={"openapi": "3.0.3", "info": {"title": "Test", "version": "1.0.0"}},
+        security=[{"OAuth2": []}],
+        security_schemes={"OAuth2": {"type": "oauth2"}},
+        operations={
+            ("/things/{id}", "post"): Operation(
+                tags=["Things"],
+                summary="Update",
+                responses={
+                    "200": Response(description=None, content={"application/json": {"allOf": [REF], "nullable": True}}),
+                },
+                is_secure=False,
+                request_body=RequestBody(required=True, description=None, content={"application/json": REF}),
+                parameters=[Parameter("id", "path", True, None, {"type": "string", "nullable": True})],
+            ),
+            ("/things/{id}", "get"): Operation(tags=["Things"], summary="Get", responses={"200": Response(description=None)}),
+        },
+        schemas={
+            "Thing": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "nullable": True},
+                    "kind": {"type": "string", "enum": ["a", "b"], "nullable": True},
+                    "owner": {"allOf": [REF], "nullable": True},
+                    "either": {"anyOf": [{"type": "string"}, {"type": "number"}], "nullable": True},
+                    "items": {"type": "array", "items": {"type": "number", "minimum": 0, "exclusiveMinimum": True}},
+                    "score": {"type": "number", "minimum": 0, "maximum": 1, "exclusiveMaximum": True, "exclusiveMinimum": False},
+                    "plain": {"type": "integer", "minimum": 1},
+                },
+                "additionalProperties": {"type": "string", "nullable": True},
+            },
+            "Account": {"type": "object", "properties": {"id": {"type": "string"}}},
+        },
+    )
+
+
+def test_openapi30_keeps_the_model_dialect():
+    document = EMITTERS["openapi30"]().document(model())
+    assert document["openapi"] == "3.0.3"
+    assert document["components"]["schemas"] == {name: model().schemas[name] for name in ["Account", "Thing"]}
+    assert list(document["paths"]["/things/{id}"]) == ["get", "post"]
+    post = document["paths"]["/things/{id}"]["post"]
+    assert post["security"] == []
+    assert post["responses"]["200"]["content"]["application/json"]["schema"] == {"allOf": [REF], "nullable": True}
+    assert post["parameters"][0] == {
+        "name": "id", "in": "path", "required": True, "description": None, "schema": {"type": "string", "nullable": True},
+    }
+    assert "security" not in document["paths"]["/things/{id}"]["get"]
+
+
+def test_openapi31_rewrites_nullable_and_exclusive_bounds():
+    document = EMITTERS["openapi31"]().document(model())
+    assert document["openapi"] == "3.1.0"
+    thing = document["components"]["schemas"]["Thing"]
+    assert thing["properties"] == {
+        "name": {"type": ["string", "null"]},
+        "kind": {"type": ["string", "null"], "enum": ["a", "b", None]},
+        "owner": {"anyOf": [REF, {"type": "null"}]},
+        "either": {"anyOf": [{"type": "string"}, {"type": "number"}, {"type": "null"}]},
+        "items": {"type": "array", "items": {"type": "number", "exclusiveMinimum": 0}},
+        "score": {"type": "number", "minimum": 0, "exclusiveMaximum": 1},
+        "plain": {"type": "integer", "minimum": 1},
+    }
+    assert thing["additionalProperties"] == {"type": ["string", "null"]}
+    assert "nullable" not in json.dumps(document)
+
+    post = document["paths"]["/things/{id}"]["post"]
+    assert post["responses"]["200"]["content"]["application/json"]["schema"] == {"anyOf": [REF, {"type": "null"}]}
+    assert post["requestBody"]["content"]["application/json"]["schema"] == REF
+    assert post["parameters"][0]["schema"] == {"type": ["string", "null"]}
+
+
+def test_openapi31_leaves_the_model_untouched():
+    source = model()
+    EMITTERS["openapi31"]().document(source)
+    assert source.schemas == model().schemas
+
+
+def test_write_document(tmp_path):
+    document = EMITTERS["openapi31"]().document(model())
+    assert write_document(document, str(tmp_path / "spec.yaml"))
+    assert write_document(document, str(tmp_path / "spec.json"))
+    assert yaml.safe_load((tmp_path / "spec.yaml").read_text()) == json.loads((tmp_path / "spec.json").read_text())
+    assert "&id" not in (tmp_path / "spec.yaml").read_text()
+    assert not write_document(document, str(tmp_path / "spec.yaml"))
@@ -0,0 +1,125 @@
+from typing import List, Set
+import os
+
+import pytest
+import yaml
+
+from ..patterns import FileMatcher, walk_matching
+
+TREE = [
+    "src/api/index.ts",
+    "src/api/account.ts",
+    "src/api/accounts/list.ts",
+    "src/api/accounts/nested/get.ts",
+    "src/api/accountsV2/list.ts",
+    "src/api/identrust/createAccount.ts",
+    "src/api/identrust/createAccount.spec.ts",
+    "src/api/identrust/helpers.js",
+    "src/api/identrust/v2/renew.ts",
+    "src/api/legacy/old.ts",
+    "src/api/legacy/deep/older.ts",
+    "src/api/other/thing.ts",
+]
+CONFIG = os.path.join(os.path.dirname(__file__), "..", "..", "src", "swagger", "swagger-doc.yaml")
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    for path in TREE:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def prefix_matches(entries: List[str]) -> Set[str]:
+    """
+    How _files entries were matched before they were compiled, as path prefixes once ./ and *.ts were dropped
+    """
+    prefixes = [entry.strip().replace("./", "").replace("*.ts", "") for entry in entries]
+    matching = set()
+    for root, dirs, files in os.walk("src/api", topdown=False):
+        for filename in files:
+            if any(f"{root}/{filename}".startswith(prefix) for prefix in prefixes):
+                matching.add(f"{root}/{filename}")
+    return matching
+
+
+def matches(patterns: List[str]) -> Set[str]:
+    return {f"{root}/{filename}" for root, filename in walk_matching("src/api", [FileMatcher(patterns)])}
+
+
+@pytest.mark.parametrize("entries", [
+    ["./src/api/identrust/*.ts"],
+    ["./src/*.ts"],
+    ["./src/api/identrust/*.ts", "./src/*.ts"],
+    ["src/api/accounts"],
+    ["src/api/accounts/"],
+    ["src/api/acc"],
+    ["./src/api/identrust/*.ts", "./src/api/other"],
+    ["src/api/nothing"],
+])
+def test_prefix_entries_match_as_before(tree, entries):
+    assert matches(entries) == prefix_matches(entries)
+
+
+def test_repo_config_matches_as_before(tree):
+    with open(CONFIG, "rt") as fp:
+        entries = yaml.safe_load(fp)["_files"]
+    assert matches(entries) == prefix_matches(entries) == set(TREE)
+
+
+def test_globs(tree):
+    assert matches(["./src/api/**/*.ts"]) == {path for path in TREE if path.endswith(".ts")}
+    assert matches(["src/api/*/list.ts"]) == {"src/api/accounts/list.ts", "src/api/accountsV2/list.ts"}
+    assert matches(["src/api/identrust/*.ts"]) == {
+        "src/api/identrust/createAccount.ts", "src/api/identrust/createAccount.spec.ts", "src/api/identrust/v2/renew.ts",
+        "src/api/identrust/helpers.js",
+    }
+    assert matches(["src/api/identrust/*Account.ts"]) == {"src/api/identrust/createAccount.ts"}
+    assert matches(["src/api/**/get.ts"]) == {"src/api/accounts/nested/get.ts"}
+
+
+def test_excludes(tree):
+    assert matches(["./src/*.ts", "!src/api/legacy"]) == set(TREE) - {
+        "src/api/legacy/old.ts", "src/api/legacy/deep/older.ts",
+    }
+    assert matches(["src/api/**/*.ts", "!src/api/**/*.spec.ts"]) == {
+        path for path in TREE if path.endswith(".ts") and not path.endswith(".spec.ts")
+    }
+    # An exclude wins whatever order it is listed in
+    assert matches(["!src/api/accounts/nested", "src/api/accounts/"]) == {"src/api/accounts/list.ts"}
+    assert matches(["!src/api"]) == set()
+
+
+def test_matches_agrees_with_walk(tree):
+    patterns = ["src/api/acc", "!src/api/**/nested", "src/api/identrust/*.spec.ts"]
+    matcher = FileMatcher(patterns)
+    assert {path for path in TREE if matcher.matches(path)} == matches(patterns)
+
+
+def test_walk_prunes_directories(tree, monkeypatch):
+    scanned = []
+    scandir = os.scandir
+
+    def recording_scandir(path):
+        scanned.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", recording_scandir)
+    matches(["src/api/accounts/", "!src/api/accounts/nested"])
+    assert sorted(scanned) == ["src/api", "src/api/accounts"]
+
+    scanned.clear()
+    matches(["src/api/**/*.ts", "!src/api/legacy/"])
+    assert "src/api/legacy" not in scanned and "src/api/legacy/deep" not in scanned
+    assert "src/api/identrust/v2" in scanned
+
+
+def test_walk_order_follows_os_walk(tree):
+    walked = [
+        f"{root}/{filename}" for root, dirs, files in os.walk("src/api", topdown=False) for filename in files
+    ]
+    found = [f"{root}/{filename}" for root, filename in walk_matching("src/api", [FileMatcher(["src/"])])]
+    assert [os.path.dirname(path) for path in found] == [os.path.dirname(path) for path in walked]
+    assert sorted(found) == sorted(walked)
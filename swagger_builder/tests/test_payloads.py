@@ -0,0 +1,48 @@
+from ..payloads import PayloadGenerator
+from ..symbols import scan_file
+from ..ts_schema import convert_interfaces
+
+
+def test_pragma_bounds():
+    schemas = convert_interfaces(scan_file("src/schemas/foo.ts", b"""export interface Foo {
+  /**
+   * @minimum : 1
+   * @maximum : 5
+   */
+  count: number;
+  /**
+   * @minimum : 10
+   * @exclusiveMinimum : true
+   * @multipleOf : 4
+   */
+  step: number;
+  /**
+   * @maximum : 2.5
+   */
+  ratio: number;
+}
+""").symbols).schemas
+    assert schemas["Foo"]["properties"]["count"]["minimum"] == "1"
+
+    values = list(PayloadGenerator(schemas).instances("Foo", 200))
+    assert len(values) == 200
+    for value in values:
+        assert 1 <= value["count"] <= 5
+        assert value["step"] > 10 and value["step"] % 4 == 0
+        assert 0 <= value["ratio"] <= 2.5
+
+
+def test_numeric_and_openapi31_bounds():
+    schemas = {
+        "Bar": {
+            "type": "object",
+            "required": ["a", "b"],
+            "properties": {
+                "a": {"type": "integer", "minimum": 3, "maximum": 3},
+                "b": {"type": "number", "exclusiveMinimum": 0, "exclusiveMaximum": 2},
+            },
+        }
+    }
+    for value in PayloadGenerator(schemas, seed=7).instances("Bar", 50):
+        assert value["a"] == 3
+        assert value["b"] == 1
@@ -0,0 +1,54 @@
+import json
+
+from .. import artifacts
+from ..shards import write_shards
+
+ACCOUNT = {"$ref": "#/components/schemas/Account"}
+ACCOUNT_RESPONSE = {"200": {"content": {"application/json": {"schema": ACCOUNT}}}}
+
+
+def document(tags: set) -> dict:
+    paths = {
+        "/accounts": {"get": {"tags": ["Accounts"], "responses": ACCOUNT_RESPONSE}},
+        "/health": {"get": {"responses": {"200": {"description": "Up"}}}},
+        "/things": {"get": {"tags": ["Things", "Accounts"], "responses": {"200": {"description": "Things"}}}},
+    }
+    return {
+        "openapi": "3.0.3",
+        "info": {"title": "Test", "version": "1.0.0"},
+        "paths": {path: verbs for path, verbs in paths.items() if set(verbs["get"].get("tags", ["default"])) & tags},
+        "components": {
+            "schemas": {"Account": {"type": "object", "properties": {"owner": {"$ref": "#/components/schemas/Owner"}}},
+                        "Owner": {"type": "object"}, "Unused": {"type": "string"}},
+            "securitySchemes": {"OAuth2": {"type": "oauth2"}},
+        },
+    }
+
+
+def test_shards_follow_the_tags(tmp_path):
+    assert write_shards(document({"Accounts", "Things", "default"}), str(tmp_path), "swagger.json")
+    index = json.loads((tmp_path / "swagger.index.json").read_text())
+    assert [(entry["tag"], entry["file"], entry["operations"]) for entry in index["shards"]] == [
+        ("Accounts", "swagger.accounts.json", 2),
+        ("default", "swagger.default.json", 1),
+        ("Things", "swagger.things.json", 1),
+    ]
+    accounts = json.loads((tmp_path / "swagger.accounts.json").read_text())
+    assert accounts["info"]["title"] == "Test - Accounts"
+    assert list(accounts["components"]["schemas"]) == ["Account", "Owner"]
+    assert accounts["components"]["securitySchemes"] == {"OAuth2": {"type": "oauth2"}}
+    assert not write_shards(document({"Accounts", "Things", "default"}), str(tmp_path), "swagger.json")
+
+
+def test_dropped_tag_removes_its_shard(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "brotli", None)
+    write_shards(document({"Accounts", "Things", "default"}), str(tmp_path), "swagger.json", compress=True)
+    assert (tmp_path / "swagger.default.min.json.gz").exists()
+    (tmp_path / "swagger.default.min.json.br").write_bytes(b"stale")
+
+    assert write_shards(document({"Accounts", "Things"}), str(tmp_path), "swagger.json", compress=True)
+    index = json.loads((tmp_path / "swagger.index.json").read_text())
+    assert [entry["tag"] for entry in index["shards"]] == ["Accounts", "Things"]
+    assert not list(tmp_path.glob("swagger.default.*"))
+    assert (tmp_path / "swagger.things.json").exists()
+    assert (tmp_path / "swagger.things.min.json.gz").exists()
@@ -0,0 +1,138 @@
+import json
+import os
+
+import pytest
+
+from ..builder import SwaggerBuilder
+from ..cache import BuildCache
+from ..symbols import scan_file
+from ..ts_schema import convert_interfaces
+
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..")
+# The schemas of the spec committed before the conversion moved in process, built from the typeconv output
+TYPECONV_SCHEMAS = os.path.join(os.path.dirname(__file__), "fixtures", "typeconv_schemas.json")
+
+
+def convert(source: str):
+    return convert_interfaces(scan_file("src/schemas/test.ts", source.encode()).symbols)
+
+
+def test_repo_schemas_match_typeconv(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    with open(TYPECONV_SCHEMAS, "rt") as fp:
+        expected = json.load(fp)
+    builder = SwaggerBuilder()
+    converted = {}
+    for filename in sorted(os.listdir("src/schemas")):
+        converted.update(builder.read_schema_file(f"src/schemas/{filename}").schemas)
+    assert converted == expected
+
+
+def test_members():
+    schemas = convert("""export interface Thing {
+  id: string;
+  count?: number;
+  tags: string[];
+  owners: Array<Account>;
+  created: Date;
+  parent: Thing | null;
+  kind: "a" | "b";
+  extra: Record<string, number>;
+  inline?: { name: string; size?: number };
+}
+""").schemas
+    assert schemas["Thing"] == {
+        "properties": {
+            "id": {"type": "string"},
+            "count": {"type": "number"},
+            "tags": {"type": "array", "items": {"type": "string"}},
+            "owners": {"type": "array", "items": {"$ref": "#/components/schemas/Account"}},
+            "created": {"type": "string"},
+            "parent": {"allOf": [{"$ref": "#/components/schemas/Thing"}], "nullable": True},
+            "kind": {"type": "string", "enum": ["a", "b"]},
+            "extra": {"type": "object", "additionalProperties": {"type": "number"}},
+            "inline": {
+                "properties": {"name": {"type": "string"}, "size": {"type": "number"}},
+                "required": ["name"],
+                "additionalProperties": False,
+                "type": "object",
+            },
+        },
+        "required": ["id", "tags", "owners", "created", "parent", "kind", "extra"],
+        "additionalProperties": False,
+        "type": "object",
+    }
+
+
+def test_comments_and_pragmas():
+    schemas = convert("""/**
+ * A thing
+ */
+export interface Thing {
+  /**
+   * When it was made
+   * @format : date-time
+   */
+  created: string;
+  /**
+   * @format : uuid
+   */
+  ids: string[];
+  [key: string]: string;
+}
+""").schemas
+    assert schemas["Thing"] == {
+        "description": "A thing",
+        "properties": {
+            "created": {"type": "string", "format": "date-time", "description": "When it was made"},
+            "ids": {"type": "array", "items": {"type": "string", "format": "uuid"}},
+        },
+        "required": ["created", "ids"],
+        "additionalProperties": {"type": "string"},
+        "type": "object",
+    }
+
+
+def test_parents():
+    schema_file = convert("""export interface Child extends Parent {
+  name: string;
+}
+""")
+    assert schema_file.parents == {"Child": ["Parent"]}
+    assert schema_file.schemas["Child"]["properties"] == {"name": {"type": "string"}}
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    (tmp_path / "src" / "schemas").mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def write_schema(name: str, source: str) -> None:
+    with open(f"src/schemas/{name}.ts", "wt") as fp:
+        fp.write(source)
+
+
+def properties(name: str) -> list:
+    builder = SwaggerBuilder(cache=BuildCache(directory="build/.swagger_cache"))
+    schema = builder.read_schema_file(f"src/schemas/{name[0].lower()}{name[1:]}.ts").schemas[name]
+    builder.cache.save()
+    return sorted(schema["properties"])
+
+
+def test_implemented_members_are_left_out(project):
+    write_schema("secret", "export interface Secret {\n  password: string;\n}\n")
+    write_schema("account", "export interface Account extends Model, Secret {\n  key: string;\n  password: string;\n}\n")
+    assert properties("Account") == ["key"]
+
+
+def test_cache_follows_implemented_interfaces(project):
+    write_schema("secret", "export interface Secret {\n  password: string;\n}\n")
+    write_schema("account", "export interface Account extends Model, Secret {\n  key: string;\n  password: string;\n}\n")
+    assert properties("Account") == ["key"]
+    assert os.path.exists("build/.swagger_cache/ts_schemas.pickle")
+
+    # Only the implemented interface changes, the cached conversion of account.ts must not be used
+    write_schema("secret", "export interface Secret {\n  key: string;\n}\n")
+    assert properties("Account") == ["password"]
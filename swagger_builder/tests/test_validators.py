@@ -0,0 +1,84 @@
+import json
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from ..symbols import scan_file
+from ..ts_schema import convert_interfaces
+from ..validators import ValidatorCompiler
+
+SOURCE = """export interface Bounded {
+  /**
+   * @minimum : 1
+   * @maximum : 10
+   */
+  count: number;
+  /**
+   * @minimum : 0
+   * @exclusiveMinimum : true
+   * @multipleOf : 0.5
+   */
+  ratio?: number;
+  /**
+   * @multipleOf : 2
+   */
+  even?: number;
+}
+"""
+CASES = [
+    ({"count": 1}, True),
+    ({"count": 10}, True),
+    ({"count": 0}, False),
+    ({"count": 11}, False),
+    ({"count": 2, "ratio": 1.5}, True),
+    ({"count": 2, "ratio": 0}, True),
+    ({"count": 2, "ratio": 1.25}, False),
+    ({"count": 2, "even": 4}, True),
+    ({"count": 2, "even": 3}, False),
+    ({"count": "2"}, False),
+]
+
+
+def compile_schemas(source: str) -> str:
+    schemas = convert_interfaces(scan_file("src/schemas/bounded.ts", source.encode()).symbols).schemas
+    return ValidatorCompiler(schemas).render(sorted(schemas))
+
+
+def test_string_bounds_compile_to_numbers():
+    module = compile_schemas(SOURCE)
+    assert "if (v1 < 1) return false;" in module
+    assert "if (v1 > 10) return false;" in module
+    assert "% 0.5 !== 0" in module and "% 2 !== 0" in module
+    assert not re.search(r'[<>%] "', module)
+
+
+def test_non_numeric_bounds_are_not_checked():
+    module = compile_schemas("""export interface Odd {
+  /**
+   * @minimum : one
+   */
+  count: number;
+}
+""")
+    assert "one" not in module
+
+
+def javascript(module: str) -> str:
+    """
+    Strips the few type annotations the generated module uses, so node can run it
+    """
+    module = module.replace("(value: any): boolean", "(value)")
+    module = re.sub(r"new Set<\w+>\(", "new Set(", module)
+    module = module.replace("export const validators: { [name: string]: (value: unknown) => boolean } =", "const validators =")
+    return module.replace("export function", "function")
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_compiled_validator_checks_bounds():
+    script = javascript(compile_schemas(SOURCE)) + (
+        f"\nconsole.log(JSON.stringify({json.dumps([value for value, _ in CASES])}.map(validators.Bounded)));\n"
+    )
+    result = subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout) == [valid for _, valid in CASES]
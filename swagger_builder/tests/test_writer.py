@@ -0,0 +1,79 @@
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+
+import pytest
+
+from ..writer import write_bytes_if_changed, write_if_changed
+
+DOCUMENT = {"openapi": "3.0.3", "paths": {f"/things/{n}": {"get": {"summary": "x" * 100}} for n in range(2000)}}
+
+
+def leftovers(directory) -> list:
+    return [filename for filename in os.listdir(directory) if filename.endswith(".tmp")]
+
+
+def test_write_if_changed(tmp_path):
+    filename = str(tmp_path / "spec.json")
+    assert write_if_changed(DOCUMENT, filename)
+    with open(filename, "rt") as fp:
+        assert fp.read() == json.dumps(DOCUMENT, indent=2)
+
+    os.utime(filename, ns=(1_000_000_000, 1_000_000_000))
+    inode = os.stat(filename).st_ino
+    assert not write_if_changed(DOCUMENT, filename)
+    assert os.stat(filename).st_mtime_ns == 1_000_000_000
+    assert os.stat(filename).st_ino == inode
+
+    assert write_if_changed({"openapi": "3.1.0"}, filename, minify=True)
+    with open(filename, "rt") as fp:
+        assert fp.read() == '{"openapi":"3.1.0"}'
+    assert leftovers(tmp_path) == []
+
+
+def test_write_if_changed_keeps_key_order(tmp_path):
+    filename = str(tmp_path / "spec.json")
+    write_if_changed({"openapi": "3.0.3", "info": {"version": "1", "title": "x"}, "components": {}}, filename)
+    with open(filename, "rt") as fp:
+        assert list(json.load(fp)) == ["openapi", "info", "components"]
+    # The same content in another order is a different file
+    assert write_if_changed({"info": {"title": "x", "version": "1"}, "openapi": "3.0.3", "components": {}}, filename)
+
+
+def test_write_bytes_if_changed(tmp_path):
+    filename = str(tmp_path / "spec.json.gz")
+    assert write_bytes_if_changed(b"one", filename)
+    os.utime(filename, ns=(1_000_000_000, 1_000_000_000))
+    assert not write_bytes_if_changed(b"one", filename)
+    assert os.stat(filename).st_mtime_ns == 1_000_000_000
+    assert write_bytes_if_changed(b"two", filename)
+    with open(filename, "rb") as fp:
+        assert fp.read() == b"two"
+    assert leftovers(tmp_path) == []
+
+
+def test_failed_write_keeps_the_file(tmp_path):
+    filename = str(tmp_path / "spec.json")
+    write_if_changed(DOCUMENT, filename)
+    with pytest.raises(TypeError):
+        write_if_changed({"paths": DOCUMENT["paths"], "broken": object()}, filename)
+    with open(filename, "rt") as fp:
+        assert json.load(fp) == DOCUMENT
+    assert leftovers(tmp_path) == []
+
+
+def write_version(job) -> bool:
+    filename, version = job
+    return write_if_changed(dict(DOCUMENT, version=version), filename)
+
+
+def test_parallel_writes_leave_a_whole_file(tmp_path):
+    filename = str(tmp_path / "spec.json")
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(write_version, [(filename, version % 4) for version in range(32)]))
+    with open(filename, "rt") as fp:
+        document = json.load(fp)
+    assert document["version"] in range(4)
+    assert document["paths"] == DOCUMENT["paths"]
+    assert leftovers(tmp_path) == []
+
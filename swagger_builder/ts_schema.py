@@ -0,0 +1,254 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+import re
+
+from .schema_from_model import Interface, Parameter, parse_interface
+from .symbols import Symbol, SymbolTable
+
+REF_PREFIX = "#/components/schemas/"
+
+
+@dataclass
+class SchemaFile:
+    """
+    The cleaned schemas found in one input file, the parents of each schema that extends others and the schemas each
+    one references. The references are the adjacency lists of the schema dependency graph
+    """
+    schemas: Dict[str, Any] = field(default_factory=dict)
+    parents: Dict[str, List[str]] = field(default_factory=dict)
+    refs: Dict[str, List[str]] = field(default_factory=dict)
+
+    def index_refs(self) -> None:
+        self.refs = {name: schema_refs(schema) for name, schema in self.schemas.items()}
+
+
+def schema_refs(schema: Any) -> List[str]:
+    """
+    Finds every schema referenced anywhere in a definition, including inside allOf, oneOf, anyOf, additionalProperties,
+    items and nested inline objects
+    :param schema: The schema definition
+    :return: List of the referenced schema names, in the order they first appear
+    """
+    refs: Dict[str, None] = {}
+    stack = [schema]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            ref = value.get("$ref")
+            if isinstance(ref, str) and ref.startswith(REF_PREFIX):
+                refs[ref[len(REF_PREFIX):]] = None
+            stack.extend(reversed(list(value.values())))
+        elif isinstance(value, list):
+            stack.extend(reversed(value))
+    return list(refs)
+
+
+def comment_lines(comments: List[str]) -> List[str]:
+    """
+    Strips the comment markers from a jsdoc block
+    :param comments: Lines of the comment block, including the /** and */ lines
+    :return: The text lines of the comment
+    """
+    lines: List[str] = []
+    for line in comments:
+        line = line.strip()
+        if line.startswith("/**"):
+            line = line[3:]
+        elif line.startswith("/*"):
+            line = line[2:]
+        if line.endswith("*/"):
+            line = line[:-2]
+        line = line.strip()
+        if line.startswith("*"):
+            line = line[1:].strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def pragma_number(value: Any) -> Any:
+    """
+    Reads a numeric keyword that can come from a doc comment pragma, such as @minimum : 1, which is kept as a string
+    :param value: The keyword value from a schema
+    :return: The value as an int or float when it is a number or a numeric string, otherwise the value unchanged
+    """
+    if isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            return value
+        return int(number) if number.is_integer() else number
+    return value
+
+
+def is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def type_schema(type_name: str) -> Dict[str, Any]:
+    """
+    Converts a single typescript type to a schema
+    :param type_name: The type, which can be a base type, a literal, an inline object or an interface. If ends in []
+                      treat as array
+    :return: Dictionary with schema, referencing a component if not a base type
+    """
+    type_name = type_name.strip()
+    if type_name.endswith("[]"):
+        return {"type": "array", "items": type_schema(type_name[:-2])}
+    if type_name.startswith("Array<") and type_name.endswith(">"):
+        return {"type": "array", "items": type_schema(type_name[6:-1])}
+    if type_name.startswith("Record<") and type_name.endswith(">"):
+        return {"type": "object", "additionalProperties": type_schema(type_name[7:-1].split(",", 1)[1])}
+    if type_name.startswith("{") and type_name.endswith("}"):
+        return inline_schema(type_name[1:-1])
+    if type_name in {"string", "number", "boolean", "object"}:
+        return {"type": type_name}
+    if type_name == "Date":
+        return {"type": "string"}
+    if type_name in {"any", "unknown"}:
+        return {}
+    if re.fullmatch(r"(['\"]).*\1", type_name):
+        return {"type": "string", "enum": [type_name[1:-1]]}
+    if re.fullmatch(r"-?\d+(\.\d+)?", type_name):
+        return {"type": "number", "enum": [float(type_name) if "." in type_name else int(type_name)]}
+    if type_name in {"true", "false"}:
+        return {"type": "boolean", "enum": [type_name == "true"]}
+    if type_name.startswith("models."):
+        type_name = type_name[7:]
+    return {"$ref": f"{REF_PREFIX}{type_name}"}
+
+
+def union_schema(types: List[str]) -> Dict[str, Any]:
+    """
+    Converts the members of a typescript union to a schema, using nullable for null members
+    :param types: The member types of the union
+    :return: Dictionary with schema
+    """
+    nullable = "null" in types
+    schemas = [type_schema(type_name) for type_name in types if type_name != "null"]
+
+    # Unions of literals of one type become a single enum
+    if len(schemas) > 1 and all("enum" in schema for schema in schemas) and len({schema["type"] for schema in schemas}) == 1:
+        schemas = [{"type": schemas[0]["type"], "enum": [value for schema in schemas for value in schema["enum"]]}]
+
+    if len(schemas) == 1:
+        schema = schemas[0]
+    elif len(schemas) == 0:
+        schema = {}
+    else:
+        schema = {"anyOf": schemas}
+    if nullable:
+        if "$ref" in schema:
+            schema = {"allOf": [schema]}
+        schema["nullable"] = True
+    return schema
+
+
+def inline_schema(body: str) -> Dict[str, Any]:
+    """
+    Converts the members of an inline object type, such as { a: string; b?: number }
+    :param body: The text between the braces
+    :return: Dictionary with an object schema
+    """
+    lines = [f"{member.strip()};" for member in re.split(r"[;,](?![^{]*})", body) if member.strip()]
+    interface = parse_interface(["export interface Inline {"] + lines + ["}"], [])
+    return object_schema(interface)
+
+
+def property_schema(parameter: Parameter) -> Dict[str, Any]:
+    """
+    Converts an interface member to a schema, applying the @key : value pragmas from its comment
+    :param parameter: The parsed interface member
+    :return: Dictionary with schema
+    """
+    schema = union_schema(parameter.types)
+    target = schema["items"] if schema.get("type") == "array" else schema
+    description: List[str] = []
+    for line in comment_lines(parameter.comments):
+        if line.startswith("@") and " : " in line:
+            doc_key, doc_value = line[1:].split(" : ", 1)
+            target[doc_key] = doc_value
+        else:
+            description.append(line)
+    if description:
+        target["description"] = "\n".join(description)
+    return schema
+
+
+def object_schema(interface: Interface) -> Dict[str, Any]:
+    """
+    Converts a parsed interface to an object schema with its own members, without those of its parents
+    :param interface: The parsed interface
+    :return: Dictionary with schema
+    """
+    schema: Dict[str, Any] = {}
+    description = [line for line in comment_lines(interface.comments) if not line.startswith("@")]
+    if description:
+        schema["description"] = "\n".join(description)
+    if interface.params:
+        schema["properties"] = {}
+        required: List[str] = []
+        for parameter in interface.params:
+            name = parameter.name
+            if name.endswith("?"):
+                name = name[:-1]
+            else:
+                required.append(name)
+            schema["properties"][name] = property_schema(parameter)
+        if required:
+            schema["required"] = required
+    if interface.index_types is not None:
+        schema["additionalProperties"] = union_schema(interface.index_types)
+    else:
+        schema["additionalProperties"] = False
+    schema["type"] = "object"
+    return schema
+
+
+def convert_interfaces(symbols: Iterable[Symbol], table: Optional[SymbolTable] = None) -> SchemaFile:
+    """
+    Converts the exported interfaces and classes in a typescript schema file to cleaned openapi schemas
+    :param symbols: The declarations in the schema file
+    :param table: Symbol table to look implemented interfaces up in
+    :return: SchemaFile with the schema and parents of each interface
+    """
+    schema_file = SchemaFile()
+    for symbol in symbols:
+        if symbol.kind == "enum":
+            continue
+        interface = parse_interface(symbol.lines, symbol.comments, table)
+        if interface is None:
+            continue
+        schema_file.schemas[interface.name] = object_schema(interface)
+        if interface.parents:
+            schema_file.parents[interface.name] = interface.parents
+    return schema_file
+
+
+def extend_schema(schema: Dict[str, Any], parents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Adds the properties and required members of the parents to a schema. The merged schema is a new dictionary, so the
+    parsed schemas can be shared
+    :param schema: The schema that extends the parents
+    :param parents: The already merged schemas of its parents, in declaration order
+    :return: The merged schema
+    """
+    properties = dict(schema.get("properties", {}))
+    required = list(schema.get("required", []))
+    for parent in parents:
+        for key, value in parent.get("properties", {}).items():
+            if key not in properties:
+                properties[key] = value
+        required.extend(key for key in parent.get("required", []) if key not in required)
+
+    merged: Dict[str, Any] = {}
+    if "description" in schema:
+        merged["description"] = schema["description"]
+    if properties:
+        merged["properties"] = properties
+    if required:
+        merged["required"] = required
+    for key, value in schema.items():
+        if key not in merged and key not in {"properties", "required"}:
+            merged[key] = value
+    return merged
@@ -0,0 +1,298 @@
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import re
+
+from .components import canonical, operations
+from .shards import component_refs
+from .ts_schema import REF_PREFIX, is_number, pragma_number
+from .writer import write_bytes_if_changed
+
+GENERATED_BANNER = (
+    "// Do not modify this file directly. It is generated by swagger_builder from the schemas in the spec.\n"
+    "/* eslint-disable */\n"
+)
+NUMBER_KEYWORDS = ["minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum", "multipleOf"]
+# Above this many properties, closed objects check their keys against a Set instead of comparing them one by one
+KEY_SET_THRESHOLD = 8
+
+TYPE_CHECKS = {
+    "string": 'typeof {0} !== "string"',
+    "number": 'typeof {0} !== "number"',
+    "integer": "!Number.isInteger({0})",
+    "boolean": 'typeof {0} !== "boolean"',
+    "array": "!Array.isArray({0})",
+    "object": 'typeof {0} !== "object" || {0} === null || Array.isArray({0})',
+    "null": "{0} !== null",
+}
+
+
+def function_name(name: str) -> str:
+    return "validate" + re.sub(r"[^A-Za-z0-9_$]", "_", name)
+
+
+def validated_schemas(openapi: Dict[str, Any]) -> List[str]:
+    """
+    Finds the schemas used as request bodies and responses, looking through the shared responses and request bodies
+    :param openapi: The spec
+    :return: List of the schema names, sorted
+    """
+    components = openapi.get("components", {})
+    names = set()
+    stack: List[Tuple[str, str]] = []
+    for path, verb, operation in operations(openapi):
+        stack.extend(component_refs([operation.get("requestBody", {}), operation.get("responses", {})]))
+    seen = set()
+    while stack:
+        section, name = stack.pop()
+        if (section, name) in seen:
+            continue
+        seen.add((section, name))
+        if section == "schemas":
+            if name in components.get("schemas", {}):
+                names.add(name)
+        elif name in components.get(section, {}):
+            stack.extend(component_refs(components[section][name]))
+    return sorted(names)
+
+
+class ValidatorCompiler:
+    """
+    Compiles JSON schemas into typescript functions that check a value with straight-line code, without looking at a
+    schema at runtime. Each component is compiled once into a function that every $ref to it calls, which also covers
+    recursive schemas, while allOf members are inlined into the checks of their schema. Keywords outside the subset
+    the builder and configs produce, such as format, are not checked
+    """
+
+    def __init__(self, schemas: Dict[str, Any]):
+        """
+        :param schemas: The component schemas, by name
+        """
+        self.schemas = schemas
+        self.functions: Dict[str, List[str]] = {}
+        self.helpers: Dict[str, str] = {}
+        self.constants: Dict[str, str] = {}
+        self.counter = 0
+
+    def constant(self, prefix: str, source: str) -> str:
+        """
+        :return: Name of the module level constant with source as its value, declared once per distinct value
+        """
+        if source not in self.constants:
+            self.constants[source] = f"{prefix}{len(self.constants)}"
+        return self.constants[source]
+
+    def component(self, name: str) -> str:
+        """
+        :return: Name of the function validating the component schema, compiling it the first time it is needed
+        """
+        function = function_name(name)
+        if function not in self.functions:
+            self.functions[function] = []
+            self.functions[function] = self.function_body(self.schemas[name])
+        return function
+
+    def helper(self, schema: Dict[str, Any]) -> str:
+        """
+        :return: Name of a function validating an inline schema, such as an anyOf member, shared by identical schemas
+        """
+        ref = schema.get("$ref")
+        if isinstance(ref, str) and ref.startswith(REF_PREFIX) and ref[len(REF_PREFIX):] in self.schemas:
+            return self.component(ref[len(REF_PREFIX):])
+        key = canonical(schema)
+        if key not in self.helpers:
+            function = f"check{len(self.helpers)}"
+            self.helpers[key] = function
+            self.functions[function] = []
+            self.functions[function] = self.function_body(schema)
+        return self.helpers[key]
+
+    def function_body(self, schema: Dict[str, Any]) -> List[str]:
+        saved, self.counter = self.counter, 0
+        lines = self.statements(schema, "value", "  ")
+        self.counter = saved
+        return lines
+
+    def variable(self) -> str:
+        self.counter += 1
+        return f"v{self.counter}"
+
+    def statements(self, schema: Any, value: str, indent: str) -> List[str]:
+        """
+        :param schema: The schema to check value against
+        :param value: Expression for the value, evaluated without side effects
+        :param indent: Indentation of the statements
+        :return: Lines of statements that return false from the function when value does not match
+        """
+        if not isinstance(schema, dict):
+            return [] if schema is not False else [f"{indent}return false;"]
+        ref = schema.get("$ref")
+        if isinstance(ref, str):
+            if ref.startswith(REF_PREFIX) and ref[len(REF_PREFIX):] in self.schemas:
+                return [f"{indent}if (!{self.component(ref[len(REF_PREFIX):])}({value})) return false;"]
+            return []
+
+        if schema.get("nullable"):
+            inner = self.statements({key: item for key, item in schema.items() if key != "nullable"}, value, indent + "  ")
+            return [f"{indent}if ({value} !== null) {{", *inner, f"{indent}}}"] if inner else []
+
+        lines: List[str] = []
+        types = schema.get("type")
+        known = types if isinstance(types, str) else None
+        if types is not None:
+            types = [types] if isinstance(types, str) else types
+            checks = [TYPE_CHECKS[type_name].format(value) for type_name in types if type_name in TYPE_CHECKS]
+            if checks and len(checks) == len(types):
+                condition = " && ".join(f"({check})" if len(checks) > 1 else check for check in checks)
+                lines.append(f"{indent}if ({condition}) return false;")
+
+        if "enum" in schema:
+            values = self.constant("ENUM", f"new Set<unknown>({json.dumps(schema['enum'])})")
+            lines.append(f"{indent}if (!{values}.has({value})) return false;")
+
+        lines.extend(self.string_statements(schema, value, indent, known == "string"))
+        lines.extend(self.number_statements(schema, value, indent, known in {"number", "integer"}))
+        lines.extend(self.array_statements(schema, value, indent, known == "array"))
+        lines.extend(self.object_statements(schema, value, indent, known == "object"))
+
+        for member in schema.get("allOf", []):
+            lines.extend(self.statements(member, value, indent))
+        if "anyOf" in schema:
+            calls = " || ".join(f"{self.helper(member)}({value})" for member in schema["anyOf"])
+            lines.append(f"{indent}if (!({calls})) return false;")
+        if "oneOf" in schema:
+            calls = " + ".join(f"({self.helper(member)}({value}) ? 1 : 0)" for member in schema["oneOf"])
+            lines.append(f"{indent}if ({calls} !== 1) return false;")
+        if "not" in schema:
+            lines.append(f"{indent}if ({self.helper(schema['not'])}({value})) return false;")
+        return lines
+
+    @staticmethod
+    def guarded(lines: List[str], guard: Optional[str], indent: str) -> List[str]:
+        """
+        :return: The lines, inside an if block on guard unless the type is already known
+        """
+        if not lines or guard is None:
+            return lines
+        return [f"{indent}if ({guard}) {{", *["  " + line for line in lines], f"{indent}}}"]
+
+    def string_statements(self, schema: Dict[str, Any], value: str, indent: str, known: bool) -> List[str]:
+        lines: List[str] = []
+        if "minLength" in schema:
+            lines.append(f"{indent}if ({value}.length < {int(schema['minLength'])}) return false;")
+        if "maxLength" in schema:
+            lines.append(f"{indent}if ({value}.length > {int(schema['maxLength'])}) return false;")
+        if "pattern" in schema:
+            pattern = self.constant("PATTERN", f"new RegExp({json.dumps(schema['pattern'])}, \"u\")")
+            lines.append(f"{indent}if (!{pattern}.test({value})) return false;")
+        return self.guarded(lines, None if known else f'typeof {value} === "string"', indent)
+
+    def number_statements(self, schema: Dict[str, Any], value: str, indent: str, known: bool) -> List[str]:
+        lines: List[str] = []
+        # Bounds from doc comments, such as @minimum, are strings in the spec
+        bounds = {keyword: pragma_number(schema[keyword]) for keyword in NUMBER_KEYWORDS if keyword in schema}
+        for keyword, operator, exclusive in [("minimum", "<", "exclusiveMinimum"), ("maximum", ">", "exclusiveMaximum")]:
+            if is_number(bounds.get(keyword)):
+                strict = "=" if bounds.get(exclusive) is True else ""
+                lines.append(f"{indent}if ({value} {operator}{strict} {json.dumps(bounds[keyword])}) return false;")
+            if is_number(bounds.get(exclusive)):
+                lines.append(f"{indent}if ({value} {operator}= {json.dumps(bounds[exclusive])}) return false;")
+        if is_number(bounds.get("multipleOf")):
+            lines.append(f"{indent}if ({value} % {json.dumps(bounds['multipleOf'])} !== 0) return false;")
+        return self.guarded(lines, None if known else f'typeof {value} === "number"', indent)
+
+    def array_statements(self, schema: Dict[str, Any], value: str, indent: str, known: bool) -> List[str]:
+        lines: List[str] = []
+        inner = indent if known else indent + "  "
+        if "minItems" in schema:
+            lines.append(f"{inner}if ({value}.length < {int(schema['minItems'])}) return false;")
+        if "maxItems" in schema:
+            lines.append(f"{inner}if ({value}.length > {int(schema['maxItems'])}) return false;")
+        if "items" in schema:
+            item = self.variable()
+            checks = self.statements(schema["items"], item, inner + "  ")
+            if checks:
+                lines.extend([f"{inner}for (const {item} of {value}) {{", *checks, f"{inner}}}"])
+        if not lines or known:
+            return lines
+        return [f"{indent}if (Array.isArray({value})) {{", *lines, f"{indent}}}"]
+
+    def object_statements(self, schema: Dict[str, Any], value: str, indent: str, known: bool) -> List[str]:
+        properties: Dict[str, Any] = schema.get("properties", {})
+        additional = schema.get("additionalProperties", True)
+        lines: List[str] = []
+        inner = indent if known else indent + "  "
+        required = schema.get("required", [])
+        for name in required:
+            if name not in properties:
+                lines.append(f"{inner}if ({value}[{json.dumps(name)}] === undefined) return false;")
+        for name, property_schema in properties.items():
+            member = self.variable()
+            checks = self.statements(property_schema, member, inner + "  ")
+            if name in required:
+                lines.append(f"{inner}const {member} = {value}[{json.dumps(name)}];")
+                lines.append(f"{inner}if ({member} === undefined) return false;")
+                lines.extend(line[2:] for line in checks)
+            elif checks:
+                lines.extend([
+                    f"{inner}const {member} = {value}[{json.dumps(name)}];",
+                    f"{inner}if ({member} !== undefined) {{",
+                    *checks,
+                    f"{inner}}}",
+                ])
+        if additional is not True:
+            key = self.variable()
+            if not properties:
+                checks = self.statements(additional, f"{value}[{key}]", inner + "  ")
+                if checks:
+                    lines.extend([f"{inner}for (const {key} in {value}) {{", *checks, f"{inner}}}"])
+            else:
+                if len(properties) > KEY_SET_THRESHOLD:
+                    keys = self.constant("KEYS", f"new Set<string>({json.dumps(list(properties))})")
+                    declared = f"{keys}.has({key})"
+                else:
+                    declared = " || ".join(f"{key} === {json.dumps(name)}" for name in properties)
+                checks = self.statements(additional, f"{value}[{key}]", inner + "    ")
+                if checks:
+                    lines.extend([
+                        f"{inner}for (const {key} in {value}) {{",
+                        f"{inner}  if (!({declared})) {{",
+                        *checks,
+                        f"{inner}  }}",
+                        f"{inner}}}",
+                    ])
+        if not lines or known:
+            return lines
+        return [f'{indent}if (typeof {value} === "object" && {value} !== null && !Array.isArray({value})) {{', *lines, f"{indent}}}"]
+
+    def render(self, names: List[str]) -> str:
+        """
+        :param names: The schemas to export validators for
+        :return: The typescript module
+        """
+        exported = {name: self.component(name) for name in names}
+        output: List[str] = [GENERATED_BANNER, "\n"]
+        for source, constant in self.constants.items():
+            output.append(f"const {constant} = {source};\n")
+        if self.constants:
+            output.append("\n")
+        for function, lines in self.functions.items():
+            prefix = "export " if function in exported.values() else ""
+            output.append(f"{prefix}function {function}(value: any): boolean {{\n")
+            output.extend(f"{line}\n" for line in lines)
+            output.append("  return true;\n}\n\n")
+        output.append("export const validators: { [name: string]: (value: unknown) => boolean } = {\n")
+        output.extend(f"  {json.dumps(name)}: {function},\n" for name, function in exported.items())
+        output.append("};\n")
+        return "".join(output)
+
+
+def write_validators(openapi: Dict[str, Any], filename: str) -> bool:
+    """
+    Writes the validators of the schemas used as request bodies and responses, leaving the module untouched when its
+    content would not change
+    :param openapi: The spec
+    :param filename: The typescript module to write
+    :return: True if the module changed
+    """
+    compiler = ValidatorCompiler(openapi.get("components", {}).get("schemas", {}))
+    return write_bytes_if_changed(compiler.render(validated_schemas(openapi)).encode(), filename)
@@ -0,0 +1,83 @@
+from typing import Dict, List, Optional, Set
+import os
+import time
+import traceback
+
+from .builder import Corpus, build_configs
+from .cache import BuildCache
+
+WATCH_DIRECTORIES = ["src/api", "src/schemas", "build"]
+
+
+def snapshot(directories: List[str]) -> Dict[str, int]:
+    """
+    Collects the modification time of every file in the watched directories
+    :param directories: directories to walk
+    :return: Dictionary of path to mtime in nanoseconds
+    """
+    mtimes: Dict[str, int] = {}
+    for directory in directories:
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [name for name in dirs if not name.startswith(".")]
+            for filename in files:
+                path = f"{root}/{filename}"
+                try:
+                    mtimes[path] = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    pass
+    return mtimes
+
+
+def watched_mtimes(config_filenames: List[str]) -> Dict[str, int]:
+    """
+    :param config_filenames: config files being built
+    :return: Dictionary of path to mtime in nanoseconds of every file a build of the configs reads
+    """
+    watched = WATCH_DIRECTORIES + config_filenames + ["package.json"]
+    mtimes = snapshot([path for path in watched if os.path.isdir(path)])
+    for filename in watched:
+        if os.path.isfile(filename):
+            mtimes[filename] = os.stat(filename).st_mtime_ns
+    return mtimes
+
+
+def changed_paths(previous: Dict[str, int], current: Dict[str, int]) -> Set[str]:
+    return {path for path in set(previous) | set(current) if previous.get(path) != current.get(path)}
+
+
+def watch(
+    config_filenames: List[str],
+    cache: Optional[BuildCache] = None,
+    jobs: int = 1,
+    typeconv: bool = False,
+    interval: float = 0.5,
+) -> None:
+    """
+    Builds the configs, then polls the source tree and rebuilds them whenever a file changes.
+    Only the changed route and schema files are parsed again, everything else is kept in memory between builds.
+    With typeconv the interfaces are read from build/, so typeconv has to be rerun to pick up their changes.
+    :param config_filenames: config files to build
+    :param cache: Optional persistent cache of parsed inputs
+    :param jobs: number of processes used to parse the route files
+    :param typeconv: read the interface schemas from the typeconv output in build/ instead of converting them
+    :param interval: seconds between polls of the source tree
+    """
+    corpus: Optional[Corpus] = None
+    mtimes: Dict[str, int] = {}
+    while True:
+        current = watched_mtimes(config_filenames)
+        changed = changed_paths(mtimes, current)
+        mtimes = current
+
+        if changed:
+            started = time.perf_counter()
+            try:
+                corpus, _ = build_configs(
+                    config_filenames, cache=cache, jobs=jobs, typeconv=typeconv, previous=corpus, changed=changed
+                )
+            except Exception:
+                traceback.print_exc()
+            else:
+                print(f"Rebuilt in {(time.perf_counter() - started) * 1000:.0f}ms, watching for changes")
+
+        time.sleep(interval)
@@ -0,0 +1,120 @@
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional
+import hashlib
+import json
+import os
+import secrets
+
+CHUNK_SIZE = 1 << 16
+
+# The lists of the active recording() blocks
+recordings: List[List[str]] = []
+
+
+@contextmanager
+def recording() -> Iterator[List[str]]:
+    """
+    :return: List filled with every filename written inside the block, whether its content changed or not
+    """
+    written: List[str] = []
+    recordings.append(written)
+    try:
+        yield written
+    finally:
+        recordings.remove(written)
+
+
+def record(filename: str) -> None:
+    for written in recordings:
+        written.append(filename)
+
+
+def file_digest(filename: str) -> str:
+    """
+    :param filename: file to hash
+    :return: Hex sha256 of the file, or an empty string when it does not exist
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(filename, "rb") as fp:
+            while chunk := fp.read(CHUNK_SIZE):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return ""
+    return digest.hexdigest()
+
+
+def temp_filename(filename: str) -> str:
+    """
+    :param filename: file about to be replaced
+    :return: A name for its temporary file next to it, so the replace is an atomic rename. Unique to the write, as
+             processes in different containers sharing the directory can have the same pid
+    """
+    return f"{os.path.dirname(filename) or '.'}/.{os.path.basename(filename)}.{os.getpid()}.{secrets.token_hex(4)}.tmp"
+
+
+def write_bytes_if_changed(data: bytes, filename: str) -> bool:
+    """
+    Atomically replaces filename with data, only if the content differs
+    :param data: The new content
+    :param filename: file to write
+    :return: True if filename was written, False if it already had this content
+    """
+    record(filename)
+    if hashlib.sha256(data).hexdigest() == file_digest(filename):
+        return False
+    temp = temp_filename(filename)
+    try:
+        with open(temp, "xb") as fp:
+            fp.write(data)
+        os.replace(temp, filename)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return True
+
+
+def write_if_changed(document: Any, filename: str, indent: Optional[int] = 2, minify: bool = False) -> bool:
+    """
+    Streams a document as json into a temporary file next to filename, so the whole text is never held in memory,
+    then atomically replaces filename only if the content differs. An unchanged file keeps its mtime. Keys are written
+    in the order of the document, as json.dumps does, so callers pass documents that are already ordered, such as the
+    emitted specs, whose paths and schemas the emitters sort. Sorting here would move openapi and info below the
+    other keys of the spec
+    :param document: The document to encode, in the key order it is written in
+    :param filename: file to write
+    :param indent: json indent, the same as json.dumps
+    :param minify: leave out all whitespace, overriding indent
+    :return: True if filename was written, False if it already had this content
+    """
+    record(filename)
+    encoder = json.JSONEncoder(separators=(",", ":")) if minify else json.JSONEncoder(indent=indent)
+    temp = temp_filename(filename)
+    digest = hashlib.sha256()
+    try:
+        with open(temp, "xb") as fp:
+            buffer: List[str] = []
+            size = 0
+            for chunk in encoder.iterencode(document):
+                buffer.append(chunk)
+                size += len(chunk)
+                if size >= CHUNK_SIZE:
+                    data = "".join(buffer).encode()
+                    digest.update(data)
+                    fp.write(data)
+                    buffer = []
+                    size = 0
+            data = "".join(buffer).encode()
+            digest.update(data)
+            fp.write(data)
+
+        if digest.hexdigest() == file_digest(filename):
+            os.remove(temp)
+            return False
+        os.replace(temp, filename)
+        return True
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise